@@ -1,27 +1,84 @@
 import os
 import threading
-import yfinance as yf
-import pandas as pd
-import numpy as np
 import requests
 import io
-import csv
+import sqlite3
 import time
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 import json
 import warnings
-import matplotlib
-matplotlib.use('Agg') # 클라우드 이미지 에러 방지용
-import mplfinance as mpf
-import PIL.Image
-import google.generativeai as genai
+import importlib
+import math
 import concurrent.futures
+import multiprocessing
+import asyncio
+import collections
+import queue
+import uuid
+import hashlib
+import atexit
+import functools
+import pickle
 from flask import Flask, request, jsonify
 
 warnings.filterwarnings('ignore')
 
+# ==========================================
+# 💤 [LAZY IMPORTS: 무거운 의존성은 첫 사용 때 로드]
+# ==========================================
+_BOOT_T0 = time.perf_counter()
+IMPORT_TIMINGS = {}  # 모듈 → 실제 임포트에 걸린 초 (콜드 스타트 분석용, /warmup 에서 조회)
+_import_lock = threading.RLock()
+
+class LazyModule:
+    """첫 속성 접근 때 진짜 모듈을 임포트하는 대리 객체입니다. 덕분에 웹 프로세스는 pandas/yfinance/matplotlib/제미나이 SDK 없이
+    바로 떠서 헬스 체크(/)에 응답하고, 무거운 임포트는 사냥 파이프라인이 처음 쓰는 순간(또는 예열 때) 한 번만 치릅니다."""
+
+    def __init__(self, name, before=None, after=None):
+        self._name, self._before, self._after, self._module = name, before, after, None
+
+    def _load(self):
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    t0 = time.perf_counter()
+                    if self._before: self._before()
+                    module = importlib.import_module(self._name)
+                    if self._after: self._after(module)
+                    IMPORT_TIMINGS[self._name] = round(time.perf_counter() - t0, 3)
+                    self._module = module
+        return self._module
+
+    @property
+    def loaded(self): return self._module is not None
+
+    def __getattr__(self, attr): return getattr(self._load(), attr)
+
+    def __repr__(self): return f"<LazyModule {self._name} ({'loaded' if self.loaded else 'pending'})>"
+
+def _configure_genai(module):
+    if GEMINI_API_KEY: module.configure(api_key=GEMINI_API_KEY)
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+yf = LazyModule('yfinance')
+mpf = LazyModule('mplfinance', before=lambda: importlib.import_module('matplotlib').use('Agg'))  # 클라우드 이미지 에러 방지용
+PIL = LazyModule('PIL', after=lambda module: [importlib.import_module(f'PIL.{sub}') for sub in ('Image', 'ImageDraw', 'ImageFont')])
+genai = LazyModule('google.generativeai', after=_configure_genai)
+HEAVY_MODULES = [np, pd, yf, mpf, PIL, genai]
+
+def warm_imports():
+    """무거운 의존성을 모두 미리 로드합니다. (사전 예열 / GET /warmup?now=1 / OVERDRIVE_WARM_IMPORTS=1 부팅 훅)"""
+    for module in HEAVY_MODULES:
+        if isinstance(module, LazyModule): module._load()
+    return dict(IMPORT_TIMINGS)
+
+def import_report():
+    return {"boot_seconds": BOOT_SECONDS, "imports": dict(IMPORT_TIMINGS),
+            "pending": [m._name for m in HEAVY_MODULES if isinstance(m, LazyModule) and not m.loaded]}
+
 app = Flask(__name__)
 
 # ==========================================
@@ -33,9 +90,6 @@ GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
 KIS_APP_KEY = os.environ.get("KIS_APP_KEY", "")
 KIS_APP_SECRET = os.environ.get("KIS_APP_SECRET", "")
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
 KIS_URL_BASE = "https://openapivts.koreainvestment.com:29443"
 
 # ==========================================
@@ -68,50 +122,1859 @@ INVERSE_UNIVERSE = ['SQQQ', 'SOXS', 'SPXU', 'SDOW', 'TECS', 'TZA', 'FAZ', 'LABD'
 
 LOG_DIR = './OVERDRIVE_DATA'
 os.makedirs(LOG_DIR, exist_ok=True)
-LOG_FILE = os.path.join(LOG_DIR, "overdrive_battle_log.csv")
+RUN_STORE_FILE = os.path.join(LOG_DIR, "overdrive_runs.sqlite")
+PROFILES_FILE = os.environ.get("OVERDRIVE_PROFILES_FILE", os.path.join(LOG_DIR, "profiles.json"))  # 계좌/리스크 프로필 목록
 STATE_FILE = os.path.join(LOG_DIR, "overdrive_state.json")
+WATCH_FILE = os.path.join(LOG_DIR, "overdrive_watch.json")  # 감시 중인 주문 레벨 (재부팅 후 이어서 감시)
+PRICE_CACHE_DIR = os.path.join(LOG_DIR, "price_cache")
+os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+PRICE_WINDOW_DAYS = 92      # period="3mo" 와 동일한 스캔 창
+PRICE_HISTORY_DAYS = 1100   # 디스크에 보존하는 일봉 이력 (약 3년)
+PRICE_OVERLAP_DAYS = 5      # 델타 수신 시 겹쳐 받는 구간 (배당/분할 보정 감지용)
+OHLCV_COLS = ['Open', 'High', 'Low', 'Close', 'Volume']
+INDICATOR_STATE_FILE = os.path.join(PRICE_CACHE_DIR, "_indicator_state.pkl")
+PRICE_STORE_FILE = os.path.join(PRICE_CACHE_DIR, "_daily_store.npz")  # 전 종목 일봉을 한 파일에 담는 float32 컬럼 저장소
+MARKET_CAP_FILE = os.path.join(LOG_DIR, "market_cap_cache.json")
+MINUTE_CACHE_DIR = os.path.join(LOG_DIR, "minute_cache")  # 딥스캔 때 받은 1분봉 누적본 (백테스트 체결 시뮬레이션용)
+os.makedirs(MINUTE_CACHE_DIR, exist_ok=True)
+MINUTE_HISTORY_DAYS = 730
+CHART_CACHE_DIR = os.path.join(LOG_DIR, "chart_cache")
+os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+CHECKPOINT_DIR = os.path.join(LOG_DIR, "checkpoints")  # 사냥 단계별 산출물 (run_id 별 폴더, /hunt?resume= 로 재개)
+os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+UNIVERSE_FILE = os.path.join(LOG_DIR, "universe_snapshot.json")
+UNIVERSE_TTL_SEC = int(os.environ.get("UNIVERSE_TTL_SEC", 24 * 3600))  # 구성종목 스냅샷 유효기간 (기본 1일)
+MACRO_TICKERS = ['^VIX', '^TNX']  # 벌크 일봉 요청에 함께 실어 받는 매크로 지표
+BOOTSTRAP_TIMEOUT_SEC = {"failed_state": 2.0, "market_status": 1.0, "universe": 5.0}
+GEMINI_MODEL_NAME = 'gemini-2.5-pro'
+GEMINI_FAST_MODEL_NAME = 'gemini-2.5-flash'  # 텍스트 전용 예선(10강 → 본선) 모델
+AI_SHORTLIST_SIZE = int(os.environ.get("OVERDRIVE_AI_SHORTLIST", 4))          # Pro 차트 심사에 올릴 본선 후보 수
+AI_STAGE_DEADLINE_SEC = float(os.environ.get("OVERDRIVE_AI_DEADLINE_SEC", 45))  # AI 심사 전체 마감 (넘기면 파워 스코어 1위로 대체)
+AI_PRESCREEN_TIMEOUT_SEC = 8.0
+AI_HEDGE_AFTER_SEC = 20.0   # Pro 응답이 이보다 늦거나 실패하면 같은 요청을 한 번 더 보내 먼저 온 답을 채택
+AI_COACH_WAIT_SEC = 5.0     # 조준표 출력 뒤 심리 코치 답을 더 기다려 주는 시간
+AI_COACH_BUDGET_SEC = 20.0  # 심리 코치 자체 마감 (심사 마감 전체를 쓰지 않고, 늦으면 기본 경고문으로)
+
+# ==========================================
+# 📈 [METRICS: 단계별 계측 + Prometheus /metrics]
+# ==========================================
+METRIC_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+METRIC_HELP = {
+    "overdrive_phase_seconds": ("histogram", "사냥 진행 단계(set_run_phase 구간)별 벽시계 소요 시간"),
+    "overdrive_stage_seconds": ("histogram", "핵심 함수(매크로/유니버스/벌크/스코어링/딥스캔/차트/제미나이/텔레그램)별 소요 시간"),
+    "overdrive_run_seconds": ("histogram", "트리거부터 종료까지 사냥 1회 전체 소요 시간"),
+    "overdrive_runs_total": ("counter", "종료 상태별 사냥 횟수"),
+    "overdrive_retries_total": ("counter", "외부 호출 재시도 횟수"),
+    "overdrive_payload_bytes_total": ("counter", "수신/발신 페이로드 크기 (야후 프레임은 디코딩 후 크기)"),
+    "overdrive_last_run_tickers": ("gauge", "직전 사냥의 단계별 종목 수"),
+    "overdrive_checkpoint_reuse_total": ("counter", "재개/세컨드 샷에서 체크포인트로 건너뛴 단계 수"),
+    "overdrive_fetch_chunk_seconds": ("histogram", "벌크 수신 청크 1개(yf.download 1회) 소요 시간"),
+    "overdrive_fetch_coverage_ratio": ("gauge", "직전 벌크 수신의 요청 대비 수신 종목 비율"),
+    "overdrive_price_store_bytes": ("gauge", "일봉 저장소(float32 가격 + 정수 거래량) 배열 크기 (history: 전체 이력 / window: 스캔 창)"),
+    "overdrive_ai_deadline_total": ("counter", "AI 심사 마감 초과로 파워 스코어 1위로 대체한 횟수"),
+    "overdrive_prompt_tokens_estimate": ("gauge", "직전 제미나이 프롬프트의 추정 입력 토큰 수 (텍스트 + 이미지)"),
+    "overdrive_watch_alerts_total": ("counter", "주문 감시가 보낸 트리거/MOC 알림 수 (채팅방 수와 무관하게 발동 1회당 1)"),
+}
+
+class MetricsRegistry:
+    """외부 의존성 없이 히스토그램/카운터/게이지를 모아 Prometheus 텍스트 포맷으로 내보냅니다."""
+
+    def __init__(self, buckets=METRIC_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._hist, self._counters, self._gauges = {}, {}, {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            h = self._hist.setdefault(self._key(name, labels), [[0] * len(self._buckets), 0.0, 0])
+            for i, b in enumerate(self._buckets):
+                if value <= b: h[0][i] += 1
+            h[1] += value
+            h[2] += 1
+
+    def inc(self, name, value=1.0, **labels):
+        with self._lock:
+            key = self._key(name, labels)
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock: self._gauges[self._key(name, labels)] = float(value)
+
+    def render(self):
+        def fmt(labels, extra=()):
+            items = list(labels) + list(extra)
+            return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}" if items else ""
+        lines, seen = [], set()
+        def header(name):
+            if name in seen: return
+            seen.add(name)
+            kind, help_text = METRIC_HELP.get(name, ("untyped", name))
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"])
+        with self._lock:
+            for (name, labels), (counts, total, n) in sorted(self._hist.items()):
+                header(name)
+                for b, c in zip(self._buckets, counts): lines.append(f"{name}_bucket{fmt(labels, [('le', b)])} {c}")
+                lines.append(f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {n}")
+                lines.append(f"{name}_sum{fmt(labels)} {total:.6f}")
+                lines.append(f"{name}_count{fmt(labels)} {n}")
+            for store in (self._counters, self._gauges):
+                for (name, labels), value in sorted(store.items()):
+                    header(name)
+                    lines.append(f"{name}{fmt(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+def record_stage(stage, seconds):
+    metrics.observe("overdrive_stage_seconds", seconds, stage=stage)
+    hunt_jobs.record_span(stage, seconds)
+
+def timed_stage(stage):
+    """함수 한 번 호출을 stage 구간으로 계측합니다. (/metrics 히스토그램 + 현재 실행의 spans)"""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try: return fn(*args, **kwargs)
+            finally: record_stage(stage, time.perf_counter() - t0)
+        return wrapper
+    return deco
+
+def frame_nbytes(df):
+    try: return int(df.memory_usage(index=True).sum()) if df is not None and not df.empty else 0
+    except: return 0
 
 # ==========================================
 # 📡 [TELEGRAM TERMINAL SYSTEM]
 # ==========================================
-telegram_log = ""
+TELEGRAM_CHUNK_SIZE = 3500
+TELEGRAM_MIN_INTERVAL_SEC = 1.05  # 같은 채팅방 연속 발사 최소 간격 (텔레그램 초당 1건 한도)
+TELEGRAM_MAX_RETRIES = 5
+TELEGRAM_DRAIN_TIMEOUT_SEC = 120
+
+def _chunk_text(text, size=TELEGRAM_CHUNK_SIZE):
+    """줄 경계를 최대한 지키면서 텔레그램 한도 이하로 자릅니다."""
+    parts, cur = [], ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > size:
+            if cur: parts.append(cur); cur = ""
+            parts.append(line[:size]); line = line[size:]
+        if len(cur) + len(line) > size: parts.append(cur); cur = ""
+        cur += line
+    if cur: parts.append(cur)
+    return parts
+
+class TelegramSender:
+    """풀링된 HTTP 세션 하나로 메시지를 순서대로 발사하는 백그라운드 송신기. 429 retry_after를 지키며 실패 청크는 재시도합니다."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._session = requests.Session()
+        self._session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self._last_sent = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, chat_id, text):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="telegram-sender", daemon=True)
+                self._thread.start()
+        self._queue.put((chat_id, text))
+
+    def drain(self, timeout=TELEGRAM_DRAIN_TIMEOUT_SEC):
+        """대기열이 비거나 timeout이 지날 때까지 기다립니다."""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline: time.sleep(0.1)
+        return self._queue.unfinished_tasks == 0
+
+    def _worker(self):
+        while True:
+            chat_id, text = self._queue.get()
+            try: self._deliver(chat_id, text)
+            except Exception as e: print(f"텔레그램 송신기 에러: {e}")
+            finally: self._queue.task_done()
+
+    def _deliver(self, chat_id, text):
+        for attempt in range(TELEGRAM_MAX_RETRIES):
+            wait = TELEGRAM_MIN_INTERVAL_SEC - (time.time() - self._last_sent.get(chat_id, 0.0))
+            if wait > 0: time.sleep(wait)
+            try:
+                r = self._session.post(f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage",
+                                       json={"chat_id": chat_id, "text": f"<pre>{text}</pre>", "parse_mode": "HTML"}, timeout=10)
+                self._last_sent[chat_id] = time.time()
+                if r.status_code == 429:
+                    metrics.inc("overdrive_retries_total", kind="telegram_429")
+                    try: retry_after = float(r.json().get("parameters", {}).get("retry_after", 2 ** attempt))
+                    except ValueError: retry_after = 2 ** attempt
+                    print(f"텔레그램 속도 제한(429). {retry_after:.0f}초 후 재전송 ({attempt+1}/{TELEGRAM_MAX_RETRIES})")
+                    time.sleep(retry_after)
+                    continue
+                if r.status_code >= 500:
+                    metrics.inc("overdrive_retries_total", kind="telegram_error")
+                    time.sleep(2 ** attempt)
+                    continue
+                if not r.ok: print(f"텔레그램 전송 거부 ({r.status_code}): {r.text[:200]}")
+                else: metrics.inc("overdrive_payload_bytes_total", len(text.encode()), source="telegram")
+                return
+            except requests.RequestException as e:
+                metrics.inc("overdrive_retries_total", kind="telegram_error")
+                print(f"텔레그램 전송 에러: {e}")
+                time.sleep(2 ** attempt)
+        print(f"🚨 텔레그램 전송 최종 실패: {len(text)}자 청크 유실")
+
+telegram_sender = TelegramSender()
+
+class RunOutput:
+    """사냥 1회 분량의 터미널 출력 버퍼. 완성된 섹션은 stream()으로 사냥 도중에 먼저 발사할 수 있습니다."""
+
+    def __init__(self, chat_id=TELEGRAM_CHAT_ID):
+        self.chat_id = chat_id
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def write(self, msg):
+        with self._lock: self._pending.append(msg)
+
+    def stream(self):
+        """지금까지 쌓인 출력을 송신기 대기열에 넘기고 버퍼를 비웁니다. (발사는 백그라운드)"""
+        with self._lock:
+            text, self._pending = "\n".join(self._pending), []
+        if not TELEGRAM_TOKEN or not text: return
+        # HTML 변환 및 <pre> 태그로 터미널 고정폭 폰트 적용
+        safe_text = text.replace('<', '&lt;').replace('>', '&gt;')
+        for p in _chunk_text(safe_text): telegram_sender.submit(self.chat_id, p)
+
+_output_local = threading.local()
+_default_output = RunOutput()
+
+def bind_run_output(output):
+    """현재 스레드의 t_print 출력을 이 실행 전용 버퍼로 연결합니다."""
+    _output_local.output = output
+    return output
+
+def current_output():
+    return getattr(_output_local, "output", None) or _default_output
 
 def t_print(*args):
     """기존 터미널의 print()를 가로채어 텔레그램으로 보낼 준비를 합니다."""
-    global telegram_log
     msg = " ".join(map(str, args))
-    telegram_log += msg + "\n"
+    current_output().write(msg)
     print(msg) # Render 로그용
 
+def submit_with_output(executor, fn, *args, **kwargs):
+    """보조 스레드에서 돌리는 작업도 t_print가 같은 실행 버퍼로 모이도록 현재 출력 버퍼를 넘겨줍니다."""
+    output = current_output()
+    def run():
+        bind_run_output(output)
+        return fn(*args, **kwargs)
+    return executor.submit(run)
+
+def stream_telegram():
+    """완성된 섹션(예: 후보 보드)을 AI 심사 도중에 먼저 발사합니다."""
+    current_output().stream()
+
+@timed_stage("telegram_flush")
 def flush_telegram():
-    """쌓인 터미널 출력물을 텔레그램으로 발사합니다."""
-    global telegram_log
-    if not TELEGRAM_TOKEN or not telegram_log: return
-    
-    # HTML 변환 및 <pre> 태그로 터미널 고정폭 폰트 적용
-    safe_text = telegram_log.replace('<', '&lt;').replace('>', '&gt;')
-    parts = [safe_text[i:i+3500] for i in range(0, len(safe_text), 3500)]
-    for p in parts:
+    """쌓인 터미널 출력물을 텔레그램으로 발사하고, 전송이 끝날 때까지 기다립니다."""
+    current_output().stream()
+    telegram_sender.drain()
+
+# ==========================================
+# 🗄️ [PRICE CACHE: 로컬 일봉 저장소 + 델타 수신]
+# ==========================================
+def _price_cache_path(ticker, root=PRICE_CACHE_DIR):
+    return os.path.join(root, f"{ticker.replace('^', '_')}.pkl")
+
+def load_cached_bars(ticker, root=PRICE_CACHE_DIR):
+    path = _price_cache_path(ticker, root)
+    if os.path.exists(path):
+        try: return pd.read_pickle(path)
+        except: pass
+    return None
+
+def save_cached_bars(ticker, df, root=PRICE_CACHE_DIR):
+    path = _price_cache_path(ticker, root)
+    try:
+        df.to_pickle(path + ".tmp")
+        os.replace(path + ".tmp", path)
+    except Exception as e: print(f"가격 캐시 저장 에러 ({ticker}): {e}")
+
+def split_download(data, tickers):
+    """yf.download 결과(멀티/단일 컬럼)를 티커별 OHLCV 프레임으로 분해합니다. (필드별 행렬을 한 번만 뽑아 열 단위로 자릅니다)"""
+    frames = {}
+    if data is None or data.empty: return frames
+    if isinstance(data.columns, pd.MultiIndex):
+        level = 1 if 'Close' in data.columns.get_level_values(0) else 0
+        if not set(OHLCV_COLS).issubset(data.columns.get_level_values(1 - level)): return frames
+        names = data.columns.get_level_values(level).unique()
+        arrays = {c: data.xs(c, level=1 - level, axis=1).reindex(columns=names).to_numpy(dtype=float) for c in OHLCV_COLS}
+        for j, t in enumerate(names):
+            ok = ~np.isnan(arrays['Close'][:, j])
+            if ok.any(): frames[t] = pd.DataFrame({c: arrays[c][ok, j] for c in OHLCV_COLS}, index=data.index[ok])
+    elif len(tickers) == 1 and set(OHLCV_COLS).issubset(data.columns):
+        sub = data[OHLCV_COLS].dropna(subset=['Close'])
+        if not sub.empty: frames[tickers[0]] = sub
+    return frames
+
+def _merge_bars(old, new, keep_days=PRICE_HISTORY_DAYS):
+    """저장된 이력과 새 봉을 병합하고, 같은 날짜의 (미완성) 봉은 최신 값으로 덮어씁니다."""
+    if old is None or old.empty: merged = new
+    elif new is None or new.empty: merged = old
+    else: merged = pd.concat([old, new])
+    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+    return merged[merged.index >= merged.index.max() - pd.Timedelta(days=keep_days)]
+
+def save_minute_bars(frames):
+    """딥스캔이 받아온 1분봉을 티커별로 누적합니다. (야후는 1분봉을 최근 30일치만 주므로 직접 쌓아야 백테스트가 가능)"""
+    for t, df in frames.items():
+        try: save_cached_bars(t, _merge_bars(load_cached_bars(t, MINUTE_CACHE_DIR), df, MINUTE_HISTORY_DAYS), MINUTE_CACHE_DIR)
+        except Exception as e: print(f"1분봉 캐시 저장 에러 ({t}): {e}")
+
+# ==========================================
+# 🚚 [BULK FETCH: 청크 분할 + AIMD 적응 + 실패 종목만 재시도]
+# ==========================================
+FETCH_CHUNK_SIZE = int(os.environ.get("OVERDRIVE_FETCH_CHUNK", 120))      # 첫 청크 크기 (이후 관측치로 자동 조절)
+FETCH_CHUNK_MIN, FETCH_CHUNK_MAX, FETCH_CHUNK_STEP = 20, 400, 40
+FETCH_THREADS, FETCH_THREADS_MIN, FETCH_THREADS_MAX = 8, 2, 16            # yf.download(threads=N) 동시 요청 수
+FETCH_SLOW_SEC = float(os.environ.get("OVERDRIVE_FETCH_SLOW_SEC", 20.0))  # 청크 1개가 이보다 느리면 혼잡으로 간주
+FETCH_MISS_TOLERANCE = 0.15     # 청크 내 누락 비율이 이보다 크면 스로틀링으로 간주
+FETCH_RETRY_ROUNDS = 2          # 누락 종목만 모아 다시 요청하는 최대 횟수
+FETCH_BACKOFF_SEC = 1.0
+FETCH_DEAD_AFTER = 3            # 재시도까지 마친 수신에서 연속 이만큼 빠진 종목은 상장폐지/심볼 변경으로 보고 그날은 재시도 대상에서 뺌
+
+class BulkFetcher:
+    """종목 목록을 청크로 나눠 yf.download를 차례로 호출하고, 청크마다 지연/누락률을 보고 크기와 동시성을 AIMD로 조절합니다.
+    (순조로우면 청크 +STEP / 스레드 +1, 느리거나 누락·예외가 나면 둘 다 절반) 조절값은 프로세스 수명 동안 유지되어 다음 사냥이 이어받습니다.
+    한 라운드가 끝나면 빠진 종목만 모아 백오프 후 재요청하고, 요청 대비 수신 커버리지를 리포트로 돌려줍니다.
+    번번이 빠지는 종목(dead)은 첫 요청에는 넣되 재시도와 누락률 계산에서는 제외해, 죽은 심볼 때문에 청크가 쪼그라들지 않게 합니다.
+    dead 판정은 마지막 누락일(ET) 하루만 유효해서, 일시 장애로 찍힌 종목도 다음 날엔 다시 재시도 대상이 됩니다.
+    잠금은 조절값/dead 장부를 읽고 쓸 때만 잡고, 네트워크 요청과 백오프 대기는 잠금 밖에서 합니다."""
+
+    def __init__(self, chunk=FETCH_CHUNK_SIZE, threads=FETCH_THREADS):
+        self.chunk = max(FETCH_CHUNK_MIN, min(FETCH_CHUNK_MAX, chunk))
+        self.threads = threads
+        self.dead = {}  # 티커 -> (연속 누락 횟수, 마지막 누락일)
+        self._lock = threading.Lock()
+
+    def _is_dead(self, ticker, today):
+        misses, day = self.dead.get(ticker, (0, None))
+        return misses >= FETCH_DEAD_AFTER and day == today
+
+    def _adapt(self, seconds, n_asked, n_missing, failed):
+        """청크 1개의 결과로 크기/동시성을 조절합니다. 예외나 지연(=혼잡)이면 True를 돌려 다음 청크 전에 잠깐 쉬게 합니다. (잠금 안에서 호출)"""
+        congested = failed or seconds > FETCH_SLOW_SEC
+        if congested or n_missing > FETCH_MISS_TOLERANCE * n_asked:
+            self.chunk = max(FETCH_CHUNK_MIN, self.chunk // 2)
+            self.threads = max(FETCH_THREADS_MIN, self.threads // 2)
+        else:
+            self.chunk = min(FETCH_CHUNK_MAX, self.chunk + FETCH_CHUNK_STEP)
+            self.threads = min(FETCH_THREADS_MAX, self.threads + 1)
+        return congested
+
+    def fetch(self, tickers, source="yahoo_daily", **kwargs):
+        """tickers 를 받아 {티커: OHLCV 프레임}과 커버리지 리포트를 돌려줍니다. kwargs 는 yf.download 에 그대로 넘깁니다."""
+        tickers = list(dict.fromkeys(tickers))
+        frames, pending = {}, tickers
+        report = {"requested": len(tickers), "chunks": 0, "errors": 0, "retried": 0, "rounds": 0}
+        t0 = time.time()
+        today = datetime.now(pytz.timezone('US/Eastern')).date()
+        with self._lock: dead = {t for t in tickers if self._is_dead(t, today)}
+        for rnd in range(FETCH_RETRY_ROUNDS + 1):
+            if rnd: pending = [t for t in pending if t not in dead]
+            if not pending: break
+            if rnd:
+                report["retried"] += len(pending)
+                metrics.inc("overdrive_retries_total", len(pending), kind="yahoo_missing")
+                time.sleep(FETCH_BACKOFF_SEC * 2 ** (rnd - 1))
+            report["rounds"] = rnd + 1
+            missed, k = [], 0
+            while k < len(pending):
+                with self._lock: chunk, threads = self.chunk, self.threads
+                part = pending[k:k + chunk]
+                k += len(part)
+                start, got, failed = time.time(), {}, False
+                try:
+                    raw = yf.download(part, threads=threads, progress=False, **kwargs)
+                    metrics.inc("overdrive_payload_bytes_total", frame_nbytes(raw), source=source)
+                    got = split_download(raw, part)
+                except Exception as e:
+                    failed = True
+                    report["errors"] += 1
+                    print(f"벌크 수신 에러 ({len(part)}종목): {e}")
+                seconds = time.time() - start
+                metrics.observe("overdrive_fetch_chunk_seconds", seconds, source=source)
+                report["chunks"] += 1
+                frames.update(got)
+                missed += [t for t in part if t not in got]
+                n_missing = sum(1 for t in part if t not in got and t not in dead)
+                with self._lock: congested = self._adapt(seconds, len(part), n_missing, failed)
+                if congested and k < len(pending): time.sleep(FETCH_BACKOFF_SEC)
+            pending = missed
+        with self._lock:
+            for t in tickers:
+                if t in frames: self.dead.pop(t, None)
+                else: self.dead[t] = (self.dead.get(t, (0, None))[0] + 1, today)
+            chunk, threads = self.chunk, self.threads
+        missing = [t for t in tickers if t not in frames]
+        report.update(fetched=len(frames), missing=missing, seconds=time.time() - t0, chunk=chunk, threads=threads)
+        report["coverage"] = len(frames) / len(tickers) if tickers else 1.0
+        metrics.set("overdrive_fetch_coverage_ratio", report["coverage"], source=source)
+        return frames, report
+
+bulk_fetcher = BulkFetcher()
+
+def merge_fetch_reports(reports):
+    """그룹별(델타 시작일별/전체 수신) 리포트를 사냥 1회 합계로 묶습니다."""
+    total = {"requested": 0, "fetched": 0, "chunks": 0, "errors": 0, "retried": 0, "rounds": 0, "seconds": 0.0, "missing": []}
+    for r in reports:
+        for key in ("requested", "fetched", "chunks", "errors", "retried", "seconds"): total[key] += r[key]
+        total["rounds"] = max(total["rounds"], r["rounds"])
+        total["missing"] += r["missing"]
+    total["coverage"] = total["fetched"] / total["requested"] if total["requested"] else 1.0
+    total.update(chunk=bulk_fetcher.chunk, threads=bulk_fetcher.threads)
+    return total
+
+# ==========================================
+# 🧱 [PRICE STORE: float32 컬럼 저장소 + 무복사 뷰]
+# ==========================================
+class PriceStore:
+    """전 종목 일봉을 (필드 x 티커 x 날짜) float32 배열 하나와 정수 거래량 배열로 들고 있는 저장소입니다.
+    날짜 축은 모든 티커가 공유하고, 티커마다 첫/마지막 유효 봉 위치(offset)만 따로 기억합니다.
+    티커별 프레임과 (날짜 x 티커) 행렬은 모두 이 배열의 뷰라서, 스캔 중에 float64 사본이 몇 벌씩 생기지 않습니다."""
+    PRICE_COLS = OHLCV_COLS[:4]
+
+    def __init__(self, dates=None, tickers=(), ohlc=None, volume=None):
+        self.dates = pd.DatetimeIndex([] if dates is None else dates)
+        self.tickers = list(tickers)
+        self.pos = {t: i for i, t in enumerate(self.tickers)}
+        shape = (len(self.tickers), len(self.dates))
+        self.ohlc = np.ascontiguousarray(ohlc, dtype=np.float32) if ohlc is not None else np.full((4,) + shape, np.nan, dtype=np.float32)
+        self.volume = np.ascontiguousarray(volume, dtype=np.int64) if volume is not None else np.zeros(shape, dtype=np.int64)
+        self._offsets()
+
+    def _offsets(self):
+        valid = ~np.isnan(self.ohlc[3])
+        self.n_valid = valid.sum(axis=1)
+        if not len(self.dates):
+            self.first, self.last = np.zeros(len(self.tickers), dtype=int), np.full(len(self.tickers), -1)
+            return
+        self.first = np.where(self.n_valid > 0, valid.argmax(axis=1), len(self.dates))
+        self.last = np.where(self.n_valid > 0, len(self.dates) - 1 - valid[:, ::-1].argmax(axis=1), -1)
+
+    @property
+    def empty(self): return not self.tickers or not len(self.dates) or not self.n_valid.any()
+
+    @property
+    def nbytes(self): return self.ohlc.nbytes + self.volume.nbytes
+
+    def __contains__(self, ticker): return ticker in self.pos and self.n_valid[self.pos[ticker]] > 0
+
+    def last_date(self, ticker):
+        i = self.pos.get(ticker)
+        return self.dates[self.last[i]] if i is not None and self.last[i] >= 0 else None
+
+    def count(self, ticker):
+        i = self.pos.get(ticker)
+        return int(self.n_valid[i]) if i is not None else 0
+
+    def is_adjusted(self, ticker, df):
+        """겹치는 '완성 봉'의 종가가 0.5% 넘게 달라졌다면 배당/분할 보정이 일어난 것이므로 전체 재수신이 필요합니다."""
+        i = self.pos.get(ticker)
+        if i is None or self.last[i] < 0: return False
+        at = self.dates.get_indexer(_naive_index(df.index))
+        ok = (at >= 0) & (at < self.last[i])
+        a, b = self.ohlc[3, i, at[ok]].astype(float), df['Close'].to_numpy(dtype=float)[ok]
+        ok = ~np.isnan(a)
+        return bool((np.abs(a[ok] - b[ok]) / np.maximum(np.abs(a[ok]), 1e-9) > 0.005).any())
+
+    def frame(self, ticker):
+        """티커 1개의 OHLCV 프레임. 첫~마지막 유효 봉 사이에 빈 날이 없으면(대부분) 배열을 그대로 가리키는 무복사 뷰입니다."""
+        i = self.pos.get(ticker)
+        if i is None or self.last[i] < 0: return pd.DataFrame(columns=OHLCV_COLS)
+        span = slice(self.first[i], self.last[i] + 1)
+        cols = {c: self.ohlc[k, i, span] for k, c in enumerate(self.PRICE_COLS)}
+        cols['Volume'] = self.volume[i, span]
+        df = pd.DataFrame(cols, index=self.dates[span], copy=False)
+        return df if self.n_valid[i] == len(df) else df[~np.isnan(cols['Close'])]
+
+    def wide(self):
+        """(날짜 x 티커) Open/High/Low/Close/Volume 행렬. 가격 4개는 전치 뷰이고, 거래량만 결측(NaN) 표기를 위해 float 사본을 만듭니다."""
+        opens, highs, lows, closes = (pd.DataFrame(self.ohlc[k].T, index=self.dates, columns=self.tickers, copy=False) for k in range(4))
+        volumes = pd.DataFrame(np.where(np.isnan(self.ohlc[3]), np.nan, self.volume).T, index=self.dates, columns=self.tickers)
+        return opens, highs, lows, closes, volumes
+
+    def window(self, tickers, days=PRICE_WINDOW_DAYS):
+        """요청 티커만 골라 최근 days일 구간을 압축 사본 1벌로 떼어냅니다. (스캔 1회가 쥐는 유일한 가격 사본)"""
+        idx = [self.pos[t] for t in dict.fromkeys(tickers) if t in self]
+        if not idx or not len(self.dates): return PriceStore()
+        t0 = int(self.dates.searchsorted(self.dates[-1] - pd.Timedelta(days=days)))
+        ohlc, volume = self.ohlc[:, idx, t0:], self.volume[idx, t0:]
+        keep = ~np.isnan(ohlc[3]).all(axis=0)
+        return PriceStore(self.dates[t0:][keep], [self.tickers[i] for i in idx], ohlc[:, :, keep], volume[:, keep])
+
+    def update(self, frames, replace=()):
+        """티커별 새 봉을 같은 날짜 칸에 덮어씁니다. replace 에 든 티커는 기존 이력을 지우고 새로 씁니다.
+        새 날짜/새 티커가 있으면 배열을 한 번만 늘려서 재배치합니다."""
+        frames = {t: (df, _naive_index(df.index)) for t, df in frames.items() if df is not None and not df.empty}
+        frames = {t: (df, idx) if idx.is_unique else (df[~idx.duplicated(keep='last')], idx[~idx.duplicated(keep='last')]) for t, (df, idx) in frames.items()}
+        if not frames: return
+        new_dates = pd.DatetimeIndex(np.concatenate([idx.values for _, idx in frames.values()]))
+        dates = self.dates.append(new_dates).unique().sort_values()
+        tickers = self.tickers + [t for t in frames if t not in self.pos]
+        if len(dates) != len(self.dates) or len(tickers) != len(self.tickers):
+            ohlc = np.full((4, len(tickers), len(dates)), np.nan, dtype=np.float32)
+            volume = np.zeros((len(tickers), len(dates)), dtype=np.int64)
+            at = dates.get_indexer(self.dates)
+            ohlc[:, :len(self.tickers), at], volume[:len(self.tickers), at] = self.ohlc, self.volume
+            self.__init__(dates, tickers, ohlc, volume)
+        for t, (df, idx) in frames.items():
+            i = self.pos[t]
+            if t in replace: self.ohlc[:, i, :], self.volume[i, :] = np.nan, 0
+            at = self.dates.get_indexer(idx)
+            for k, c in enumerate(self.PRICE_COLS): self.ohlc[k, i, at] = df[c].to_numpy()
+            self.volume[i, at] = np.nan_to_num(df['Volume'].to_numpy(dtype=float)).round().astype(np.int64)
+        self._offsets()
+
+    def trim(self, keep_days=PRICE_HISTORY_DAYS):
+        if not len(self.dates): return
+        t0 = int(self.dates.searchsorted(self.dates[-1] - pd.Timedelta(days=keep_days)))
+        if t0 > 0: self.__init__(self.dates[t0:], self.tickers, self.ohlc[:, :, t0:], self.volume[:, t0:])
+
+    def save(self, path=PRICE_STORE_FILE):
         try:
-            requests.post(f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage", 
-                          json={"chat_id": TELEGRAM_CHAT_ID, "text": f"<pre>{p}</pre>", "parse_mode": "HTML"}, timeout=10)
-        except Exception as e:
-            print(f"텔레그램 전송 에러: {e}")
-    telegram_log = ""
+            with open(path + ".tmp", 'wb') as f:
+                np.savez(f, dates=self.dates.values.astype('datetime64[ns]').view(np.int64), tickers=np.array(self.tickers, dtype=str), ohlc=self.ohlc, volume=self.volume)
+            os.replace(path + ".tmp", path)
+        except Exception as e: print(f"가격 저장소 저장 에러: {e}")
+
+    @classmethod
+    def load(cls, path=PRICE_STORE_FILE):
+        if os.path.exists(path):
+            try:
+                with np.load(path) as z: return cls(pd.to_datetime(z['dates']), z['tickers'].tolist(), z['ohlc'], z['volume'])
+            except Exception as e: print(f"가격 저장소 로드 에러: {e}")
+        store = cls()
+        legacy = {}  # 티커별 피클 캐시(구버전)가 남아 있으면 한 번만 흡수합니다.
+        for name in os.listdir(os.path.dirname(path) or '.'):
+            if not name.endswith('.pkl') or name == os.path.basename(INDICATOR_STATE_FILE): continue
+            t = name[:-4]
+            t = '^' + t[1:] if t.startswith('_') else t
+            df = load_cached_bars(t, os.path.dirname(path))
+            if df is not None and not df.empty: legacy[t] = df
+        if legacy:
+            store.update(legacy)
+            store.save(path)
+        return store
+
+    def to_frame(self):
+        """yf.download(...) 와 같은 (필드, 티커) 멀티컬럼 프레임으로 풀어냅니다. (녹화/디버깅용)"""
+        if self.empty: return pd.DataFrame()
+        wide = dict(zip(OHLCV_COLS, self.wide()))
+        return pd.concat(wide, axis=1).sort_index(axis=1)
+
+def _naive_index(index):
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize(None) if index.tz is not None else index
+
+_price_store = None
+_price_cache_lock = threading.Lock()  # 사전 예열과 사냥이 같은 저장소/지표 상태를 동시에 쓰지 않도록
+
+def price_store():
+    """프로세스 수명 동안 메모리에 상주하는 일봉 저장소. 첫 호출 때만 디스크에서 읽습니다."""
+    global _price_store
+    if _price_store is None: _price_store = PriceStore.load()
+    return _price_store
+
+@timed_stage("bulk_download")
+def fetch_bulk_prices(tickers, period="3mo"):
+    """로컬 일봉 저장소를 먼저 읽고, 마지막 저장 시점 이후의 봉(델타)만 야후에서 받아 병합합니다.
+    반환값은 요청 티커의 최근 3개월 구간만 떼어낸 PriceStore 입니다. (비어 있으면 .empty)"""
+    with _price_cache_lock: return _fetch_bulk_prices(tickers, period)
+
+def _fetch_bulk_prices(tickers, period):
+    tickers = list(dict.fromkeys(tickers))
+    store = price_store()
+    horizon = pd.Timestamp.now().normalize() - pd.Timedelta(days=PRICE_WINDOW_DAYS // 2)
+
+    cold, warm_groups = [], {}
+    for t in tickers:
+        last = store.last_date(t) if store.count(t) >= 25 else None
+        if last is None or last < horizon: cold.append(t)
+        else: warm_groups.setdefault((last - pd.Timedelta(days=PRICE_OVERLAP_DAYS)).strftime('%Y-%m-%d'), []).append(t)
+
+    fresh, n_adjusted, reports = {}, 0, []
+    for start, group in warm_groups.items():
+        delta, report = bulk_fetcher.fetch(group, start=start, prepost=True)
+        reports.append(report)
+        for t, df in delta.items():
+            if store.is_adjusted(t, df):
+                cold.append(t)
+                n_adjusted += 1
+            else: fresh[t] = df
+    if cold:
+        full, report = bulk_fetcher.fetch(cold, period=period, prepost=True)
+        reports.append(report)
+        fresh.update(full)
+
+    rebuilt = set(cold) & set(fresh)
+    if fresh:
+        store.update(fresh, replace=rebuilt)
+        store.trim(PRICE_HISTORY_DAYS)
+        store.save()
+    for t in tickers:
+        if t not in store: continue
+        st = indicator_store.get(t)
+        if t in fresh or st is None or st.source_ts != store.last_date(t): indicator_store.sync(t, store.frame(t), rebuild=(t in rebuilt), fresh=(t in fresh))
+    indicator_store.save()
+
+    n_delta = sum(len(g) for g in warm_groups.values()) - n_adjusted
+    t_print(f"   💾 [BAR CACHE] 델타 수신 {n_delta}개 / 전체 수신 {len(cold)}개 (보정 감지 {n_adjusted}개) / 저장소 갱신 {len(fresh)}개")
+    cov = merge_fetch_reports(reports)
+    if cov["requested"]:
+        missing = f" | 누락: {', '.join(cov['missing'][:8])}{' 외' if len(cov['missing']) > 8 else ''}" if cov["missing"] else ""
+        t_print(f"   🚚 [FETCH] 커버리지 {cov['fetched']}/{cov['requested']} ({cov['coverage']:.1%}) · 청크 {cov['chunks']}개 {cov['seconds']:.1f}초 "
+                f"(재시도 {cov['retried']}종목 / 예외 {cov['errors']}회) · 다음 청크 {cov['chunk']} / 스레드 {cov['threads']}{missing}")
+    window = store.window(tickers, PRICE_WINDOW_DAYS)
+    metrics.set("overdrive_price_store_bytes", store.nbytes, scope="history")
+    metrics.set("overdrive_price_store_bytes", window.nbytes, scope="window")
+    return window
 
 # ==========================================
-# 💾 [CORE FUNCTIONS (v4.5 원본)]
+# 📐 [INDICATOR STATE: 봉 1개당 O(1) 증분 지표]
+# ==========================================
+class IndicatorState:
+    """티커 1개의 롤링 윈도우 버퍼 + 누적합. 새 봉 1개마다 O(1)로 SMA20 / ATR14 / RS 기준 종가 / 10일 평균 거래량을 갱신합니다.
+    같은 날짜의 봉이 다시 들어오면(장중 미완성 봉 갱신) 직전 push를 되돌린 뒤 교체합니다."""
+    RESYNC_EVERY = 512  # 누적합 부동소수 오차를 주기적으로 버퍼 합으로 재정렬
+
+    def __init__(self):
+        self.closes = collections.deque(maxlen=20)
+        self.volumes = collections.deque(maxlen=11)
+        self.trs = collections.deque(maxlen=14)
+        self.sums = {"closes": 0.0, "volumes": 0.0, "trs": 0.0}
+        self.last_ts, self.last_open, self.n = None, 0.0, 0
+        self.source_ts = None  # 마지막으로 동기화한 저장소 프레임의 최신 인덱스 (유효 봉 여부와 무관)
+        self._undo = None
+        self._pushes = 0
+
+    def _append(self, name, value):
+        buf = getattr(self, name)
+        evicted = buf[0] if len(buf) == buf.maxlen else None
+        buf.append(value)
+        self.sums[name] += value - (evicted or 0.0)
+        return evicted
+
+    def _rollback(self):
+        last_ts, last_open, evicted = self._undo
+        for name in ("closes", "volumes", "trs"):
+            buf = getattr(self, name)
+            self.sums[name] -= buf.pop()
+            if evicted[name] is not None:
+                buf.appendleft(evicted[name])
+                self.sums[name] += evicted[name]
+        self.last_ts, self.last_open, self.n, self._undo = last_ts, last_open, self.n - 1, None
+
+    def push(self, ts, o, h, l, c, v):
+        """봉 1개 반영. 같은 시각 재입력은 교체, 과거 시각은 무시합니다. 되돌릴 수 없는 교체면 False."""
+        if self.last_ts is not None and ts == self.last_ts:
+            if self._undo is None: return False
+            self._rollback()
+        elif self.last_ts is not None and ts < self.last_ts: return True
+        prev_close = self.closes[-1] if self.closes else None
+        tr = h - l if prev_close is None else max(h - l, abs(h - prev_close), abs(l - prev_close))
+        undo = (self.last_ts, self.last_open, {})
+        for name, value in (("closes", c), ("volumes", v), ("trs", tr)): undo[2][name] = self._append(name, value)
+        self.last_ts, self.last_open, self.n, self._undo = ts, o, self.n + 1, undo
+        self._pushes += 1
+        if self._pushes % self.RESYNC_EVERY == 0:
+            for name in self.sums: self.sums[name] = float(sum(getattr(self, name)))
+        return True
+
+    def close_back(self, k):
+        return self.closes[-k] if len(self.closes) >= k else np.nan
+
+    @property
+    def sma20(self):
+        return self.sums["closes"] / 20 if len(self.closes) == 20 else np.nan
+
+    @property
+    def avg_volume10(self):
+        return (self.sums["volumes"] - self.volumes[-1]) / 10 if len(self.volumes) == 11 else np.nan
+
+    @property
+    def atr14(self):
+        if self.n < 15: return float(self.closes[-1]) * 0.02
+        return self.sums["trs"] / 14
+
+class IndicatorStore:
+    """가격 저장소 옆(price_cache/)에 티커별 IndicatorState를 보관하고, 새로 병합된 봉만 흘려 넣습니다."""
+
+    def __init__(self, path):
+        self.path = path
+        self._states = None
+        self._dirty = False
+
+    @property
+    def states(self):
+        """첫 사용 때 디스크에서 읽습니다. (피클 안의 Timestamp 때문에 부팅 시점에 pandas 를 끌어오지 않도록)"""
+        if self._states is None:
+            self._states = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'rb') as f: self._states = pickle.load(f)
+                except Exception as e: print(f"지표 상태 로드 실패 (재구축): {e}")
+        return self._states
+
+    def sync(self, ticker, df, rebuild=False, fresh=True):
+        """df(병합된 전체 이력)에서 마지막 동기화 이후의 봉만 반영합니다. 이력이 바뀌었으면 전체 재구축(1회 O(n))."""
+        st = self.states.get(ticker)
+        last = df.index[-1]
+        if not rebuild and not fresh and st is not None and st.source_ts == last: return
+        if rebuild or st is None or st.source_ts is None or st.source_ts not in df.index:
+            st, start = IndicatorState(), 0
+        else: start = df.index.searchsorted(st.source_ts)
+        values = np.column_stack([df[c].to_numpy(dtype=float)[start:] for c in OHLCV_COLS])
+        for ts, (o, h, l, c, v) in zip(df.index[start:], values):
+            if np.isnan(o) or np.isnan(h) or np.isnan(l) or np.isnan(c) or np.isnan(v): continue
+            if not st.push(ts, o, h, l, c, v): return self.sync(ticker, df, rebuild=True)
+        st.source_ts = last
+        self.states[ticker] = st
+        self._dirty = True
+
+    def get(self, ticker):
+        return self.states.get(ticker)
+
+    def frame(self, tickers):
+        """스코어링 입력용 (티커 x 지표) 프레임. 상태가 없는 티커는 빠집니다."""
+        rows = {t: (st.close_back(1), st.close_back(2), st.close_back(10), st.close_back(20), st.sma20, st.avg_volume10, st.volumes[-1], st.last_open, st.n)
+                for t in tickers if (st := self.states.get(t)) is not None and st.n > 0}
+        return pd.DataFrame.from_dict(rows, orient='index', columns=INDICATOR_COLS)
+
+    def save(self):
+        if not self._dirty: return
+        try:
+            with open(self.path + ".tmp", 'wb') as f: pickle.dump(self.states, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(self.path + ".tmp", self.path)
+            self._dirty = False
+        except Exception as e: print(f"지표 상태 저장 에러: {e}")
+
+INDICATOR_COLS = ['c1', 'c2', 'c10', 'c20', 'sma20', 'avg_v', 'v1', 'o1', 'n']
+indicator_store = IndicatorStore(INDICATOR_STATE_FILE)
+
+# ==========================================
+# 🌌 [UNIVERSE REGISTRY: 구성종목 스냅샷 + TTL 백그라운드 갱신]
+# ==========================================
+_universe_lock = threading.Lock()
+
+def _scrape_market_universe():
+    """위키피디아에서 S&P 500 + 나스닥 100 구성종목을 긁어옵니다. 실패 시 예외를 그대로 올립니다."""
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    def fetch_html(url):
+        text = requests.get(url, headers=headers, timeout=10).text
+        metrics.inc("overdrive_payload_bytes_total", len(text.encode()), source="wikipedia")
+        return pd.read_html(io.StringIO(text))
+    sp500 = fetch_html('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')[0]['Symbol'].str.replace('.', '-', regex=False).tolist()
+    ndx = []
+    for df in fetch_html('https://en.wikipedia.org/wiki/Nasdaq-100'):
+        if 'Ticker' in df.columns:
+            ndx = df['Ticker'].str.replace('.', '-', regex=False).tolist()
+            break
+    return sorted(set(sp500 + ndx))
+
+def load_universe_snapshot():
+    if os.path.exists(UNIVERSE_FILE):
+        try:
+            with open(UNIVERSE_FILE, 'r') as f: snap = json.load(f)
+            if snap.get("tickers"): return snap
+        except: pass
+    return None
+
+def refresh_universe_snapshot():
+    """구성종목을 새로 긁어 스냅샷을 교체합니다. 스크랩이 실패하거나 비정상적으로 작으면 마지막 정상본을 유지합니다."""
+    if not _universe_lock.acquire(blocking=False): return False
+    try:
+        tickers = _scrape_market_universe()
+        if len(tickers) < 400: raise ValueError(f"구성종목 수 비정상 ({len(tickers)}개)")
+        with open(UNIVERSE_FILE + ".tmp", 'w') as f: json.dump({"fetched_at": time.time(), "tickers": tickers}, f)
+        os.replace(UNIVERSE_FILE + ".tmp", UNIVERSE_FILE)
+        print(f"🌌 [UNIVERSE] 구성종목 스냅샷 갱신 완료 ({len(tickers)}개)")
+        return True
+    except Exception as e:
+        print(f"유니버스 갱신 에러 (마지막 스냅샷 유지): {e}")
+        return False
+    finally: _universe_lock.release()
+
+def refresh_universe_async():
+    threading.Thread(target=refresh_universe_snapshot, daemon=True).start()
+
+def universe_status():
+    snap = load_universe_snapshot()
+    if not snap: return {"state": "missing", "count": 0, "age_sec": None, "ttl_sec": UNIVERSE_TTL_SEC}
+    age = time.time() - float(snap.get("fetched_at", 0))
+    return {"state": "stale" if age > UNIVERSE_TTL_SEC else "fresh", "count": len(snap["tickers"]), "age_sec": round(age), "ttl_sec": UNIVERSE_TTL_SEC,
+            "refreshing": _universe_lock.locked()}
+
+@timed_stage("universe_resolve")
+def get_market_universe():
+    """마지막 정상 스냅샷을 즉시 반환하고, TTL이 지났으면 백그라운드에서만 갱신합니다. (사냥은 스크랩을 절대 기다리지 않음)"""
+    snap = load_universe_snapshot()
+    age = time.time() - float(snap.get("fetched_at", 0)) if snap else None
+    if snap is None or age > UNIVERSE_TTL_SEC: refresh_universe_async()
+    if snap is None:
+        t_print("   ⚠️ [UNIVERSE] 구성종목 스냅샷 없음. CORE 유니버스로 우선 스캔하며 백그라운드 갱신을 시작합니다.")
+        return list(set(CORE_UNIVERSE))
+    if age > UNIVERSE_TTL_SEC:
+        t_print(f"   ⚠️ [UNIVERSE STALE] 스냅샷이 {age / 3600:.1f}시간 경과. 마지막 정상본({len(snap['tickers'])}개)으로 스캔하고 백그라운드 갱신합니다.")
+    return list(set(snap["tickers"] + CORE_UNIVERSE))
+
 # ==========================================
-def save_blackbox_log(log_data):
-    file_exists = os.path.isfile(LOG_FILE)
+# 🖼️ [CHART RENDERER: 프로세스 풀 + 콘텐츠 주소 캐시]
+# ==========================================
+CHART_BARS = 90
+CHART_DPI = 60
+CHART_RENDER_WORKERS = int(os.environ.get("CHART_RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+# 웹 프로세스는 텔레그램/예열/감시 스레드와 지연 임포트 잠금을 돌리므로 fork 로 워커를 만들면 잠긴 락을 물려받아 멈출 수 있습니다.
+# 깨끗한 서버 프로세스에서 워커를 떠내는 forkserver(없으면 spawn)를 쓰고, 늘어난 기동 비용은 예열(_warm_chart_workers)이 흡수합니다.
+CHART_MP_START = os.environ.get("OVERDRIVE_CHART_MP_START") or ("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+SPECULATIVE_CHART_COUNT = int(os.environ.get("OVERDRIVE_SPECULATIVE_CHARTS", AI_SHORTLIST_SIZE + 2))  # 딥스캔과 겹쳐 미리 그려둘 결승 유력 후보 수 (본선 크기 + 페널티로 밀려날 여유분)
+CHART_MEMO_SIZE = 64                 # 메모리에 들고 있는 최근 차트 수
+CHART_CACHE_TTL_SEC = 3 * 24 * 3600  # 디스크 차트 캐시 보존 기간
+
+_chart_style = None
+_chart_pool = None
+_chart_pool_lock = threading.Lock()
+_chart_memo = collections.OrderedDict()
+_chart_memo_lock = threading.Lock()
+_chart_inflight = {}  # 캐시 키 → 그리는 중인 프로세스 풀 Future (선행 렌더와 본선 렌더가 같은 차트를 두 번 그리지 않게)
+
+def _render_chart_png(ticker, df):
+    """(프로세스 풀 워커) 캔들 차트 1장을 PNG 바이트로 그립니다. 스타일은 워커당 한 번만 해석합니다. -> (png, 렌더 초)"""
+    global _chart_style
+    t0 = time.perf_counter()
+    if _chart_style is None: _chart_style = mpf.make_mpf_style(base_mpf_style='yahoo')
+    buf = io.BytesIO()
+    mpf.plot(df, type='candle', volume=True, style=_chart_style, title=ticker, savefig=dict(fname=buf, dpi=CHART_DPI))
+    return buf.getvalue(), time.perf_counter() - t0
+
+def chart_cache_key(ticker, df):
+    """티커 + 마지막 봉 시각 + 마지막 봉 값(장중 미완성 봉 갱신 반영)으로 차트를 식별합니다."""
+    last = df.iloc[-1]
+    raw = f"{ticker}|{pd.Timestamp(df.index[-1]).isoformat()}|{len(df)}|{CHART_DPI}|" + ",".join(f"{float(last[c]):.6g}" for c in OHLCV_COLS)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def _get_chart_pool():
+    global _chart_pool
+    with _chart_pool_lock:
+        if _chart_pool is None: _chart_pool = concurrent.futures.ProcessPoolExecutor(max_workers=CHART_RENDER_WORKERS, mp_context=multiprocessing.get_context(CHART_MP_START))
+        return _chart_pool
+
+def _reset_chart_pool():
+    global _chart_pool
+    with _chart_pool_lock:
+        if _chart_pool is not None: _chart_pool.shutdown(wait=False, cancel_futures=True)
+        _chart_pool = None
+
+atexit.register(_reset_chart_pool)
+
+def _remember_chart(key, png):
+    with _chart_memo_lock:
+        _chart_memo[key] = png
+        _chart_memo.move_to_end(key)
+        while len(_chart_memo) > CHART_MEMO_SIZE: _chart_memo.popitem(last=False)
+
+def _store_chart(key, png):
+    _remember_chart(key, png)
+    try:
+        with open(os.path.join(CHART_CACHE_DIR, f"{key}.png"), 'wb') as f: f.write(png)
+    except OSError: pass
+
+def _finish_chart(key, fut):
+    """(풀 콜백) 다 그린 차트를 캐시에 넣은 뒤 진행 중 목록에서 뺍니다. (순서가 반대면 그 사이 요청이 한 번 더 그림)"""
     try:
-        with open(LOG_FILE, mode='a', encoding='utf-8-sig', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=log_data.keys())
-            if not file_exists: writer.writeheader()
-            writer.writerow(log_data)
-        t_print(f"\n💾 [BLACKBOX LOGGED] 오늘의 전투 데이터가 보존되었습니다.")
-    except Exception as e: t_print(f"\n⚠️ [BLACKBOX ERROR] 로그 저장 실패: {e}")
+        if not fut.cancelled() and fut.exception() is None: _store_chart(key, fut.result()[0])
+    finally:
+        with _chart_memo_lock: _chart_inflight.pop(key, None)
+
+def _submit_chart(ticker, key, df):
+    """같은 차트가 이미 그려지는 중이면 그 Future 를, 아니면 프로세스 풀에 새로 제출한 Future 를 돌려줍니다."""
+    with _chart_memo_lock:
+        fut = _chart_inflight.get(key)
+        if fut is not None: return fut
+        fut = _chart_inflight[key] = _get_chart_pool().submit(_render_chart_png, ticker, df)
+    fut.add_done_callback(lambda f: _finish_chart(key, f))
+    return fut
+
+def _lookup_chart(df_dict, ticker):
+    """-> (캐시 키, 차트용 봉, 메모/디스크 캐시의 PNG 또는 None). 봉이 없으면 (None, None, None)."""
+    if ticker not in df_dict or df_dict[ticker].empty: return None, None, None
+    df = df_dict[ticker][-CHART_BARS:]
+    key = chart_cache_key(ticker, df)
+    with _chart_memo_lock: png = _chart_memo.get(key)
+    path = os.path.join(CHART_CACHE_DIR, f"{key}.png")
+    if png is None and os.path.exists(path):
+        try:
+            with open(path, 'rb') as f: png = f.read()
+        except OSError: png = None
+    if png: _remember_chart(key, png)
+    return key, df, png
+
+def prefetch_charts(df_dict, tickers):
+    """(비차단) 결승 유력 후보 차트를 프로세스 풀에 걸어 두고 바로 돌아옵니다. 다 그린 차트는 캐시로 들어가고,
+    아직 그리는 중이면 본선의 render_charts 가 그 Future 를 이어받습니다. -> {티커: Future} (필요 없어진 것은 호출부가 cancel)"""
+    futs = {}
+    for t in tickers:
+        key, df, png = _lookup_chart(df_dict, t)
+        if key is None or png: continue
+        try: futs[t] = _submit_chart(t, key, df)
+        except Exception as e:
+            print(f"선행 차트 렌더 예약 에러: {e}")
+            break
+    if futs: t_print(f"      🖼️ [CHART] 결승 유력 {len(futs)}장 선행 렌더 예약 (딥스캔과 병렬, 대기 없음)")
+    return futs
+
+def _prune_chart_cache():
+    cutoff = time.time() - CHART_CACHE_TTL_SEC
+    for name in os.listdir(CHART_CACHE_DIR):
+        path = os.path.join(CHART_CACHE_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff: os.remove(path)
+        except OSError: pass
+
+@timed_stage("chart_render")
+def render_charts(df_dict, tickers):
+    """후보 차트를 프로세스 풀에서 병렬로 그리고, 이미 그린 차트(재실행/세컨드 샷)는 캐시에서 꺼냅니다.
+    -> {ticker: {"png": bytes, "render_sec": float, "cached": bool}}"""
+    results, todo = {}, {}
+    for t in tickers:
+        if t in results or t in todo: continue
+        key, df, png = _lookup_chart(df_dict, t)
+        if key is None: continue
+        if png: results[t] = {"png": png, "render_sec": 0.0, "cached": True}
+        else: todo[t] = (key, df)
+
+    if todo:
+        t0 = time.perf_counter()
+        rendered = {}
+        try:
+            futs = {_submit_chart(t, key, df): t for t, (key, df) in todo.items()}  # 선행 렌더 중인 차트는 그 Future 를 기다림
+            for f in concurrent.futures.as_completed(futs):
+                try: rendered[futs[f]] = f.result()
+                except Exception as e: print(f"차트 렌더 에러 ({futs[f]}): {e}")
+        except Exception as e:
+            print(f"차트 프로세스 풀 에러 (직렬 렌더로 대체): {e}")
+            _reset_chart_pool()
+        for t in [t for t in todo if t not in rendered]:
+            try:
+                rendered[t] = _render_chart_png(t, todo[t][1])
+                _store_chart(todo[t][0], rendered[t][0])
+            except Exception as e: print(f"차트 렌더 에러 ({t}): {e}")
+        for t, (png, sec) in rendered.items():
+            _remember_chart(todo[t][0], png)  # 풀 콜백보다 먼저 끝났을 수 있으니 메모에 바로 올림
+            results[t] = {"png": png, "render_sec": sec, "cached": False}
+        _prune_chart_cache()
+        secs = [r[1] for r in rendered.values()]
+        if secs: t_print(f"      🖼️ [CHART] 신규 {len(secs)}장 (장당 평균 {np.mean(secs):.2f}초 / 최대 {max(secs):.2f}초, 벽시계 {time.perf_counter() - t0:.2f}초) | 캐시 재사용 {len(results) - len(secs)}장")
+    elif results: t_print(f"      🖼️ [CHART] 캐시 재사용 {len(results)}장 (렌더 생략)")
+    return results
+
+# ==========================================
+# 🧩 [CHART PAYLOAD: 라벨 격자 합성 + 바이트 예산 인코딩]
+# ==========================================
+CHART_PAYLOAD_LAYOUT = os.environ.get("OVERDRIVE_CHART_LAYOUT", "grid")                   # grid: 격자 합성 / single: 종목별 1장
+CHART_PAYLOAD_FORMAT = os.environ.get("OVERDRIVE_CHART_FORMAT", "WEBP").upper()           # WEBP | JPEG
+CHART_PAYLOAD_MAX_BYTES = int(os.environ.get("OVERDRIVE_CHART_MAX_BYTES", 150_000))       # 업로드 이미지 1장당 바이트 예산
+CHART_GRID_COLS = 2
+CHART_GRID_MAX_TILES = 4        # 합성 1장에 넣는 최대 차트 수 (2x2)
+CHART_LABEL_BAND_PX = 22
+VISION_TOKENS_PER_TILE = 258    # 제미나이 이미지 토큰: 양변 384px 이하면 258, 그보다 크면 768px 타일마다 258
+
+def estimate_image_tokens(width, height):
+    if width <= 384 and height <= 384: return VISION_TOKENS_PER_TILE
+    return math.ceil(width / 768) * math.ceil(height / 768) * VISION_TOKENS_PER_TILE
+
+def encode_budgeted(image, fmt=None, max_bytes=None):
+    """품질을 낮춰가며(그래도 넘치면 축소까지) 바이트 예산 안에 드는 첫 인코딩을 고릅니다. -> (bytes, mime, (w, h))"""
+    fmt = fmt or CHART_PAYLOAD_FORMAT
+    fmt = fmt if fmt in ("WEBP", "JPEG") else "WEBP"
+    max_bytes = max_bytes or CHART_PAYLOAD_MAX_BYTES
+    image = image.convert("RGB")
+    for scale in (1.0, 0.8, 0.64):
+        cur = image if scale == 1.0 else image.resize((int(image.width * scale), int(image.height * scale)), PIL.Image.Resampling.LANCZOS)
+        for quality in (85, 70, 55, 40):
+            buf = io.BytesIO()
+            cur.save(buf, format=fmt, quality=quality, **({"method": 4} if fmt == "WEBP" else {"optimize": True}))
+            data = buf.getvalue()
+            if len(data) <= max_bytes: return data, f"image/{fmt.lower()}", cur.size
+    return data, f"image/{fmt.lower()}", cur.size
+
+def compose_chart_grid(tiles, cols=CHART_GRID_COLS):
+    """[(번호, 티커, png)] → 칸마다 '#번호 티커' 라벨 띠를 얹은 격자 이미지 1장."""
+    images = [PIL.Image.open(io.BytesIO(png)).convert("RGB") for _, _, png in tiles]
+    w, h = max(i.width for i in images), max(i.height for i in images)
+    cols = min(cols, len(images))
+    canvas = PIL.Image.new("RGB", (cols * w, math.ceil(len(images) / cols) * (h + CHART_LABEL_BAND_PX)), "white")
+    draw = PIL.ImageDraw.Draw(canvas)
+    try: font = PIL.ImageFont.load_default(size=16)
+    except TypeError: font = PIL.ImageFont.load_default()
+    for k, ((n, t, _), img) in enumerate(zip(tiles, images)):
+        x, y = (k % cols) * w, (k // cols) * (h + CHART_LABEL_BAND_PX)
+        draw.rectangle([x, y, x + w - 1, y + CHART_LABEL_BAND_PX - 1], fill=(20, 20, 20))
+        draw.text((x + 6, y + 3), f"#{n} {t}", fill="white", font=font)
+        canvas.paste(img, (x, y + CHART_LABEL_BAND_PX))
+    return canvas
+
+def build_chart_payload(finalists, charts, layout=None):
+    """Pro 심사용 차트 파트를 만듭니다. 이미지는 인라인 blob(dict)으로 넘겨 SDK의 무손실 WebP 재인코딩을 피하고,
+    [N번 후보: TICKER] 라벨은 텍스트 파트로 유지합니다. (격자 모드는 '#N' 칸 위치로 연결) -> (파트 리스트, 첨부 차트 수, 리포트)"""
+    layout = layout or CHART_PAYLOAD_LAYOUT
+    tiles = [(i + 1, c['Ticker'], charts[c['Ticker']]['png']) for i, c in enumerate(finalists) if c['Ticker'] in charts]
+    parts, sizes = [], []
+    if layout == "single": groups = [[tile] for tile in tiles]
+    else: groups = [tiles[g:g + CHART_GRID_MAX_TILES] for g in range(0, len(tiles), CHART_GRID_MAX_TILES)]
+    for g, group in enumerate(groups):
+        if layout == "single":
+            n, t, png = group[0]
+            data, mime, size = encode_budgeted(PIL.Image.open(io.BytesIO(png)))
+            if len(png) <= len(data): data, mime = png, "image/png"     # 단색 위주 차트는 원본 PNG가 더 작을 때가 있음
+            parts.append(f"[{n}번 후보: {t} 차트]")
+        else:
+            data, mime, size = encode_budgeted(compose_chart_grid(group))
+            cols = min(CHART_GRID_COLS, len(group))
+            parts.append(f"[차트 묶음 {g + 1}] " + ", ".join(f"[{n}번 후보: {t} 차트] = {k // cols + 1}행 {k % cols + 1}열 '#{n}'" for k, (n, t, _) in enumerate(group)))
+        parts.append({"mime_type": mime, "data": data})
+        sizes.append((len(data), size))
+    report = {"layout": layout, "images": len(sizes), "bytes": sum(b for b, _ in sizes), "tokens": sum(estimate_image_tokens(*wh) for _, wh in sizes),
+              "raw_images": len(tiles), "raw_bytes": sum(len(png) for *_, png in tiles),
+              "raw_tokens": sum(estimate_image_tokens(*PIL.Image.open(io.BytesIO(png)).size) for *_, png in tiles)}
+    return parts, len(tiles), report
+
+def prompt_footprint(contents):
+    """프롬프트 1건의 업로드 바이트와 추정 토큰. (텍스트는 약 3자당 1토큰, 이미지는 제미나이 타일 규칙)"""
+    parts = [contents] if isinstance(contents, str) else contents
+    text = "".join(p for p in parts if isinstance(p, str))
+    blobs = [p for p in parts if isinstance(p, dict)]
+    image_tokens = sum(estimate_image_tokens(*PIL.Image.open(io.BytesIO(b["data"])).size) for b in blobs)
+    return {"bytes": len(text.encode()) + sum(len(b["data"]) for b in blobs), "text_tokens": len(text) // 3, "image_tokens": image_tokens, "images": len(blobs)}
+
+def record_prompt_footprint(model_name, contents):
+    fp = prompt_footprint(contents)
+    metrics.inc("overdrive_payload_bytes_total", fp["bytes"], source=f"gemini_prompt:{model_name}")
+    metrics.set("overdrive_prompt_tokens_estimate", fp["text_tokens"] + fp["image_tokens"], model=model_name)
+    return fp
+
+# ==========================================
+# 🗃️ [BLACKBOX RUN STORE: SQLite 실행 기록]
+# ==========================================
+class RunStore:
+    """실행 1회마다 runs(요약/타겟/조준표) · candidates(후보 전체 표) · phases(단계 지연) 행을 추가만 하는 SQLite 블랙박스.
+    처음 보는 필드는 컬럼을 자동으로 늘리므로, 첫 기록이 스키마를 고정하던 CSV 로그의 문제가 없습니다."""
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, run_date TEXT, started_at REAL)",
+        "CREATE TABLE IF NOT EXISTS candidates (run_id TEXT, run_date TEXT, ticker TEXT, rank INTEGER)",
+        "CREATE TABLE IF NOT EXISTS phases (run_id TEXT, run_date TEXT, kind TEXT, name TEXT, seconds REAL)",
+        "CREATE INDEX IF NOT EXISTS idx_runs_date ON runs (run_date)",
+        "CREATE INDEX IF NOT EXISTS idx_candidates_run ON candidates (run_id)",
+        "CREATE INDEX IF NOT EXISTS idx_candidates_date_ticker ON candidates (run_date, ticker)",
+        "CREATE INDEX IF NOT EXISTS idx_phases_date ON phases (run_date, name)",
+    ]
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._columns = {}
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            for sql in self.SCHEMA: con.execute(sql)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _value(v):
+        if isinstance(v, (bool, np.bool_)): return int(v)
+        if isinstance(v, np.integer): return int(v)
+        if isinstance(v, np.floating): return None if np.isnan(v) else float(v)
+        if isinstance(v, float) and np.isnan(v): return None
+        if isinstance(v, (pd.Timestamp, datetime)): return v.isoformat()
+        return v if v is None or isinstance(v, (int, float, str, bytes)) else json.dumps(v, ensure_ascii=False, default=str)
+
+    def _ensure_columns(self, con, table, row):
+        """없는 컬럼을 추가합니다. 컬럼 캐시는 프로세스별이라 다른 워커가 먼저 추가했을 수 있으므로,
+        'duplicate column' 은 성공으로 보고 그 밖의 실패는 table_info 를 다시 읽어 실제로 없을 때만 올립니다."""
+        if table not in self._columns: self._columns[table] = {r[1] for r in con.execute(f"PRAGMA table_info({table})")}
+        for k, v in row.items():
+            if k in self._columns[table]: continue
+            kind = "INTEGER" if isinstance(v, (bool, int, np.bool_, np.integer)) else ("REAL" if isinstance(v, (float, np.floating)) else "TEXT")
+            try: con.execute(f'ALTER TABLE {table} ADD COLUMN "{k}" {kind}')
+            except sqlite3.OperationalError as e:
+                if "duplicate column" not in str(e).lower():
+                    self._columns[table] = {r[1] for r in con.execute(f"PRAGMA table_info({table})")}
+                    if k not in self._columns[table]: raise
+            self._columns[table].add(k)
+
+    def _insert(self, table, rows, replace=False):
+        if not rows: return
+        try:
+            with self._lock, self._connect() as con:
+                for row in rows:
+                    self._ensure_columns(con, table, row)
+                    cols = ", ".join(f'"{k}"' for k in row)
+                    con.execute(f"INSERT {'OR REPLACE ' if replace else ''}INTO {table} ({cols}) VALUES ({', '.join('?' * len(row))})", [self._value(v) for v in row.values()])
+        except Exception as e: print(f"블랙박스 기록 에러 ({table}): {e}")
+
+    def begin(self, run_id, **fields):
+        self._insert("runs", [dict(run_id=run_id, run_date=datetime.now(pytz.timezone('US/Eastern')).strftime('%Y-%m-%d'), started_at=time.time(), **fields)], replace=True)
+
+    def update(self, run_id, **fields):
+        if not run_id or not fields: return
+        try:
+            with self._lock, self._connect() as con:
+                self._ensure_columns(con, "runs", fields)
+                sets = ", ".join(f'"{k}" = ?' for k in fields)
+                con.execute(f"UPDATE runs SET {sets} WHERE run_id = ?", [self._value(v) for v in fields.values()] + [run_id])
+        except Exception as e: print(f"블랙박스 기록 에러 (runs): {e}")
+
+    def _run_date(self, run_id):
+        try:
+            with self._connect() as con: row = con.execute("SELECT run_date FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            return row[0] if row else None
+        except Exception: return None
+
+    def add_candidates(self, run_id, frame, **fields):
+        """후보 표(티커 인덱스) 전체를 순위와 함께 한 번에 추가합니다."""
+        run_date = self._run_date(run_id)
+        rows = [dict(run_id=run_id, run_date=run_date, ticker=t, rank=i + 1, **fields, **rec) for i, (t, rec) in enumerate(frame.to_dict('index').items())]
+        self._insert("candidates", rows)
+
+    def add_phases(self, run_id, phase_seconds, spans):
+        run_date = self._run_date(run_id)
+        self._insert("phases", [dict(run_id=run_id, run_date=run_date, kind=kind, name=k, seconds=v)
+                                for kind, d in (("phase", phase_seconds), ("span", spans)) for k, v in d.items()])
+
+    def load(self, table="runs", since=None, until=None, ticker=None):
+        """run_date(ET) 구간으로 잘라 DataFrame으로 읽습니다. 날짜/티커 인덱스를 타므로 몇 달치도 바로 나옵니다."""
+        where, args = [], []
+        if since: where.append("run_date >= ?"); args.append(str(since)[:10])
+        if until: where.append("run_date <= ?"); args.append(str(until)[:10])
+        if ticker and table == "candidates": where.append("ticker = ?"); args.append(ticker)
+        sql = f"SELECT * FROM {table}" + (f" WHERE {' AND '.join(where)}" if where else "")
+        with self._connect() as con: return pd.read_sql_query(sql, con, params=args)
+
+run_store = RunStore(RUN_STORE_FILE)
+
+def load_run_history(since=None, until=None, table="runs", ticker=None):
+    """분석용 조회 헬퍼. table = runs | candidates | phases (예: load_run_history('2026-07-01', table='candidates'))"""
+    return run_store.load(table, since, until, ticker)
+
+def new_run_id():
+    return datetime.now(pytz.timezone('US/Eastern')).strftime('%Y%m%d-%H%M%S') + "-" + uuid.uuid4().hex[:6]
+
+# ==========================================
+# 🧵 [HUNT JOB MANAGER: 단일 비행(single-flight) 실행기]
+# ==========================================
+HUNT_JOB_HISTORY = 50  # /status 로 조회 가능한 최근 실행 수
+HUNT_LOCK_FILE = os.path.join(LOG_DIR, "hunt.lock")            # 사냥 중인 워커가 쥐고 있는 배타 잠금 (gunicorn 워커 간 단일 비행)
+HUNT_ACTIVE_FILE = os.path.join(LOG_DIR, "hunt_active.json")   # 사냥 중인 실행 요약 (다른 워커가 합류 응답/상태 조회에 씀)
+
+class HuntJobManager:
+    """동시에 들어온 /hunt·/webhook 트리거를 진행 중인 사냥 하나로 합치고, 실행마다 run_id와 현재 단계를 기록합니다.
+    프로세스 안에서는 _active_id 로, 워커 사이에서는 HUNT_LOCK_FILE 비차단 잠금으로 합칩니다. 잠금을 못 잡은 워커는
+    HUNT_ACTIVE_FILE 에 적힌 진행 중 실행을 돌려주고 합류 횟수만 더해 두며, 사냥한 워커가 끝날 때 그 횟수를 거둬 기록합니다."""
+
+    def __init__(self, target, max_workers=1, lock_path=HUNT_LOCK_FILE, active_path=HUNT_ACTIVE_FILE):
+        self._target = target
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hunt")
+        self._lock = threading.Lock()
+        self._jobs = collections.OrderedDict()
+        self._active_id = None
+        self._local = threading.local()
+        self.lock_path, self.active_path = lock_path, active_path
+        self._fd = None
+
+    def _claim(self):
+        """배포 전체에서 사냥 하나만: 잠금 파일에 비차단 잠금. -> 잡았는지 (fcntl 이 없으면 단일 프로세스로 간주)"""
+        if fcntl is None: return True
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT)
+        try: fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def _release(self):
+        if self._fd is None: return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def _read_active(self):
+        try:
+            with open(self.active_path) as f: return json.load(f)
+        except: return None
+
+    def _write_active(self, active):
+        with open(self.active_path + ".tmp", "w") as f: json.dump(active, f)
+        os.replace(self.active_path + ".tmp", self.active_path)
+
+    def _join_remote(self):
+        """다른 워커가 사냥 중일 때: 그 실행 요약에 합류 횟수를 더하고 돌려줍니다."""
+        with file_lock(self.active_path):
+            active = self._read_active() or {"run_id": None, "source": None, "submitted_at": None}
+            active["coalesced"] = active.get("coalesced", 0) + 1
+            try: self._write_active(active)
+            except OSError: pass
+        return dict(active, state="running", phase="running (other worker)")
+
+    def submit(self, source, **kwargs):
+        """새 사냥을 예약합니다. 이미 진행 중이면 그 실행을 그대로 돌려줍니다. -> (job, started)"""
+        with self._lock:
+            if self._active_id:
+                job = self._jobs[self._active_id]
+                job["coalesced"] += 1
+                return dict(job), False
+            if not self._claim(): return self._join_remote(), False
+            run_id = new_run_id()
+            job = {"run_id": run_id, "source": source, "state": "queued", "phase": "queued", "phases": [], "phase_seconds": {}, "spans": {},
+                   "submitted_at": time.time(), "started_at": None, "finished_at": None, "error": None, "coalesced": 0}
+            self._jobs[run_id] = job
+            self._active_id = run_id
+            while len(self._jobs) > HUNT_JOB_HISTORY: self._jobs.popitem(last=False)
+            try:
+                with file_lock(self.active_path): self._write_active({"run_id": run_id, "source": source, "submitted_at": job["submitted_at"], "pid": os.getpid(), "coalesced": 0})
+            except OSError as e: print(f"사냥 요약 기록 에러: {e}")
+        self._executor.submit(self._run, job, kwargs)
+        return dict(job), True
+
+    def _run(self, job, kwargs):
+        self._local.job = job
+        job.update(state="running", started_at=time.time())
+        try:
+            self._target(**kwargs)
+            job["state"] = "done"
+        except Exception as e:
+            job.update(state="failed", error=repr(e))
+            print(f"🚨 [HUNT {job['run_id']}] 실행 중 예외: {e!r}")
+        finally:
+            job.update(phase=job["state"], finished_at=time.time())
+            try:
+                with file_lock(self.active_path):
+                    active = self._read_active()
+                    if active and active.get("run_id") == job["run_id"]:
+                        job["coalesced"] += active.get("coalesced", 0)  # 다른 워커로 들어온 합류
+                        os.remove(self.active_path)
+            except OSError: pass
+            self._observe(job)
+            run_store.update(job["run_id"], source=job["source"], state=job["state"], error=job["error"], coalesced=job["coalesced"],
+                             total_seconds=round(job["finished_at"] - job["submitted_at"], 3))
+            run_store.add_phases(job["run_id"], job["phase_seconds"], job["spans"])
+            self._local.job = None
+            with self._lock:
+                self._active_id = None
+                self._release()
+
+    @staticmethod
+    def _observe(job):
+        """단계 기록(phases)을 구간 길이로 바꿔 /metrics 에 반영합니다."""
+        marks = job["phases"] + [(None, job["finished_at"] - job["started_at"])]
+        for (phase, t0), (_, t1) in zip(marks, marks[1:]):
+            job["phase_seconds"][phase] = round(job["phase_seconds"].get(phase, 0.0) + t1 - t0, 3)
+            metrics.observe("overdrive_phase_seconds", t1 - t0, phase=phase)
+        metrics.observe("overdrive_run_seconds", job["finished_at"] - job["submitted_at"])
+        metrics.inc("overdrive_runs_total", state=job["state"])
+
+    def record_span(self, name, seconds):
+        """진행 중인 실행(단일 비행이므로 최대 1개)의 구간 누적 시간을 기록합니다. 보조 스레드에서도 호출됩니다."""
+        with self._lock: job = self._jobs.get(self._active_id) if self._active_id else None
+        if job is not None: job["spans"][name] = round(job["spans"].get(name, 0.0) + seconds, 3)
+
+    def set_phase(self, phase):
+        job = getattr(self._local, "job", None)
+        if job is None: return
+        job["phase"] = phase
+        job["phases"].append((phase, round(time.time() - job["started_at"], 3)))
+
+    def current_run_id(self):
+        job = getattr(self._local, "job", None)
+        return job["run_id"] if job else None
+
+    def get(self, run_id):
+        with self._lock:
+            if run_id == "latest" and self._jobs: run_id = next(reversed(self._jobs))
+            job = self._jobs.get(run_id)
+            if job: return dict(job, phases=list(job["phases"]), phase_seconds=dict(job["phase_seconds"]), spans=dict(job["spans"]))
+        active = self._read_active()  # 다른 워커가 돌리는 실행
+        if active and run_id in ("latest", active.get("run_id")): return dict(active, state="running", phase="running (other worker)")
+        return None
+
+hunt_jobs = HuntJobManager(target=lambda **kw: overdrive_apex_execution(**kw))
+
+def set_run_phase(phase):
+    """현재 사냥 스레드의 진행 단계를 /status 에 반영합니다."""
+    hunt_jobs.set_phase(phase)
+
+# ==========================================
+# 💾 [STAGE CHECKPOINT: 단계별 산출물 저장 + 재개]
+# ==========================================
+CHECKPOINT_STAGES = ("scan", "deep_scan", "ai")   # 스캔(가격 창 + stats) → 딥스캔 결과 → AI 판정
+CHECKPOINT_FRESH_SEC = int(os.environ.get("OVERDRIVE_CHECKPOINT_FRESH_MIN", 30)) * 60  # 스캔 체크포인트를 재사용할 수 있는 최대 경과 시간
+CHECKPOINT_KEEP = 20   # 보존하는 최근 실행 폴더 수
+
+class CheckpointStore:
+    """사냥 단계별 산출물을 CHECKPOINT_DIR/<run_id>/<단계>.pkl 로 남기고, manifest.json 에 단계별 저장 시각과 원본 run_id를 적습니다.
+    재개한 실행은 넘겨받은 단계를 파일 복사 없이 원본 run_id로 가리키므로(src), 재개를 다시 재개해도 원래 데이터 시각 기준으로 신선도를 판정합니다.
+    차트는 데이터 기반 키로 CHART_CACHE_DIR 에 이미 남아 있어, 같은 가격 창을 쓰는 재개 실행은 렌더 없이 캐시에서 꺼냅니다."""
+
+    def __init__(self, root=CHECKPOINT_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, run_id, name): return os.path.join(self.root, run_id, name)
+
+    def manifest(self, run_id):
+        try:
+            with open(self._path(run_id, "manifest.json"), 'r') as f: return json.load(f)
+        except (OSError, ValueError): return None
+
+    def _write_manifest(self, run_id, stages):
+        m = self.manifest(run_id) or {"run_id": run_id, "run_date": datetime.now(pytz.timezone('US/Eastern')).strftime('%Y-%m-%d'), "stages": {}}
+        m["stages"].update(stages)
+        m["updated_at"] = time.time()
+        path = self._path(run_id, "manifest.json")
+        with open(path + ".tmp", 'w') as f: json.dump(m, f)
+        os.replace(path + ".tmp", path)
+
+    def save(self, run_id, stage, payload):
+        try:
+            with self._lock:
+                os.makedirs(os.path.join(self.root, run_id), exist_ok=True)
+                path = self._path(run_id, f"{stage}.pkl")
+                with open(path + ".tmp", 'wb') as f: pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(path + ".tmp", path)
+                self._write_manifest(run_id, {stage: {"at": time.time(), "src": run_id}})
+            if stage == CHECKPOINT_STAGES[0]: self.prune()
+        except Exception as e: print(f"체크포인트 저장 에러 ({stage}): {e}")
+
+    def adopt(self, run_id, point, stages):
+        """재개 실행(run_id)의 manifest 에 넘겨받은 단계를 원본 위치 그대로 기록합니다."""
+        try:
+            with self._lock:
+                os.makedirs(os.path.join(self.root, run_id), exist_ok=True)
+                self._write_manifest(run_id, {s: point["stages"][s] for s in stages})
+        except Exception as e: print(f"체크포인트 기록 에러: {e}")
+
+    def load(self, point, stage):
+        entry = point["stages"].get(stage) if point else None
+        if not entry: return None
+        try:
+            with open(self._path(entry["src"], f"{stage}.pkl"), 'rb') as f: return pickle.load(f)
+        except Exception as e:
+            print(f"체크포인트 로드 에러 ({stage}): {e}")
+            return None
+
+    def find(self, run_id="latest"):
+        """run_id(또는 latest)의 스캔 체크포인트 manifest. 신선도는 따지지 않습니다. (age 필드에 경과 초)"""
+        if run_id == "latest":
+            found = [m for m in map(self.manifest, os.listdir(self.root)) if m and CHECKPOINT_STAGES[0] in m["stages"]] if os.path.isdir(self.root) else []
+            m = max(found, key=lambda m: m["updated_at"]) if found else None
+        else: m = self.manifest(os.path.basename(run_id))
+        if not m or CHECKPOINT_STAGES[0] not in m["stages"]: return None
+        m["age"] = time.time() - m["stages"][CHECKPOINT_STAGES[0]]["at"]
+        return m
+
+    def resume_point(self, run_id="latest", max_age=CHECKPOINT_FRESH_SEC):
+        """재개 지점. 오늘(ET) 스캔 체크포인트가 max_age 이내일 때만 돌려줍니다. -> manifest 또는 None"""
+        m = self.find(run_id)
+        if not m or m["run_date"] != datetime.now(pytz.timezone('US/Eastern')).strftime('%Y-%m-%d'): return None
+        return m if m["age"] <= max_age else None
+
+    def prune(self, keep=CHECKPOINT_KEEP):
+        """최근 keep 개 실행만 남깁니다. 남는 실행의 manifest 가 src 로 가리키는 원본 실행 폴더는 오래됐어도 지우지 않습니다."""
+        runs = sorted((m for m in map(self.manifest, os.listdir(self.root)) if m), key=lambda m: m["updated_at"], reverse=True)
+        referenced = {e["src"] for m in runs[:keep] for e in m["stages"].values()}
+        for m in runs[keep:]:
+            if m["run_id"] in referenced: continue
+            try:
+                for name in os.listdir(os.path.join(self.root, m["run_id"])): os.remove(self._path(m["run_id"], name))
+                os.rmdir(os.path.join(self.root, m["run_id"]))
+            except OSError: pass
+
+checkpoints = CheckpointStore()
+
+# ==========================================
+# 🎛️ [THRESHOLD SWEEP: 필터/페널티 임계값 격자 일괄 평가]
+# ==========================================
+SWEEP_MAX_CELLS = 4_000_000  # 한 번에 펼치는 (조합 x 종목) 행렬 크기 상한. 넘으면 조합 축을 블록으로 나눠 돕니다.
+
+def default_sweep_grid(base):
+    """기준값을 반드시 포함하는 주변 격자. (5 x 5 x 3 x 3 x 3 x 3 x 3 x 3 = 18,225 조합)"""
+    return {"t1_spike": [round(base["t1_spike"] * k, 3) for k in (0.67, 0.83, 1.0, 1.17, 1.33)],
+            "t1_rs": [round(base["t1_rs"] + d, 3) for d in (-0.05, -0.025, 0.0, 0.025, 0.05)],
+            "t1_gap": [round(base["t1_gap"] * k, 2) for k in (0.67, 1.0, 1.33)],
+            "t2_spike": [round(base["t2_spike"] * k, 3) for k in (0.75, 1.0, 1.25)],
+            "cap": sorted({max(1, round(base["cap"] * k)) for k in (0.67, 1.0, 1.33)}),
+            "mcap_large": [base["mcap_large"], base["mcap_mid"], 1.0],
+            "vwap_below": [round(base["vwap_below"] * k, 3) for k in (0.5, 1.0, 2.0)],
+            "vwap_above": [1.0, base["vwap_above"], round(2 * base["vwap_above"] - 1.0, 3)]}
+
+def _sweep_kernel(P, cols, is_doomsday, pre_n, top_n):
+    """조합 G개(P 의 각 값이 (G,1) 열벡터)를 (G x 종목) 행렬 한 벌로 평가합니다. 열은 기본 점수 내림차순이라 '앞에서 pre_n개' = head(20).
+    -> (조합별 상위 top_n 종목 열 번호(-1=없음), 통과 종목 수, 딥스캔 없는 종목이 예선에 들어간 조합 여부)"""
+    price, spike, rs, gap, sma, basic = cols["Price"], cols["Vol_Spike"], cols["RS"], cols["True_Gap"], cols["SMA20"], cols["Basic_Power_Score"]
+    band = (price >= P["price_min"]) & (price <= P["price_max"])
+    t1 = band & (spike >= P["t1_spike"]) & (rs >= P["t1_rs"]) & (gap < P["t1_gap"]) & (True if is_doomsday else price > sma)
+    t2 = band & (spike >= P["t2_spike"]) & (rs >= P["t2_rs"]) & (gap < P["t2_gap"])
+    valid = t1 | (t2 & (t1.sum(axis=1, keepdims=True) < P["cap"]))
+    pre = valid & (np.cumsum(valid, axis=1) <= pre_n)
+    live = np.flatnonzero(pre.any(axis=0))  # 어느 조합에서든 예선에 든 종목만 정렬
+    penalty, _ = deep_scan_penalty(cols["mcap"], cols["gap_pct"], price, cols["pm_vwap"], params=P)
+    penalty = np.where(cols["errored"], 1.0, penalty)
+    power = np.where(pre[:, live], (basic * penalty)[:, live], -np.inf)
+    rank = np.argsort(-power, axis=1, kind='stable')[:, :top_n]
+    top = np.where(np.take_along_axis(power, rank, axis=1) > -np.inf, live[rank], -1)
+    return top, valid.sum(axis=1), (pre & ~cols["scanned"]).any(axis=1)
+
+def threshold_sweep(stats, deep_df, vix, is_doomsday, grid=None, pre_n=20, top_n=10):
+    """Phase-1 stats 와 딥스캔 결과를 그대로 두고 필터/페널티 임계값 격자 전체를 한 번의 브로드캐스트로 평가해,
+    10강과 fallback 타겟(파워 스코어 1위)이 격자 위에서 어떻게 바뀌는지 요약합니다. 네트워크는 쓰지 않습니다.
+    grid 는 {파라미터: 값 목록} 으로 기본 격자의 해당 축만 바꿉니다. (값 1개짜리 목록이면 그 축은 고정)
+    딥스캔에 없던 종목이 예선에 들면 시총/VWAP 페널티는 모른 채(1.0) 갭 페널티만 적용하고, 그 비율을 deep_coverage 로 알려줍니다."""
+    t0 = time.perf_counter()
+    base = filter_params(vix, is_doomsday)
+    grid = {k: [float(v) for v in vals] for k, vals in dict(default_sweep_grid(base), **(grid or {})).items() if k in base and len(vals)}
+    axes = dict(zip(grid, (a.ravel() for a in np.meshgrid(*grid.values(), indexing='ij')))) if grid else {}
+    n_combos = len(next(iter(axes.values()))) if axes else 1
+
+    stats = stats.drop('QQQ', errors='ignore')
+    stats = stats.iloc[np.argsort(-stats['Basic_Power_Score'].to_numpy(dtype=float), kind='stable')]
+    tickers = np.asarray(stats.index)
+    deep = (deep_df if deep_df is not None else pd.DataFrame(columns=['Market_Cap', 'Gap_Pct', 'PM_VWAP', 'VWAP_Status'])).reindex(stats.index)
+    cols = {c: stats[c].to_numpy(dtype=float) for c in ['Price', 'Vol_Spike', 'RS', 'True_Gap', 'SMA20', 'Basic_Power_Score']}
+    prev = stats['Prev_Close'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'): own_gap = np.where(prev > 0, (cols['Price'] - prev) / prev * 100, 0.0)
+    cols.update(scanned=deep['VWAP_Status'].notna().to_numpy(), errored=(deep['VWAP_Status'] == '에러').to_numpy(),
+                mcap=deep['Market_Cap'].fillna(0.0).to_numpy(dtype=float), gap_pct=deep['Gap_Pct'].fillna(pd.Series(own_gap, index=stats.index)).to_numpy(dtype=float),
+                pm_vwap=deep['PM_VWAP'].fillna(0.0).to_numpy(dtype=float))
+
+    block = max(1, SWEEP_MAX_CELLS // max(1, len(tickers)))
+    tops, n_valid, uncovered = [], [], []
+    with np.errstate(divide='ignore', invalid='ignore'):
+        base_top = _sweep_kernel({k: np.array([[float(v)]]) for k, v in base.items()}, cols, is_doomsday, pre_n, top_n)[0][0]
+        for g in range(0, n_combos, block):
+            n = min(block, n_combos - g)
+            P = {k: (axes[k][g:g + n] if k in axes else np.full(n, float(v)))[:, None] for k, v in base.items()}
+            top, nv, unc = _sweep_kernel(P, cols, is_doomsday, pre_n, top_n)
+            tops.append(top); n_valid.append(nv); uncovered.append(unc)
+    top, n_valid, uncovered = np.concatenate(tops), np.concatenate(n_valid), np.concatenate(uncovered)
+
+    fallback, base_set = top[:, 0], base_top[base_top >= 0]
+    same_fallback = fallback == base_top[0]
+    overlap = (np.isin(top, base_set) & (top >= 0)).sum(axis=1)
+    same_top = (overlap == len(base_set)) & ((top >= 0).sum(axis=1) == len(base_set))
+    def shares(idx, denom, n):
+        counts = np.bincount(idx[idx >= 0].ravel(), minlength=len(tickers))
+        return {str(tickers[i]): round(counts[i] / denom, 4) for i in np.argsort(-counts, kind='stable')[:n] if counts[i]}
+    report = {"engine": "doomsday" if is_doomsday else "long", "vix": round(float(vix), 2), "n_scored": len(tickers), "combos": n_combos,
+              "grid": grid, "baseline": {"params": base, "top10": [str(tickers[i]) for i in base_set], "fallback": str(tickers[base_top[0]]) if base_top[0] >= 0 else None},
+              "same_fallback": round(float(same_fallback.mean()), 4), "same_top10": round(float(same_top.mean()), 4),
+              "mean_top10_overlap": round(float(overlap.mean()), 2), "no_candidates": round(float((fallback < 0).mean()), 4),
+              "n_valid": {"min": int(n_valid.min()), "median": float(np.median(n_valid)), "max": int(n_valid.max())},
+              "fallback_share": shares(fallback, n_combos, 10), "top10_share": shares(top, n_combos, 15),
+              "sensitivity": {k: {f"{v:g}": round(float(same_fallback[axes[k] == v].mean()), 4) for v in grid[k]} for k in grid},
+              "deep_coverage": round(1.0 - float(uncovered.mean()), 4)}
+    report["seconds"] = round(time.perf_counter() - t0, 3)
+    return report
+
+def sweep_checkpoint(run_id="latest", grid=None):
+    """체크포인트(스캔 + 딥스캔)에 저장된 실행 1회를 대상으로 임계값 스윕을 돌립니다. 체크포인트가 없으면 None."""
+    point = checkpoints.find(run_id)
+    scan = checkpoints.load(point, "scan")
+    if scan is None: return None
+    deep = checkpoints.load(point, "deep_scan")
+    report = threshold_sweep(scan["stats"], deep["deep_df"] if deep else None, scan["vix"], scan["vix"] >= VIX_KILL_SWITCH, grid)
+    return dict(report, run_id=point["run_id"], age_min=round(point["age"] / 60, 1))
+
+# ==========================================
+# 📅 [NYSE CALENDAR: 휴장일]
+# ==========================================
+def _observed(day):
+    """주말에 걸린 고정 공휴일의 대체 휴장일 (토 → 금, 일 → 월)."""
+    return day - timedelta(days=1) if day.weekday() == 5 else (day + timedelta(days=1) if day.weekday() == 6 else day)
+
+@functools.lru_cache(maxsize=None)
+def nyse_holidays(year):
+    """NYSE 정규 휴장일 (규칙 기반). 토요일 신정은 전년 12/31 로 당기지 않고, 국장/천재지변 같은 임시 휴장은 빠져 있습니다."""
+    def nth(month, weekday, n):
+        first = datetime(year, month, 1).date()
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    def last(month, weekday):
+        end = (datetime(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)).date()
+        return end - timedelta(days=(end.weekday() - weekday) % 7)
+    # 부활절 (그레고리력, 익명 알고리즘) → 성금요일
+    a, b, c = year % 19, year // 100, year % 100
+    h = (19 * a + b - b // 4 - (b - (b + 8) // 25 + 1) // 3 + 15) % 30
+    k = (32 + 2 * (b % 4) + 2 * (c // 4) - h - c % 4) % 7
+    m = (a + 11 * h + 22 * k) // 451
+    easter = datetime(year, (h + k - 7 * m + 114) // 31, (h + k - 7 * m + 114) % 31 + 1).date()
+    days = {nth(1, 0, 3), nth(2, 0, 3), easter - timedelta(days=2), last(5, 0), nth(9, 0, 1), nth(11, 3, 4),
+            _observed(datetime(year, 7, 4).date()), _observed(datetime(year, 12, 25).date())}
+    if year >= 2022: days.add(_observed(datetime(year, 6, 19).date()))
+    if datetime(year, 1, 1).weekday() != 5: days.add(_observed(datetime(year, 1, 1).date()))
+    return frozenset(days)
+
+def is_trading_day(day):
+    """미국 정규장이 열리는 날인지 (평일 + NYSE 휴장일 아님). day 는 date 또는 datetime (ET 기준)."""
+    day = day.date() if isinstance(day, datetime) else day
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+# ==========================================
+# 🧭 [SCHEDULER ROLE: 배포당 한 프로세스만 백그라운드 스레드]
+# ==========================================
+# 1: 이 프로세스가 무조건 맡음 / 0: 맡지 않음 / auto: 잠금 파일을 먼저 잡은 프로세스 하나만 (gunicorn 워커 N개 중 하나)
+SCHEDULER_ROLE = os.environ.get("OVERDRIVE_SCHEDULER", "auto")
+SCHEDULER_LOCK_FILE = os.path.join(LOG_DIR, "scheduler.lock")
+_scheduler_lock_fd = None
+
+try: import fcntl
+except ImportError: fcntl = None  # 윈도우 로컬 실행: 단일 프로세스로 간주
+
+class file_lock:
+    """path + '.lock' 에 거는 프로세스 간 배타 잠금. 여러 워커가 같은 JSON 파일을 읽고-고치고-쓸 때 씁니다."""
+
+    def __init__(self, path):
+        self.path = path + ".lock"
+        self.fd = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
+
+def holds_scheduler_role():
+    """이 프로세스가 예열/감시 스레드를 돌릴 차례인지. auto 면 잠금을 비차단으로 시도하고, 잡으면 프로세스가 끝날 때까지 쥐고 있습니다.
+    (잡고 있던 워커가 죽으면 잠금이 풀려 다음에 시도하는 워커가 이어받음)"""
+    global _scheduler_lock_fd
+    if _scheduler_lock_fd is not None or SCHEDULER_ROLE == "1": return True
+    if SCHEDULER_ROLE == "0": return False
+    if fcntl is None:
+        _scheduler_lock_fd = -1
+        return True
+    fd = os.open(SCHEDULER_LOCK_FILE, os.O_RDWR | os.O_CREAT)
+    try: fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    _scheduler_lock_fd = fd
+    return True
+
+def start_background_services():
+    """예열 스케줄러와 주문 감시 스레드를 띄웁니다. import 부작용이 아니라 서버 기동 시점(gunicorn.conf.py 의 post_worker_init,
+    또는 python app.py)에서 부르고, 스케줄러 역할을 잡은 프로세스에서만 실제로 시작합니다. -> 역할을 잡았는지"""
+    if not holds_scheduler_role(): return False
+    if PREWARM_ENABLED: prewarm_scheduler.start()
+    if WATCH_ENABLED: trade_watcher.start()
+    print(f"🧭 [SCHEDULER] pid {os.getpid()} 가 백그라운드 역할 담당 (예열 {'ON' if PREWARM_ENABLED else 'OFF'} / 감시 {'ON' if WATCH_ENABLED else 'OFF'})")
+    return True
+
+# ==========================================
+# ⏰ [PRE-WARM SCHEDULER: 스텔스 스캔 직전 캐시 예열]
+# ==========================================
+HUNT_TIME_KST = os.environ.get("OVERDRIVE_HUNT_TIME_KST", "23:05")          # NIGHTFALL 스텔스 스캔 시각
+PREWARM_LEAD_MIN = int(os.environ.get("OVERDRIVE_PREWARM_LEAD_MIN", 8))      # 몇 분 먼저 예열할지
+PREWARM_ENABLED = os.environ.get("OVERDRIVE_PREWARM", "1") != "0"
+
+class PrewarmScheduler:
+    """미국 동부 평일의 사냥 시각(한국시간 고정 → 서머타임 자동 반영) 몇 분 전에 유니버스/일봉(+VIX/TNX)/차트 워커/제미나이 핸들을 미리 데워 둡니다.
+    웹훅이 울리면 사냥은 짧은 델타 수신과 딥스캔만 하면 됩니다."""
+
+    def __init__(self, hunt_time_kst=HUNT_TIME_KST, lead_min=PREWARM_LEAD_MIN):
+        self.hunt_time = datetime.strptime(hunt_time_kst, "%H:%M").time()
+        self.lead = timedelta(minutes=lead_min)
+        self._thread = None
+        self._warmed_for = None
+        self._run_lock = threading.Lock()
+        self.last = {"state": "idle", "started_at": None, "seconds": None, "steps": {}}
+
+    def next_hunt(self, now=None):
+        """다음 사냥 시각(ET). 한국시간 기준 시각을 ET로 바꿨을 때 미국 거래일(평일이고 NYSE 휴장일 아님)이고, 장 마감 전(프리장/본장)인 날만 고릅니다."""
+        kst, et = pytz.timezone('Asia/Seoul'), pytz.timezone('US/Eastern')
+        now = (now or datetime.now(et)).astimezone(kst)
+        for d in range(8):
+            hunt = kst.localize(datetime.combine((now + timedelta(days=d)).date(), self.hunt_time)).astimezone(et)
+            if hunt <= now: continue
+            is_regular, is_pre, _ = get_market_status(hunt)
+            if is_trading_day(hunt) and (is_regular or is_pre): return hunt
+        return None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="prewarm")
+            self._thread.start()
+        return self
 
+    def trigger(self):
+        """다음 예약을 기다리지 않고 지금 한 번 예열합니다. (백그라운드)"""
+        threading.Thread(target=self.run_once, daemon=True, name="prewarm-now").start()
+
+    def _loop(self):
+        while True:
+            hunt = self.next_hunt()
+            if hunt is None: return
+            now = datetime.now(pytz.timezone('US/Eastern'))
+            # 이번 사냥분을 이미 데웠으면 사냥 시각이 지날 때까지 대기 (리부팅으로 예열 구간 안에 켜졌으면 즉시 예열)
+            wait = (hunt - now).total_seconds() + 1 if hunt == self._warmed_for else (hunt - self.lead - now).total_seconds()
+            if wait > 0:
+                time.sleep(min(wait, 600))
+                continue
+            self.run_once()
+            self._warmed_for = hunt
+
+    def run_once(self):
+        if not self._run_lock.acquire(blocking=False): return self.status()
+        try:
+            bind_run_output(RunOutput())  # 예열 로그는 텔레그램으로 보내지 않음 (Render 로그에만)
+            self.last = {"state": "running", "started_at": time.time(), "seconds": None, "steps": {}}
+            t0 = time.perf_counter()
+            for name, fn in [("imports", warm_imports),
+                             ("universe", lambda: universe_status()["state"] == "fresh" or refresh_universe_snapshot()),
+                             ("bulk_download", lambda: fetch_bulk_prices(get_market_universe() + INVERSE_UNIVERSE + ['QQQ'] + MACRO_TICKERS)),
+                             ("chart_workers", _warm_chart_workers),
+                             ("gemini", _warm_gemini)]:
+                s0 = time.perf_counter()
+                try:
+                    fn()
+                    self.last["steps"][name] = round(time.perf_counter() - s0, 3)
+                except Exception as e: self.last["steps"][name] = f"error: {e!r}"
+                record_stage(f"prewarm_{name}", time.perf_counter() - s0)
+            self.last.update(state="done", seconds=round(time.perf_counter() - t0, 3))
+            print(f"🔥 [PRE-WARM] 예열 완료 ({self.last['seconds']:.1f}초): {self.last['steps']}")
+            return self.status()
+        finally: self._run_lock.release()
+
+    def status(self):
+        hunt = self.next_hunt()
+        return dict(self.last, enabled=PREWARM_ENABLED, running=self._thread is not None and self._thread.is_alive(),
+                    next_hunt_et=hunt.isoformat() if hunt else None, next_prewarm_et=(hunt - self.lead).isoformat() if hunt else None)
+
+def _warm_chart_workers():
+    """차트 프로세스 풀을 띄우고 워커마다 mplfinance 임포트/스타일/폰트 캐시를 데웁니다."""
+    idx = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=30)
+    dummy = pd.DataFrame({'Open': 1.0, 'High': 1.1, 'Low': 0.9, 'Close': 1.0, 'Volume': 1.0}, index=idx)
+    pool = _get_chart_pool()
+    for f in [pool.submit(_render_chart_png, "WARM", dummy) for _ in range(CHART_RENDER_WORKERS)]: f.result()
+
+def _warm_gemini():
+    """모델 핸들을 만들고 가벼운 토큰 카운트 호출로 클라이언트/TLS 연결을 미리 엽니다."""
+    if not GEMINI_API_KEY: return
+    for name in (GEMINI_FAST_MODEL_NAME, GEMINI_MODEL_NAME): get_gemini_model(name).count_tokens("ping")
+
+prewarm_scheduler = PrewarmScheduler()
+
+# ==========================================
+# 👁️ [TRADE WATCH: 주문 레벨 감시 + 트리거 알림]
+# ==========================================
+WATCH_POLL_SEC = max(5, int(os.environ.get("OVERDRIVE_WATCH_POLL_SEC", 20)))  # 1분봉 증분 폴링 간격 (야후 요청 상한)
+WATCH_ENABLED = os.environ.get("OVERDRIVE_WATCH", "1") != "0"
+MOC_DECISION_ET = "15:50"  # MOC 심판 시각 (장 마감 10분 전)
+
+class TradeWatcher:
+    """사냥이 확정한 주문 레벨을 파일에 저장해 두고, 본장 동안 활성 타겟의 1분봉을 배치 요청 한 번으로 증분 수신합니다.
+    VWAP/당일 고점은 새로 완성된 봉만 누적해 갱신하고(당일 재다운로드 없음), 트리거나 MOC 판정 시각을 넘는 순간 텔레그램으로 알립니다.
+    감시 파일이 워커 간 공유 상태입니다: 어느 워커든 등록/해제할 수 있고, 폴링 스레드는 스케줄러 역할을 잡은 프로세스 하나만 돌립니다."""
+
+    # (키, 레벨 필드, 방향, 알림 문구) — 봉의 고가/저가로 판정하므로 폴링 사이에 스치고 지나간 돌파도 놓치지 않습니다.
+    TRIGGERS = [("entry_2", "entry_2_val", "below", "🔵 [2차 매복] ${level:.2f} 도달 → {half_qty}주 지정가 체결 구간"),
+                ("sl1", "sl1_trigger", "below", "🔴 [1차 방패] ${level:.2f} 이탈 → {half_qty}주 손절 조건 발동"),
+                ("sl2", "sl2_trigger", "below", "🔴 [2차 방패] ${level:.2f} 이탈 → 잔여 {half_qty}주 손절 조건 발동 (감시 종료)"),
+                ("tp1", "tp1_trigger", "above", "🟢 [1차 익절] ${level:.2f} 돌파 → {half_qty}주 지정가 ${limit:.2f} 익절 구간"),
+                ("tp2", "tp2_trigger", "above", "🚀 [2차 런너] ${level:.2f} 돌파 → 잔여 {half_qty}주 익절 (감시 종료)")]
+    CLOSING = {"sl2", "tp2"}
+
+    def __init__(self, path=WATCH_FILE, poll_sec=WATCH_POLL_SEC):
+        self.path = path
+        self.poll_sec = poll_sec
+        self.watches = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.last_poll = {"at": None, "seconds": None, "bars": 0, "error": None}
+        self.watches = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path) as f: return json.load(f)
+        except: return {}
+
+    def _save(self):
+        try:
+            with open(self.path + ".tmp", "w") as f: json.dump(self.watches, f, ensure_ascii=False, indent=1)
+            os.replace(self.path + ".tmp", self.path)
+        except Exception as e: print(f"감시 파일 저장 에러: {e}")
+
+    def reload(self):
+        """다른 워커가 등록/해제한 감시를 파일에서 다시 읽습니다."""
+        with self._lock, file_lock(self.path): self.watches = self._read()
+        return self
+
+    def arm(self, ticker, levels, sizings, run_id, now=None):
+        """최종 조준표의 레벨로 감시를 등록합니다. sizings 는 {chat_id: 그 계좌의 사이징} 이고, 같은 티커의 이전 감시는 덮어씁니다.
+        등록 시각(armed_at) 이전 봉은 VWAP/고점 누적에만 쓰고 트리거 판정에는 넣지 않습니다. (조준표가 나오기 전의 가격으로 울리지 않게)"""
+        now = now or datetime.now(pytz.timezone('US/Eastern'))
+        keep = ['entry_price', 'entry_2_val', 'avg_entry', 'tp1_trigger', 'tp1_limit', 'tp2_trigger', 'tp2_limit', 'sl1_trigger', 'sl2_trigger', 'break_even_stop_limit']
+        with self._lock, file_lock(self.path):
+            self.watches = self._read()
+            self.watches[ticker] = {"ticker": ticker, "run_id": run_id, "date": now.strftime('%Y-%m-%d'), "armed_at": now.isoformat(),
+                                    "levels": {k: round(float(levels[k]), 4) for k in keep}, "chat_ids": list(sizings),
+                                    "sizes": {str(c): {"qty": int(z['qty']), "half_qty": int(z['half_qty'])} for c, z in sizings.items()}, "state": "active", "fired": {},
+                                    "last_bar": None, "cum_pv": 0.0, "cum_v": 0.0, "high": None, "session_high": None, "last_price": None, "vwap": None}
+            self._save()
+        if WATCH_ENABLED: start_background_services()  # 역할을 잡은 워커가 없으면(죽었으면) 이 워커가 이어받음
+
+    def disarm(self, ticker):
+        with self._lock, file_lock(self.path):
+            self.watches = self._read()
+            w = self.watches.get(ticker)
+            if w is not None and w["state"] == "active": w["state"] = "cancelled"
+            self._save()
+        return w is not None
+
+    def active(self):
+        return [w for w in self.watches.values() if w["state"] == "active"]
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, daemon=True, name="trade-watch")
+                self._thread.start()
+        return self
+
+    def _loop(self):
+        et = pytz.timezone('US/Eastern')
+        while True:
+            if not self.reload().active():  # 감시가 없으면 다른 워커의 등록을 기다림
+                time.sleep(max(30, self.poll_sec))
+                continue
+            now = datetime.now(et)
+            opens_at = et.localize(datetime.combine(now.date(), datetime.strptime("09:30", "%H:%M").time()))
+            if now < opens_at:  # 프리장에 등록됐으면 본장 개장까지 잠잠히 대기
+                time.sleep(min((opens_at - now).total_seconds(), 600))
+                continue
+            t0 = time.perf_counter()
+            try: self.poll(now)
+            except Exception as e:
+                self.last_poll["error"] = repr(e)
+                print(f"감시 폴링 에러: {e}")
+            time.sleep(max(1.0, self.poll_sec - (time.perf_counter() - t0)))
+
+    def poll(self, now=None):
+        """활성 타겟 전체의 새 1분봉을 요청 한 번으로 받아 누적하고, 발동한 트리거를 알립니다."""
+        et = pytz.timezone('US/Eastern')
+        now = now or datetime.now(et)
+        with self._lock, file_lock(self.path):
+            self.watches = self._read() or self.watches
+            today = now.strftime('%Y-%m-%d')
+            for w in self.active():
+                if w["date"] != today or not is_trading_day(now): w["state"] = "expired"  # 등록한 거래일이 지났거나 휴장일이면 감시할 세션이 없음
+            self._save()
+            watches = self.active()
+        if not watches: return []
+        opens_at = et.localize(datetime.combine(now.date(), datetime.strptime("09:30", "%H:%M").time()))
+        start = min(pd.Timestamp(w["last_bar"]) if w["last_bar"] else pd.Timestamp(opens_at) for w in watches)
+        tickers = [w["ticker"] for w in watches]
+        t0 = time.perf_counter()
+        raw = yf.download(tickers, start=start.to_pydatetime(), interval="1m", prepost=False, threads=True, progress=False)
+        metrics.inc("overdrive_payload_bytes_total", frame_nbytes(raw), source="yahoo_watch")
+        frames = split_download(raw, tickers)
+        alerts = []
+        with self._lock, file_lock(self.path):
+            self.watches = self._read() or self.watches
+            for w in watches:
+                cur = self.watches.get(w["ticker"])
+                if cur is not None and (cur["run_id"] != w["run_id"] or cur["state"] != "active"): continue  # 폴링 도중 재등록/해제됨
+                alerts += self._fold(w, frames.get(w["ticker"]), now)
+                self.watches[w["ticker"]] = w
+            self._save()
+        self.last_poll = {"at": now.isoformat(), "seconds": round(time.perf_counter() - t0, 3), "bars": sum(len(f) for f in frames.values()), "error": None}
+        for w, key, text, params in alerts: self._alert(w, key, text, params)
+        return [(w["ticker"], key) for w, key, _, _ in alerts]
+
+    def _fold(self, w, df, now):
+        """새 봉만 누적합니다. 마지막 봉은 아직 진행 중이므로 VWAP 누적에는 넣지 않고 현재가/고가·저가 판정에만 씁니다.
+        트리거는 등록 시각(armed_at)이 속한 분봉부터 봉 순서대로 판정하고(한 봉 안에서는 손절 먼저), 2차 방패/2차 런너로 포지션이 닫히면 그 뒤 트리거는 보지 않습니다.
+        MOC 심판도 판정 시각 전에 등록된 감시에만 보냅니다.
+        -> [(감시, 키, 알림 문구 틀, 문구 인자)] (수량은 계좌마다 달라 _alert 에서 채움)"""
+        alerts = []
+        armed = pd.Timestamp(w["armed_at"]).tz_convert('US/Eastern') if w.get("armed_at") else None  # 구버전 감시 파일은 개장부터
+        if df is not None and not df.empty:
+            if df.index.tz is None: df.index = df.index.tz_localize('UTC')
+            df = df[df.index.tz_convert('US/Eastern').strftime('%Y-%m-%d') == now.strftime('%Y-%m-%d')]
+            if w["last_bar"]: df = df[df.index >= pd.Timestamp(w["last_bar"])]
+        if df is not None and not df.empty:
+            h, l, c, v = (df[k].to_numpy(dtype=float) for k in ['High', 'Low', 'Close', 'Volume'])
+            v = np.nan_to_num(v)
+            pv = np.nan_to_num((h + l + c) / 3 * v)
+            w["cum_pv"] += float(pv[:-1].sum())
+            w["cum_v"] += float(v[:-1].sum())
+            if len(h) > 1: w["high"] = max(w["high"] or -np.inf, float(np.nanmax(h[:-1])))
+            w["last_bar"] = df.index[-1].isoformat()  # 진행 중인 봉은 다음 폴링에서 완성본으로 다시 받습니다
+            w["last_price"] = float(c[-1])
+            w["session_high"] = max(w["high"] or -np.inf, float(np.nanmax(h)))
+            w["vwap"] = float((w["cum_pv"] + pv[-1]) / (w["cum_v"] + v[-1])) if w["cum_v"] + v[-1] > 0 else w["last_price"]
+            for i in (np.flatnonzero(df.index >= armed.floor('min')) if armed is not None else range(len(h))):
+                if w["state"] != "active": break
+                for key, field, side, text in self.TRIGGERS:
+                    if key in w["fired"]: continue
+                    level = w["levels"][field]
+                    if (side == "below" and l[i] <= level) or (side == "above" and h[i] >= level):
+                        w["fired"][key] = {"at": df.index[i].isoformat(), "price": float(c[i])}
+                        alerts.append((w, key, text, {"level": level, "limit": w["levels"]["tp1_limit"]}))
+                        if key in self.CLOSING:
+                            w["state"] = "closed"
+                            break
+        moc_at = datetime.strptime(MOC_DECISION_ET, "%H:%M").time()
+        if w["state"] == "active" and "moc" not in w["fired"] and now.time() >= moc_at and w["last_price"] is not None and (armed is None or armed.time() < moc_at):
+            avg = w["levels"]["avg_entry"]
+            w["fired"]["moc"] = {"at": now.isoformat(), "price": w["last_price"]}
+            if w["last_price"] < avg: text = f"⏰ [MOC 심판] 현재가 < 평단 ${avg:.2f} → 조건주문 전부 취소 후 잔여 수량 시장가 매도 (타임 컷)"
+            else: text = f"⏰ [MOC 심판] 현재가 >= 평단 ${avg:.2f} → 손절망 2개 취소, 감시가 ${avg:.2f} / 지정가 ${w['levels']['break_even_stop_limit']:.2f} 본전 스탑 1개로 스윙"
+            alerts.append((w, "moc", text, {}))
+            w["state"] = "closed"
+        if w["state"] == "active" and now.time() >= datetime.strptime("16:00", "%H:%M").time(): w["state"] = "closed"
+        return alerts
+
+    def _alert(self, w, key, text, params):
+        """계좌(채팅방)마다 그 계좌의 수량으로 문구를 채워 보냅니다."""
+        price, vwap, high = w["last_price"] or 0.0, w["vwap"] or 0.0, w.get("session_high") or 0.0
+        sizes = w.get("sizes") or {str(c): {"qty": w.get("qty", 0), "half_qty": w.get("half_qty", 0)} for c in w["chat_ids"]}  # 구버전 감시 파일
+        metrics.inc("overdrive_watch_alerts_total", trigger=key)
+        for k, chat_id in enumerate(w["chat_ids"]):
+            msg = f"👁️ [TRADE WATCH] {w['ticker']}\n{text.format(**params, **sizes[str(chat_id)])}\n   현재가 ${price:.2f} / VWAP ${vwap:.2f} / 당일 고점 ${high:.2f}"
+            if k == 0: print(msg)
+            out = RunOutput(chat_id)
+            out.write(msg)
+            out.stream()
+
+    def status(self):
+        self.reload()
+        return {"enabled": WATCH_ENABLED, "poll_sec": self.poll_sec, "running": self._thread is not None and self._thread.is_alive(),
+                "last_poll": self.last_poll, "watches": list(self.watches.values())}
+
+trade_watcher = TradeWatcher()
+
+# ==========================================
+# 💾 [CORE FUNCTIONS (v4.5 원본)]
+# ==========================================
 def load_failed_state():
     if os.path.exists(STATE_FILE):
         try:
@@ -142,9 +2005,9 @@ def print_overdrive_timeline():
     t_print(" ⏰ 🕟 새벽 05:20 ~ 05:40 (파워아워 심판): 알람 기상! 본전 아래면 당일 컷 / 본전 위면 무위험 스윙 셋업!")
     t_print("="*80 + "\n")
 
-def get_market_status():
+def get_market_status(now=None):
     tz = pytz.timezone('US/Eastern')
-    now = datetime.now(tz)
+    now = now.astimezone(tz) if now is not None else datetime.now(tz)
     market_open = now.replace(hour=9, minute=30, second=0, microsecond=0)
     market_close = now.replace(hour=16, minute=0, second=0, microsecond=0)
     is_regular = market_open <= now < market_close
@@ -159,18 +2022,40 @@ def get_market_status():
         progress = max(0.05, elapsed / 390.0)
     return is_regular, is_pre, progress
 
-def get_macro_environment():
-    try:
-        data = yf.download(["^VIX", "^TNX"], period="5d", progress=False)
-        if isinstance(data.columns, pd.MultiIndex):
-            closes = data['Close'] if 'Close' in data.columns.levels[0] else data.xs('Close', level=1, axis=1)
-        else:
-            closes = data['Close'] if 'Close' in data.columns else pd.DataFrame()
-        closes = closes.dropna(how='all')
-        if not closes.empty and '^VIX' in closes.columns:
-            return float(closes['^VIX'].dropna().iloc[-1]), float(closes['^TNX'].dropna().iloc[-1]) if '^TNX' in closes.columns else 4.0
-    except: pass
-    return (20.0, 4.0)
+def read_macro(closes):
+    """벌크 일봉에 함께 실려 온 ^VIX/^TNX 의 최신 값. 없으면 기존 기본값(20.0 / 4.0)."""
+    try: vix = float(closes['^VIX'].dropna().iloc[-1])
+    except: return (20.0, 4.0)
+    try: tnx = float(closes['^TNX'].dropna().iloc[-1])
+    except: tnx = 4.0
+    return vix, tnx
+
+async def _gather_with_fallbacks(tasks):
+    """(이름, 함수, 기본값) 작업들을 스레드에서 동시에 돌리고, 개별 타임아웃/예외 시 기본값으로 대체합니다."""
+    loop = asyncio.get_running_loop()
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="bootstrap")
+    output = current_output()
+    def bound(fn):
+        def run():
+            bind_run_output(output)
+            return fn()
+        return run
+    async def one(name, fn, fallback):
+        try: return await asyncio.wait_for(loop.run_in_executor(pool, bound(fn)), BOOTSTRAP_TIMEOUT_SEC[name])
+        except Exception as e:
+            t_print(f"   ⚠️ [BOOTSTRAP] {name} {'시간 초과' if isinstance(e, asyncio.TimeoutError) else f'실패 ({e})'} → 기본값으로 진행")
+            return fallback
+    try: return dict(zip([t[0] for t in tasks], await asyncio.gather(*(one(*t) for t in tasks))))
+    finally: pool.shutdown(wait=False)  # 시간 초과된 작업을 기다리지 않음
+
+@timed_stage("bootstrap")
+def run_bootstrap():
+    """실패 기록 / 장 상태 / 유니버스 스냅샷을 동시에 읽습니다. 네트워크는 쓰지 않으므로 첫 네트워크 왕복은 벌크 일봉 수신입니다."""
+    return asyncio.run(_gather_with_fallbacks([
+        ("failed_state", load_failed_state, []),
+        ("market_status", get_market_status, (False, False, 1.0)),
+        ("universe", get_market_universe, list(CORE_UNIVERSE)),
+    ]))
 
 def calculate_true_atr(df_high, df_low, df_close, period=14):
     try:
@@ -179,29 +2064,328 @@ def calculate_true_atr(df_high, df_low, df_close, period=14):
         return float(tr.rolling(period).mean().iloc[-1])
     except: return float(df_close.iloc[-1]) * 0.02
 
+def indicator_frame(opens, highs, lows, closes, volumes, cols):
+    """(행렬 경로) 상태가 없는 티커의 지표를 (날짜 x 티커) 행렬에서 한 번에 뽑습니다.
+    티커마다 결측 봉을 건너뛴 '뒤에서 k번째 유효 봉'을 순위 행렬로 골라 기존 per-ticker 루프와 같은 값을 냅니다."""
+    frames = [m.reindex(columns=cols) for m in (opens, highs, lows, closes, volumes)]
+    keep = ~frames[3].index.duplicated(keep='last')
+    o, h, l, c, v = (f[keep].to_numpy(dtype=float) for f in frames)
+
+    valid = ~(np.isnan(o) | np.isnan(h) | np.isnan(l) | np.isnan(c) | np.isnan(v))
+    rank = np.where(valid, np.cumsum(valid[::-1], axis=0)[::-1], 0)  # 1 = 가장 최근 유효 봉
+    def nth(arr, k): return np.where(rank == k, arr, 0.0).sum(axis=0)
+    def window_mean(arr, lo, hi): return np.where((rank >= lo) & (rank <= hi), arr, 0.0).sum(axis=0) / (hi - lo + 1)
+    return pd.DataFrame({'c1': nth(c, 1), 'c2': nth(c, 2), 'c10': nth(c, 10), 'c20': nth(c, 20), 'sma20': window_mean(c, 1, 20),
+                         'avg_v': window_mean(v, 2, 11), 'v1': nth(v, 1), 'o1': nth(o, 1), 'n': valid.sum(axis=0)}, index=cols)
+
+@timed_stage("phase1_scoring")
+def score_universe(opens, highs, lows, closes, volumes, tickers, qqq_10d, qqq_20d, is_pre_market, progress_ratio, states=None):
+    """Phase-1 파워 스코어를 티커 루프 없이 한 번에 계산합니다.
+    증분 지표 상태(states)가 있는 티커는 미리 계산된 SMA/RS 기준가를 그대로 읽고, 나머지만 행렬에서 뽑습니다."""
+    cols = [t for t in dict.fromkeys(tickers) if t != 'QQQ' and t in closes.columns and t in opens.columns]
+    if not cols: return pd.DataFrame()
+    ind = states.frame(cols) if states is not None else pd.DataFrame(columns=INDICATOR_COLS)
+    rest = [t for t in cols if t not in ind.index]
+    if rest: ind = pd.concat([ind, indicator_frame(opens, highs, lows, closes, volumes, rest)]) if not ind.empty else indicator_frame(opens, highs, lows, closes, volumes, rest)
+    ind = ind.reindex(cols)
+    c1, c2, c10, c20, sma20, avg_v, curr_v, today_open = (ind[k].to_numpy(dtype=float) for k in ['c1', 'c2', 'c10', 'c20', 'sma20', 'avg_v', 'v1', 'o1'])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        comp_rs = (((c1 - c10) / c10) - qqq_10d) * 0.6 + (((c1 - c20) / c20) - qqq_20d) * 0.4
+        v_spike = np.where(is_pre_market & (curr_v < 50000), 0.0, np.where(avg_v > 0, (curr_v / progress_ratio) / avg_v, 0.0))
+        t_gap = np.where(c2 > 0, (today_open - c2) / c2 * 100, 0.0)
+
+    stats = pd.DataFrame({'Price': c1, 'Prev_Close': c2, 'RS': comp_rs, 'Vol_Spike': v_spike, 'SMA20': sma20,
+                          'True_Gap': t_gap, 'Basic_Power_Score': (comp_rs + 1.0) * v_spike}, index=pd.Index(cols, name='Ticker'))
+    return stats[ind['n'].to_numpy(dtype=float) >= 25]
+
+# 2단계 수급 필터 + 딥스캔 3중 페널티 기준값. t1_spike / t1_rs / cap 은 VIX 국면별로 filter_params()가 채웁니다. (임계값 스윕의 기준점)
+FILTER_PARAMS = {"price_min": 5.0, "price_max": 1500.0, "t1_gap": MAX_GAP_UP * 100, "t2_spike": 0.8, "t2_rs": -0.05, "t2_gap": 20.0,
+                 "mcap_large": 0.4, "mcap_mid": 0.7, "gap_start": 3.0, "vwap_below": 0.2, "vwap_above": 1.2}
+
+def filter_params(vix, is_doomsday, overrides=None):
+    t1_spike, t1_rs = (1.2, -0.05) if is_doomsday else ((2.0, 0.05) if vix >= 20.0 else (1.5, 0.0))
+    params = dict(FILTER_PARAMS, t1_spike=t1_spike, t1_rs=t1_rs, cap=5 if is_doomsday else 15)
+    params.update(overrides or {})
+    return params
+
+def apply_two_stage_filter(stats, vix, is_doomsday, params=None):
+    """VIX 국면별 1단계(엄격) → 부족하면 2단계(완화) 수급 필터."""
+    p = params or filter_params(vix, is_doomsday)
+    valid_stocks = pd.DataFrame()
+    for f in [{"desc": "1단계", "spike": p["t1_spike"], "rs": p["t1_rs"], "gap": p["t1_gap"], "trend": not is_doomsday}, {"desc": "2단계", "spike": p["t2_spike"], "rs": p["t2_rs"], "gap": p["t2_gap"], "trend": False}]:
+        if stats.empty: break
+        passed = stats[(stats['Price'] >= p["price_min"]) & (stats['Price'] <= p["price_max"]) & (stats['Vol_Spike'] >= f['spike']) & (stats['RS'] >= f['rs']) & (stats['True_Gap'] < f['gap']) & ((stats['Price'] > stats['SMA20']) if f['trend'] else True)]
+        if not passed.empty: valid_stocks = pd.concat([valid_stocks, passed.drop('QQQ', errors='ignore')]).drop_duplicates()
+        if len(valid_stocks) >= p["cap"]: break
+    return valid_stocks
+
+def get_offset(price): return max(0.10, price * 0.002)
+
+def build_order_levels(entry_price, vwap, atr, yesterday_close, pm_high_val, gap_pct_val, market_cap_val, is_pre_market, is_doomsday):
+    """OVERDRIVE 조준표의 가격 레벨(2차 매복/평단/익절/손절)을 계산합니다. 자본과 무관하므로 실전·백테스트가 그대로 공유합니다."""
+    cap_scale = 1.0
+    if market_cap_val > 100_000_000_000: cap_scale = 0.5    
+    elif market_cap_val > 20_000_000_000: cap_scale = 0.7   
+
+    if vwap == 0.0: vwap = entry_price
+    
+    entry_2_val = (entry_price - (atr * 0.5 * cap_scale)) if is_pre_market else (entry_price - (atr * 0.3 * cap_scale) if abs(vwap - entry_price) / entry_price < 0.002 else vwap)
+    avg_entry = (entry_price + entry_2_val) / 2.0
+    
+    risk_multiplier = 1.2 if is_doomsday else 1.0
+
+    sl_distance = max(atr * risk_multiplier * cap_scale, avg_entry * 0.01)
+    base_hard_stop = avg_entry - sl_distance
+
+    gap_discount = 1.0
+    if gap_pct_val > 0:
+        gap_discount = max(0.5, 1.0 - (gap_pct_val / 10.0))
+
+    reward_unit = max(atr * 0.8 * cap_scale * gap_discount, avg_entry * 0.008)
+    raw_tp1 = avg_entry + reward_unit
+    
+    theoretical_ceiling = yesterday_close + (atr * 1.5)  
+    tp1_trigger = min(raw_tp1, theoretical_ceiling * 0.998) 
+    
+    if pm_high_val > avg_entry and tp1_trigger > pm_high_val:
+        tp1_trigger = max(pm_high_val * 0.998, avg_entry * 1.005) 
+
+    tp2_raw = avg_entry + (reward_unit * 3.0)
+    tp2_trigger = min(tp2_raw, theoretical_ceiling * 1.01) 
+    if tp2_trigger <= tp1_trigger: tp2_trigger = tp1_trigger + (avg_entry * 0.005)
+
+    return {'entry_price': entry_price, 'vwap': vwap, 'atr': atr, 'cap_scale': cap_scale, 'gap_discount': gap_discount,
+            'entry_2_val': entry_2_val, 'avg_entry': avg_entry, 'base_hard_stop': base_hard_stop, 'theoretical_ceiling': theoretical_ceiling,
+            'tp1_trigger': tp1_trigger, 'tp2_trigger': tp2_trigger, 'tp1_limit': tp1_trigger - get_offset(tp1_trigger), 'tp2_limit': tp2_trigger - get_offset(tp2_trigger),
+            'sl1_trigger': base_hard_stop, 'sl2_trigger': base_hard_stop - 0.10, 'break_even_stop_limit': avg_entry - get_offset(avg_entry)}
+
+def size_positions(levels, target_profit, max_risk, slot_capital):
+    """같은 가격 레벨에 대해 여러 자본 설정(배열)의 총 수량(짝수, 최소 2주)을 한 번에 계산합니다. -> 설정별 dict 리스트
+    익절 폭이나 손절 폭이 0 이하(레벨 역전)이면 그 한도는 건너뛰고 슬롯 자본 한도로 정합니다."""
+    target_profit, max_risk, slot_capital = (np.atleast_1d(np.asarray(x, dtype=float)) for x in (target_profit, max_risk, slot_capital))
+    avg_entry = levels['avg_entry']
+    profit_per_share, risk_per_share = levels['tp1_trigger'] - avg_entry, avg_entry - levels['base_hard_stop']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ideal_total_qty = np.maximum(1, np.floor_divide(target_profit, profit_per_share) + 1) * 2 if profit_per_share > 0 else np.full_like(target_profit, np.inf)
+        risk_cap = np.maximum(2, np.floor_divide(max_risk, risk_per_share)) if risk_per_share > 0 else ideal_total_qty
+        qty = np.minimum(np.minimum(ideal_total_qty, risk_cap), np.maximum(2, np.floor_divide(slot_capital, avg_entry))).astype(int)
+    qty = np.maximum(qty - qty % 2, 2)
+    return [{'qty': q, 'half_qty': q // 2, 'profit_per_share': profit_per_share, 'risk_per_share': risk_per_share,
+             'expected_profit_at_t1': profit_per_share * (q // 2), 'max_total_loss': risk_per_share * q} for q in qty.tolist()]
+
+def size_position(levels, target_profit=None, max_risk=None, slot_capital=None):
+    """목표 수익 / 최대 리스크 / 슬롯 자본 한도로 총 수량을 정합니다. (단일 설정, 기본값은 모듈 상수)"""
+    return size_positions(levels, TARGET_PROFIT_USD if target_profit is None else target_profit, MAX_RISK_USD if max_risk is None else max_risk,
+                          SLOT_CAPITAL if slot_capital is None else slot_capital)[0]
+
+def load_profiles():
+    """PROFILES_FILE 의 계좌 프로필 목록. 파일이 없거나 깨졌으면 모듈 상수로 만든 기본 프로필 1개.
+    예) {"profiles": [{"name": "main", "chat_id": "...", "total_capital": 43000, "target_profit_usd": 600}]}
+    slot_capital / max_risk_usd 를 생략하면 총자본의 80% / 1.5% 를 씁니다."""
+    default = {"name": "main", "chat_id": TELEGRAM_CHAT_ID, "total_capital": TOTAL_CAPITAL, "target_profit_usd": TARGET_PROFIT_USD,
+               "slot_capital": SLOT_CAPITAL, "max_risk_usd": MAX_RISK_USD}
+    try:
+        with open(PROFILES_FILE, 'r') as f: raw = json.load(f).get("profiles", [])
+        profiles = []
+        for i, p in enumerate(raw):
+            total = float(p["total_capital"])
+            profiles.append({"name": str(p.get("name") or f"profile{i + 1}"), "chat_id": str(p.get("chat_id") or TELEGRAM_CHAT_ID), "total_capital": total,
+                             "target_profit_usd": float(p.get("target_profit_usd", TARGET_PROFIT_USD)),
+                             "slot_capital": float(p.get("slot_capital", total * 0.80)), "max_risk_usd": float(p.get("max_risk_usd", total * 0.015))})
+        if profiles: return profiles
+    except FileNotFoundError: pass
+    except Exception as e: print(f"프로필 설정 에러 (기본 프로필 사용): {e}")
+    return [default]
+
+def size_profiles(levels, profiles):
+    """우승 종목의 가격 레벨은 한 번만 계산하고, 수량/리스크만 모든 프로필에 대해 벡터로 계산합니다."""
+    return size_positions(levels, [p["target_profit_usd"] for p in profiles], [p["max_risk_usd"] for p in profiles], [p["slot_capital"] for p in profiles])
+
+def build_ticker_frame(opens, highs, lows, closes, volumes, t):
+    """차트/ATR이 필요한 생존 종목에 한해서만 개별 OHLCV 프레임을 만듭니다."""
+    cand_df = pd.DataFrame({'Open': opens[t], 'High': highs[t], 'Low': lows[t], 'Close': closes[t], 'Volume': volumes[t]}).dropna()
+    cand_df = cand_df[~cand_df.index.duplicated(keep='last')].astype(float)
+    cand_df.index = pd.to_datetime(cand_df.index)
+    return cand_df
+
+def get_market_caps(tickers):
+    """시가총액은 미국 동부 기준 하루 한 번만 조회합니다. 당일 캐시에 없는 종목만 가벼운 fast_info로 병렬 조회합니다."""
+    today = datetime.now(pytz.timezone('US/Eastern')).strftime('%Y-%m-%d')
+    caps = {}
+    if os.path.exists(MARKET_CAP_FILE):
+        try:
+            with open(MARKET_CAP_FILE, 'r') as f: cache = json.load(f)
+            if cache.get("date") == today: caps = cache.get("caps", {})
+        except: pass
+    missing = [t for t in tickers if t not in caps]
+    if missing:
+        def fetch_cap(t):
+            try: return t, float(yf.Ticker(t).fast_info['marketCap'] or 0.0)
+            except: return t, 0.0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            fetched = dict(executor.map(fetch_cap, missing))
+        caps.update({t: c for t, c in fetched.items() if c > 0})
+        try:
+            with open(MARKET_CAP_FILE, 'w') as f: json.dump({"date": today, "caps": caps}, f)
+        except: pass
+    return {t: float(caps.get(t, 0.0)) for t in tickers}
+
+def deep_scan_penalty(mcap, gap_pct, curr_price, pm_vwap, params=FILTER_PARAMS):
+    """3중 페널티(시총/갭/VWAP) 배수와 수급판독 문자열을 후보 배열 전체에 대해 한 번에 계산합니다."""
+    p = params
+    penalty = np.where(mcap > 100_000_000_000, p["mcap_large"], np.where(mcap > 50_000_000_000, p["mcap_mid"], 1.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        penalty = penalty * np.where(gap_pct > p["gap_start"], np.maximum(0.2, p["gap_start"] / gap_pct), 1.0)
+    has_vwap = pm_vwap > 0
+    below = has_vwap & (curr_price < pm_vwap)
+    penalty = penalty * np.where(has_vwap, np.where(below, p["vwap_below"], p["vwap_above"]), 1.0)
+    status = np.where(has_vwap, np.where(below, "🚨설거지(VWAP하회)", "✅찐수급(VWAP상회)"), "알수없음")
+    return penalty, status
+
+@timed_stage("deep_scan")
+def deep_scan_batch(pre_candidates):
+    """Phase 2.5: 후보 전체의 3일치 1분봉을 멀티 티커 요청 한 번으로 받고, 당일 VWAP/프리장 고점/페널티를 벡터로 계산합니다."""
+    tickers = list(pre_candidates.index)
+    base = pre_candidates['Basic_Power_Score'].to_numpy(dtype=float)
+    prev_close = pre_candidates['Prev_Close'].to_numpy(dtype=float)
+    curr = pre_candidates['Price'].to_numpy(dtype=float)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        caps_future = executor.submit(get_market_caps, tickers) # 시총 캐시 미스 조회는 1분봉 수신과 겹쳐서 진행
+        try:
+            raw = yf.download(tickers, period="3d", interval="1m", prepost=True, threads=True, progress=False)
+            metrics.inc("overdrive_payload_bytes_total", frame_nbytes(raw), source="yahoo_1m")
+            frames = split_download(raw, tickers)
+        except Exception as e:
+            print(f"1분봉 배치 수신 에러: {e}")
+            frames = None
+        mcap = np.array([caps_future.result().get(t, 0.0) for t in tickers])
+
+    if not frames:
+        return pd.DataFrame({'Power_Score': base, 'Market_Cap': 0.0, 'Gap_Pct': 0.0, 'PM_VWAP': curr, 'PM_High': curr, 'VWAP_Status': '에러'}, index=pd.Index(tickers, name='Ticker'))
+
+    wide = {col: pd.DataFrame({t: f[col] for t, f in frames.items()}).reindex(columns=tickers).astype(float) for col in ['High', 'Low', 'Close', 'Volume']}
+    day = wide['Close'].index.normalize()
+    vol = wide['Volume'].fillna(0.0)
+    daily_v = vol.groupby(day).sum().to_numpy()
+    daily_pv = (((wide['High'] + wide['Low'] + wide['Close']) / 3) * vol).fillna(0.0).groupby(day).sum().to_numpy()
+    daily_hi = wide['High'].groupby(day).max().to_numpy()
+
+    # 당일 거래가 없으면(주말/장 시작 전) 직전 거래일 1분봉으로 대체
+    use_last = daily_v[-1] > 0
+    use_prev = (~use_last) & (daily_v[-2] > 0) if len(daily_v) > 1 else np.zeros(len(tickers), dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pm_vwap = np.where(use_last, daily_pv[-1] / daily_v[-1], 0.0)
+        if len(daily_v) > 1: pm_vwap = np.where(use_prev, daily_pv[-2] / daily_v[-2], pm_vwap)
+        gap_pct = np.where(prev_close > 0, (curr - prev_close) / prev_close * 100, 0.0)
+    pm_high = np.where(use_last, daily_hi[-1], curr)
+    if len(daily_v) > 1: pm_high = np.where(use_prev, daily_hi[-2], pm_high)
+
+    threading.Thread(target=save_minute_bars, args=(frames,), daemon=True).start()
+    penalty, status = deep_scan_penalty(mcap, gap_pct, curr, pm_vwap)
+    return pd.DataFrame({'Power_Score': base * penalty, 'Market_Cap': mcap, 'Gap_Pct': gap_pct, 'PM_VWAP': pm_vwap, 'PM_High': pm_high.astype(float), 'VWAP_Status': status},
+                        index=pd.Index(tickers, name='Ticker'))
+
+_gemini_models = {}
+
+def get_gemini_model(name=GEMINI_MODEL_NAME):
+    """모델 핸들을 프로세스당 한 번만 만들어 재사용합니다. (사전 예열이 미리 만들어 둠)"""
+    model = _gemini_models.get(name)
+    if model is None: model = _gemini_models[name] = genai.GenerativeModel(name)
+    return model
+
+# 개별 제미나이 요청(헤지 포함)만 도는 풀: 예선 2 + 본선 2 + 코치 2, 마감으로 버려져 아직 응답 대기 중인 요청 몫 2.
+# 이 풀 안에서 다시 hedged_generate 를 부르면(중첩) 바깥 작업이 안쪽 요청의 자리를 잡아먹으므로, 코치 같은 바깥 작업은 _ai_task_pool 에서 돌립니다.
+_ai_pool = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="gemini")
+_ai_task_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="gemini-task")
+
+def _gemini_generate(name, contents, config, timeout, stage):
+    t0 = time.perf_counter()
+    response = get_gemini_model(name).generate_content(contents, generation_config=config, request_options={"timeout": max(1.0, timeout)})
+    record_stage(stage, time.perf_counter() - t0)
+    return response.text.strip()
+
+AI_REQUEST_TIMEOUT_MARGIN_SEC = 2.0  # SDK 요청 타임아웃은 바깥 마감보다 이만큼 길게 (마감은 바깥 대기가 먼저 TimeoutError 로 판정)
+_AI_TIMEOUT_ERRORS = ("DeadlineExceeded", "ServiceUnavailable", "GatewayTimeout")  # google.api_core 예외 (SDK 를 임포트하지 않고 이름으로 판별)
+
+def _is_ai_timeout(e):
+    return isinstance(e, TimeoutError) or any(c.__name__ in _AI_TIMEOUT_ERRORS for c in type(e).__mro__)
+
+def hedged_generate(name, contents, config, budget, hedge_after=None, stage="gemini_call"):
+    """요청을 보내고 hedge_after 초 안에 답이 없거나 실패하면 같은 요청을 한 번 더 보내 먼저 온 답을 씁니다.
+    budget 초 안에 어느 쪽도 답하지 않으면 TimeoutError (느린 요청은 버려지고 결과는 무시됩니다).
+    SDK 의 마감 초과/일시 불가 예외로 끝나도 TimeoutError 로 바꿔, 호출부가 [REJECTED] 가 아닌 마감 경로(대체 타겟)를 타게 합니다."""
+    t0 = time.monotonic()
+    deadline, hedge_at = t0 + budget, t0 + (AI_HEDGE_AFTER_SEC if hedge_after is None else hedge_after)
+    pending = {_ai_pool.submit(_gemini_generate, name, contents, config, budget + AI_REQUEST_TIMEOUT_MARGIN_SEC, stage)}
+    hedged, error = False, None
+    while True:
+        now = time.monotonic()
+        if now >= deadline: raise TimeoutError(f"{name} 응답 {budget:.0f}초 마감 초과")
+        done, pending = concurrent.futures.wait(pending, timeout=(deadline if hedged else min(deadline, hedge_at)) - now, return_when=concurrent.futures.FIRST_COMPLETED)
+        for f in done:
+            try: return f.result()
+            except Exception as e: error = e
+        if not hedged and (not pending or time.monotonic() >= hedge_at):
+            metrics.inc("overdrive_retries_total", kind="gemini_hedge")
+            pending.add(_ai_pool.submit(_gemini_generate, name, contents, config, deadline - time.monotonic() + AI_REQUEST_TIMEOUT_MARGIN_SEC, stage))
+            hedged = True
+        elif not pending:
+            if _is_ai_timeout(error): raise TimeoutError(f"{name} 응답 불가 ({type(error).__name__}: {error})") from error
+            raise error
+
+def _chart_shape_text(df):
+    """예선용 차트 요약: 5일 등락 / 20일 고점 대비 위치 / 최근 봉 윗꼬리 비율."""
+    if df is None or len(df) < 6: return ""
+    o, h, l, c = (df[k].to_numpy(dtype=float) for k in ['Open', 'High', 'Low', 'Close'])
+    rng = h[-1] - l[-1]
+    wick = (h[-1] - max(o[-1], c[-1])) / rng * 100 if rng > 0 else 0.0
+    return f" | 5일 {(c[-1] / c[-6] - 1) * 100:+.1f}% | 20일 고점 대비 {(c[-1] / np.nanmax(h[-20:]) - 1) * 100:+.1f}% | 최근 봉 윗꼬리 {wick:.0f}%"
+
+def prescreen_candidates(candidates_info, df_dict, vix, is_doomsday, budget=AI_PRESCREEN_TIMEOUT_SEC):
+    """(Flash, 텍스트 전용) 10강의 수치 요약만 보고 Pro 차트 심사에 올릴 본선 후보를 추립니다. 실패/시간초과 시 파워 스코어 순. -> (본선 티커, 선발 방식)"""
+    ranked = [c['Ticker'] for c in candidates_info]
+    k = AI_SHORTLIST_SIZE
+    if len(ranked) <= k: return ranked, "전원 본선 직행"
+    lines = [f"[{i+1}번 후보] {c['Ticker']} | 파워 스코어: {c['Power_Score']:.2f} | RS: {c['RS']:.3f} | 예상 RVOL: {c['Vol_Spike']:.1f}배 | 수급판독: {c.get('VWAP_Status', '')}{_chart_shape_text(df_dict.get(c['Ticker']))}"
+             for i, c in enumerate(candidates_info)]
+    prompt = (f"당신은 월스트리트 퀀트 데스크의 1차 스크리너입니다. VIX 공포지수: {vix:.2f} {'(DOOMSDAY 인버스 모드)' if is_doomsday else ''}\n\n" + "\n".join(lines) +
+              f"\n\n위 수치만 보고 차트 정밀 심사에 올릴 후보 {k}개를 고르십시오. 🚨설거지(VWAP하회), 긴 윗꼬리, 고점 대비 급락 종목부터 빼십시오.\n"
+              f"[출력 형식] 첫 줄에 [SHORTLIST: 티커1, 티커2, ...] 만 적으십시오.")
+    try:
+        record_prompt_footprint(GEMINI_FAST_MODEL_NAME, prompt)
+        text = hedged_generate(GEMINI_FAST_MODEL_NAME, prompt, {"temperature": 0.1}, budget, hedge_after=budget / 2, stage="gemini_prescreen")
+        match = re.search(r'\[SHORTLIST:\s*([^\]]+)\]', text, re.IGNORECASE)
+        picks = [t for t in dict.fromkeys(x.strip().upper() for x in match.group(1).split(',')) if t in ranked][:k] if match else []
+        if picks: return picks + [t for t in ranked if t not in picks][:k - len(picks)], "Flash 예선"
+        reason = "형식 오류"
+    except Exception as e: reason = str(e) or type(e).__name__
+    metrics.inc("overdrive_retries_total", kind="gemini_prescreen_fallback")
+    return ranked[:k], f"파워 스코어 순 (예선 실패: {reason})"
+
+@timed_stage("gemini_judging")
 def ask_gemini_champions_league(candidates_info, df_dict, vix, is_doomsday):
+    """AI 심사 전체를 AI_STAGE_DEADLINE_SEC 안에 끝냅니다: Flash 텍스트 예선 → 본선 차트만 Pro 심사(지연 시 헤지 요청).
+    마감을 넘기면 [REJECTED] 가 아닌 경고를 돌려주어 호출부가 파워 스코어 1위(fallback_target)로 대체하게 합니다."""
     if not GEMINI_API_KEY: 
         return None, "[REJECTED]\n🚨 API 키 누락. (Fail-Closed)"
-        
-    t_print(f"      👁️ [OVERDRIVE Vision] 상위 {len(candidates_info)}개 종목 캔들 차트 렌더링 및 챔피언스 리그 준비 중...")
+    deadline = time.monotonic() + AI_STAGE_DEADLINE_SEC
+
+    shortlist, how = prescreen_candidates(candidates_info, df_dict, vix, is_doomsday, min(AI_PRESCREEN_TIMEOUT_SEC, AI_STAGE_DEADLINE_SEC / 4))
+    t_print(f"      🧪 [PRE-SCREEN] {how} → 본선 {len(shortlist)}종목: {', '.join(shortlist)}")
+    finalists = [c for c in candidates_info if c['Ticker'] in shortlist]
+    t_print(f"      👁️ [OVERDRIVE Vision] 본선 {len(finalists)}개 종목 캔들 차트 렌더링 및 챔피언스 리그 준비 중...")
     
-    mode_text = "🔥 [DOOMSDAY 인버스 데스매치]" if is_doomsday else "[OVERDRIVE: APEX 10대 후보]"
+    mode_text = "🔥 [DOOMSDAY 인버스 데스매치]" if is_doomsday else f"[OVERDRIVE: APEX {len(finalists)}대 후보]"
     contents = [f"당신은 월스트리트 최상위 퀀트 트레이더입니다. VIX 공포지수: {vix:.2f}\n\n{mode_text}\n"]
     
-    images_attached = 0
-    for i, cand in enumerate(candidates_info):
-        t = cand['Ticker']
+    charts = render_charts(df_dict, [c['Ticker'] for c in finalists])
+    for i, cand in enumerate(finalists):
         vwap_stat = cand.get('VWAP_Status', '')
-        contents[0] += f"[{i+1}번 후보] {t} | 파워 스코어: {cand['Power_Score']:.2f} | 예상 RVOL: {cand['Vol_Spike']:.1f}배 | 수급판독: {vwap_stat}\n"
-        
-        buf = io.BytesIO()
-        try:
-            mpf.plot(df_dict[t][-90:], type='candle', volume=True, style='yahoo', title=f"[{i+1}] {t}", savefig=dict(fname=buf, dpi=60))
-            buf.seek(0)
-            contents.append(f"[{i+1}번 후보: {t} 차트]")
-            contents.append(PIL.Image.open(buf))
-            images_attached += 1
-        except Exception: pass
+        contents[0] += f"[{i+1}번 후보] {cand['Ticker']} | 파워 스코어: {cand['Power_Score']:.2f} | 예상 RVOL: {cand['Vol_Spike']:.1f}배 | 수급판독: {vwap_stat}\n"
+    chart_parts, images_attached, payload = build_chart_payload(finalists, charts)
+    contents += chart_parts
             
     contents.append(f"""
     [데스매치 심사 명령]
@@ -219,63 +2403,131 @@ def ask_gemini_champions_league(candidates_info, df_dict, vix, is_doomsday):
     """)
     
     if images_attached == 0: return None, "[REJECTED]\n모든 차트 렌더링 실패."
+    fp = record_prompt_footprint(GEMINI_MODEL_NAME, contents)
+    t_print(f"      📦 [CHART PAYLOAD] {'격자' if payload['layout'] != 'single' else '개별'} {payload['images']}장 {CHART_PAYLOAD_FORMAT} {payload['bytes'] / 1024:.0f}KB · 이미지 약 {payload['tokens']:,}토큰 "
+            f"(원본 PNG {payload['raw_images']}장 {payload['raw_bytes'] / 1024:.0f}KB · {payload['raw_tokens']:,}토큰) | 프롬프트 합계 {fp['bytes'] / 1024:.0f}KB · 약 {fp['text_tokens'] + fp['image_tokens']:,}토큰")
 
-    t_print(f"      🧠 [APEX Engine] 제미나이(Gemini 2.5 Pro) 코어가 {images_attached}개 차트를 스캔하며 {images_attached-1}마리의 목을 치고 있습니다. (약 10~15초 소요)...")
-    
-    for attempt in range(3):
-        try:
-            model = genai.GenerativeModel('gemini-2.5-pro')
-            response = model.generate_content(contents, generation_config={"temperature": 0.2})
-            text = response.text.strip()
-            
-            match = re.search(r'\[SELECTED:\s*([A-Za-z0-9\-]+)\]', text, re.IGNORECASE)
-            if match:
-                winner = match.group(1).upper()
-                return winner, f"[CHAMPIONS LEAGUE WINNER]\n{text}"
-            elif "[REJECTED]" in text.upper():
-                return None, text
-            else:
-                return None, f"[SYSTEM WARNING] AI 형식 오류.\n{text}"
-        except Exception as e: 
-            if attempt < 2: 
-                wait_time = 2 ** attempt
-                t_print(f"      ⏳ [AI 트래픽 잼 감지] 서버 병목. {wait_time}초 대기 후 강제 돌파를 재시도합니다... ({attempt+1}/3)")
-                time.sleep(wait_time)
-            else:
-                return None, f"[REJECTED]\n🚨 AI 10차트 처리 과부하 최종 에러 ({e})"
+    budget = deadline - time.monotonic()
+    t_print(f"      🧠 [APEX Engine] 제미나이(Gemini 2.5 Pro) 코어가 {images_attached}개 차트를 스캔하며 {images_attached-1}마리의 목을 치고 있습니다. (마감 {budget:.0f}초)...")
+    try: text = hedged_generate(GEMINI_MODEL_NAME, contents, {"temperature": 0.2}, budget)
+    except TimeoutError as e:
+        metrics.inc("overdrive_ai_deadline_total")
+        return None, f"[SYSTEM WARNING] AI 심사 마감({AI_STAGE_DEADLINE_SEC:.0f}초) 초과 → 파워 스코어 1위로 대체. ({e})"
+    except Exception as e: return None, f"[REJECTED]\n🚨 AI {images_attached}차트 처리 과부하 최종 에러 ({e})"
+
+    match = re.search(r'\[SELECTED:\s*([A-Za-z0-9\-]+)\]', text, re.IGNORECASE)
+    if match: return match.group(1).upper(), f"[CHAMPIONS LEAGUE WINNER]\n{text}"
+    elif "[REJECTED]" in text.upper(): return None, text
+    else: return None, f"[SYSTEM WARNING] AI 형식 오류.\n{text}"
 
-def ask_gemini_mindset_coach(ticker, target_profit, max_loss, qty, avg_entry, is_second_bullet, is_doomsday):
+@timed_stage("mindset_coach")
+def ask_gemini_mindset_coach(max_loss, is_second_bullet, is_doomsday):
+    """타겟 확정을 기다리지 않고 AI 심사와 동시에 도는 심리 코치. 리스크는 프로필의 손실 한도로 말합니다."""
     if not GEMINI_API_KEY: return "⚠️ [심리 코치 AI 연결 실패] 기계처럼 매매하십시오."
-    prompt = f"당신은 월스트리트 수석 심리 통제관입니다. 오너가 1순위 타겟({ticker}) 진입을 앞두고 있습니다. 기계적 하드스탑 최대 리스크: ${max_loss:,.0f}. 오너가 [05:20 기상/OCO 오차없음/수면 매매] 3가지 룰을 지키도록 뼈 때리게 경고하십시오."
-    try: return genai.GenerativeModel('gemini-2.5-pro').generate_content(prompt, generation_config={"temperature": 0.7}).text.strip()
+    prompt = f"당신은 월스트리트 수석 심리 통제관입니다. 오너가 오늘의 {'세컨드 샷' if is_second_bullet else '1순위'} 타겟{' (DOOMSDAY 인버스)' if is_doomsday else ''} 진입을 앞두고 있습니다. 기계적 하드스탑 최대 리스크 한도: ${max_loss:,.0f}. 오너가 [05:20 기상/OCO 오차없음/수면 매매] 3가지 룰을 지키도록 뼈 때리게 경고하십시오."
+    try: return hedged_generate(GEMINI_MODEL_NAME, prompt, {"temperature": 0.7}, AI_COACH_BUDGET_SEC, hedge_after=AI_COACH_BUDGET_SEC / 2, stage="gemini_coach")
     except: return "⚠️ 룰을 지키십시오."
 
-def get_market_universe():
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        sp500 = pd.read_html(io.StringIO(requests.get('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies', headers=headers, timeout=5).text))[0]['Symbol'].str.replace('.', '-', regex=False).tolist()
-        ndx_tables = pd.read_html(io.StringIO(requests.get('https://en.wikipedia.org/wiki/Nasdaq-100', headers=headers, timeout=5).text))
-        for df in ndx_tables:
-            if 'Ticker' in df.columns: return list(set(sp500 + df['Ticker'].str.replace('.', '-', regex=False).tolist() + CORE_UNIVERSE))
-        return list(set(sp500 + CORE_UNIVERSE))
-    except: return list(set(CORE_UNIVERSE))
-
-def overdrive_apex_execution():
-    global telegram_log
-    telegram_log = "" # 통신 시작 시 버퍼 초기화
+def print_command_sheet(sheet, levels, sizing, profile):
+    """조준표(COMMAND READY ~ MOC 프로토콜)를 현재 출력 버퍼에 찍습니다. 가격 레벨은 모든 프로필 공통, 수량/리스크만 프로필별입니다."""
+    half_qty, max_total_loss = sizing['half_qty'], sizing['max_total_loss']
+    avg_entry, entry_price, atr, vwap = levels['avg_entry'], levels['entry_price'], levels['atr'], levels['vwap']
+    gap_discount, cap_scale, gap_pct_val = levels['gap_discount'], levels['cap_scale'], sheet['gap_pct']
+    entry_1_desc = "**[1차 즉시 매수]** 지금 일반주문으로 ➔ 시장가 긁으십시오."
+
+    t_print(f"\n**[🚀 OVERDRIVE COMMAND READY]**")
+    if sheet['multi_profile']: t_print(f"👤 **[프로필: {profile['name']}]** 총자본 ${profile['total_capital']:,.0f} / 목표 ${profile['target_profit_usd']:,.0f} / 슬롯 ${profile['slot_capital']:,.0f}")
+    if sheet['is_doomsday']: t_print(f"🩸 **[DOOMSDAY INVERSE MODE]** 폭락장 방어 및 숏 스퀴즈 헌팅 모드!")
+    t_print(f"### 🎯 [{sheet['shot_title']}] {sheet['target']}")
+    
+    discount_texts = []
+    if gap_discount < 1.0: discount_texts.append(f"Gap 삭감 {gap_discount:.2f}x")
+    if cap_scale < 1.0: discount_texts.append(f"시총 압축 {cap_scale:.2f}x")
+    discount_str = f" (스케일링: {' / '.join(discount_texts)})" if discount_texts else ""
+    gap_str = f"+{gap_pct_val:.2f}%" if gap_pct_val > 0 else f"{gap_pct_val:.2f}%"
+    
+    t_print(f"🔥 **[펀더멘털 스탯]:** Power Score: **{sheet['power_score']:.2f}** | RS: {sheet['rs']:.4f} | 예상 RVOL: {sheet['vol_spike']:.2f}x")
+    t_print(f"   ➔ 당일 갭: {gap_str}{discount_str}")
+    t_print(f"* **단가 출처:** {sheet['price_src']}")
+    t_print(f"* **예상 평균 진입 단가(평단가):** **${avg_entry:.2f}**")
+    t_print(f"* **ATR(진폭):** ${atr:.2f} / **VWAP:** ${vwap:.2f} / 🛡️ **프리장 최고점(저항선):** ${sheet['pm_high']:.2f}")
+    t_print(f"* 🔮 **당일 예측 천장 (Ceiling):** **${levels['theoretical_ceiling']:.2f}** (천장 캡핑 적용됨)")
+    t_print(f"* 🛡️ **파산 방지 안전핀:** 전량 손절 시 최대 리스크 - **${max_total_loss:,.0f} (자본 {profile['max_risk_usd'] / profile['total_capital'] * 100:g}% 한도)**\n")
+    
+    t_print(f"> 🧠 **[APEX 시각 지능 심사평]:**\n{sheet['insight']}\n")
+
+    t_print("### 🤖 [OVERDRIVE 조준표 100% 카피 UI: 시가 갭하락 방어 셋업]")
+    t_print(f"| 앱 메뉴 | 🔔 조건 (감시가) | 🛒 주문 세팅 (수량 / 지정가·시장가) | 비고 |")
+    t_print(f"| :--- | :--- | :--- | :--- |")
+    t_print(f"| **🔵 일반 구매** | 즉시 실행 | **{half_qty}주** · **${entry_price:.2f} 부근** | {entry_1_desc} |")
+    t_print(f"| **🔵 일반 구매** | **(조건 설정 없음)** | **{half_qty}주** · 지정가 **${levels['entry_2_val']:.2f}** | [2차 매복] ⭐️ 갭하락 대비 '일반주문' 탭에서 지정가로 미리 깔아둠! |")
+        
+    t_print(f"| **🔴 조건 판매** | **${levels['sl1_trigger']:.2f}** 이하일 때 | ➔ **{half_qty}주** · **시장가** | [1차 방패] 50% 분할 손절망 |")
+    t_print(f"| **🔴 조건 판매** | **${levels['sl2_trigger']:.2f}** 이하일 때 | ➔ **{half_qty}주** · **시장가** | [2차 방패] 50% (에러 방지) |")
+    t_print(f"| **🟢 조건 판매** | **${levels['tp1_trigger']:.2f}** 이상일 때 | ➔ **{half_qty}주** · 지정가 **${levels['tp1_limit']:.2f}** | [1차 익절] 체결 보장 |")
+    t_print(f"| **🚀 조건 판매** | **${levels['tp2_trigger']:.2f}** 이상일 때 | ➔ **{half_qty}주** · 지정가 **${levels['tp2_limit']:.2f}** | [2차 런너] 천장 개방 |")
+
+    t_print("\n" + "="*80)
+    t_print(" ⏰ [MOC 심판의 시간: 장 마감 10분 전 수동 액션 프로토콜]")
+    t_print("--------------------------------------------------------------------------------")
+    t_print(f" ▶️ **현재가 확인 절대 기준점 (내 평단가): ${avg_entry:.2f}**")
+    t_print(f" 💀 **[시나리오 A: 손실 중] 현재가 < ${avg_entry:.2f}**")
+    t_print(f"    ➔ 펌핑 실패! 조건주문 싹 다 취소하고, 남은 수량 전량 **'시장가 매도' (타임 컷)**")
+    t_print(f" 🚀 **[시나리오 B: 수익 중] 현재가 >= ${avg_entry:.2f}**")
+    t_print(f"    ➔ 무위험 스윙! 기존 🔴 조건 판매(손절망) 2개 취소 후, 아래 1개로 재세팅.")
+    t_print(f"    ➔ 새로운 🔴 조건 판매: 감시가 **${avg_entry:.2f}** 이하 / 지정가 **${levels['break_even_stop_limit']:.2f}**")
+    t_print("="*80)
+
+def overdrive_apex_execution(resume=None):
+    """resume=run_id 면 그 실행의 마지막 완료 단계부터 이어서 달립니다. 세컨드 샷은 신선한 오늘 스캔이 있으면 자동으로 재사용합니다."""
+    bind_run_output(RunOutput()) # 실행마다 전용 출력 버퍼
+    run_id = hunt_jobs.current_run_id() or new_run_id()
+    run_store.begin(run_id)
+    set_run_phase("bootstrap")
     print_overdrive_timeline()
 
     manual_ticker = MANUAL_TARGET.strip().upper()
-    df_dict = {}  
+    boot = run_bootstrap()
     
     runtime_failed = [t.upper() for t in FAILED_TICKERS if t.strip()]
-    if runtime_failed: save_failed_state(runtime_failed)
-    else: saved_failed_list = load_failed_state()
+    if runtime_failed:
+        save_failed_state(runtime_failed)
+        saved_failed_list = runtime_failed
+    else: saved_failed_list = boot["failed_state"]
         
     total_exclude = list(set(saved_failed_list + [t.upper() for t in EXCLUDE_TICKERS if t.strip()]))
     is_second_bullet = len(saved_failed_list) > 0
+    is_regular_market, is_pre_market, progress_ratio = boot["market_status"]
+
+    # 재개 지점: 명시한 run_id, 아니면 세컨드 샷일 때 오늘의 최신 스캔. (패배 종목만 빼고 같은 스캔을 그대로 씁니다)
+    resumed = checkpoints.resume_point(resume) if resume else (checkpoints.resume_point("latest") if is_second_bullet else None)
+    if resume and resumed is None: t_print(f"⚠️ [RESUME] {resume} 체크포인트가 없거나 {CHECKPOINT_FRESH_SEC // 60}분이 지나 처음부터 다시 스캔합니다.")
+    scan = checkpoints.load(resumed, "scan")
+    if scan is None: resumed = None
+    reused = []
+
+    # 인버스 ETF와 VIX/TNX를 같은 벌크 요청에 실어, DOOMSDAY 판정 전에 한 번의 왕복으로 모두 받습니다.
+    set_run_phase("download")
+    long_tickers = [t for t in boot["universe"] if t not in total_exclude]
+    inverse_tickers = [t for t in INVERSE_UNIVERSE if t not in total_exclude]
+    if scan:
+        prices, vix, tnx = scan["prices"], scan["vix"], scan["tnx"]
+        reused.append("scan")
+        checkpoints.adopt(run_id, resumed, ["scan"])
+        t_print(f"♻️ [RESUME] {resumed['run_id']} 스캔 체크포인트 재사용 ({resumed['age'] / 60:.0f}분 전 데이터) → 다운로드/1차 스캔 생략")
+    else:
+        request_tickers = list(dict.fromkeys(long_tickers + inverse_tickers + ['QQQ'] + MACRO_TICKERS))
+        metrics.set("overdrive_last_run_tickers", len(request_tickers), stage="requested")
+        prices = fetch_bulk_prices(request_tickers, period="3mo")
+        if prices.empty: 
+            t_print("🚨 [SYSTEM ERROR] 야후 파이낸스에서 데이터를 가져오지 못했습니다.")
+            run_store.update(run_id, outcome="no_data", n_requested=len(request_tickers))
+            flush_telegram()
+            return
+
+    opens, highs, lows, closes, volumes = prices.wide()
 
-    vix, tnx = get_macro_environment()
+    if not scan: vix, tnx = read_macro(closes)
     
     is_doomsday = False
     if vix >= VIX_KILL_SWITCH and not manual_ticker:
@@ -290,137 +2542,66 @@ def overdrive_apex_execution():
             
     t_print("=====================================================================\n")
 
-    is_regular_market, is_pre_market, progress_ratio = get_market_status()
+    run_store.update(run_id, engine="doomsday" if is_doomsday else "long", vix=vix, tnx=tnx, second_bullet=is_second_bullet, excluded=total_exclude,
+                     is_pre_market=is_pre_market, progress_ratio=progress_ratio)
 
     if is_doomsday:
         t_print(f"🔍 [DOOMSDAY 헌팅 모드] 인버스(숏) ETF 대상 '파워 스코어' 스캔 중...\n")
-        tickers = [t for t in INVERSE_UNIVERSE if t not in total_exclude] + ['QQQ']
+        tickers = inverse_tickers + ['QQQ']
     else:
         t_print(f"🔍 [오토 헌팅 모드] 미국장 전체 대상 1차 예선 스캔 중...\n")
-        tickers = [t for t in get_market_universe() if t not in total_exclude] + ['QQQ']
-
-    data = yf.download(tickers, period="3mo", threads=True, progress=False, prepost=True)
-    if data.empty: 
-        t_print("🚨 [SYSTEM ERROR] 야후 파이낸스에서 데이터를 가져오지 못했습니다.")
-        flush_telegram()
-        return
-
-    if isinstance(data.columns, pd.MultiIndex):
-        closes, volumes, opens = (data[col] if col in data.columns.levels[0] else data.xs(col, level=1, axis=1) for col in ['Close', 'Volume', 'Open'])
-        highs, lows = (data[col] if col in data.columns.levels[0] else data.xs(col, level=1, axis=1) for col in ['High', 'Low'])
-    else: 
-        t_name = tickers[0] if tickers else "UNKNOWN"
-        closes, volumes, opens, highs, lows = (pd.DataFrame({t_name: data[col]}) if col in data.columns else pd.DataFrame() for col in ['Close', 'Volume', 'Open', 'High', 'Low'])
+        tickers = long_tickers + ['QQQ']
     
-    try:
-        qqq_c = closes['QQQ'].dropna()
-        qqq_10d, qqq_20d = float((qqq_c.iloc[-1] - qqq_c.iloc[-10]) / qqq_c.iloc[-10]), float((qqq_c.iloc[-1] - qqq_c.iloc[-20]) / qqq_c.iloc[-20])
-    except: qqq_10d, qqq_20d = 0.0, 0.0
-
-    stats_list = []
-    t1_vol_req, t1_rs_req = (1.2, -0.05) if is_doomsday else ((2.0, 0.05) if vix >= 20.0 else (1.5, 0.0))
-
-    for cand in tickers:
-        if cand == 'QQQ' or cand not in closes.columns or cand not in opens.columns: continue
-        cand_df = pd.DataFrame({'Open': opens[cand], 'High': highs[cand], 'Low': lows[cand], 'Close': closes[cand], 'Volume': volumes[cand]}).dropna()
-        if len(cand_df) < 25: continue
-        
-        cand_df = cand_df[~cand_df.index.duplicated(keep='last')].astype(float)
-        cand_df.index = pd.to_datetime(cand_df.index)
-        
+    set_run_phase("scoring")
+    if scan: stats = scan["stats"][scan["stats"].index.isin(tickers)]  # 종목별 독립 점수라 배제 종목만 빼면 새로 채점한 것과 같음
+    else:
         try:
-            comp_rs = (float(((cand_df['Close'].iloc[-1] - cand_df['Close'].iloc[-10]) / cand_df['Close'].iloc[-10]) - qqq_10d) * 0.6) + (float(((cand_df['Close'].iloc[-1] - cand_df['Close'].iloc[-20]) / cand_df['Close'].iloc[-20]) - qqq_20d) * 0.4)
-            avg_v, curr_v = float(cand_df['Volume'].iloc[-11:-1].mean()), float(cand_df['Volume'].iloc[-1])
-            
-            v_spike = 0.0 if (is_pre_market and curr_v < 50000) else (curr_v / progress_ratio) / avg_v if avg_v > 0 else 0.0
-            power_score = (comp_rs + 1.0) * v_spike
-            
-            sma20 = float(cand_df['Close'].rolling(20).mean().iloc[-1])
-            today_open = float(cand_df['Open'].iloc[-1]) if cand_df.index[-1].date() == cand_df.index[-1].date() else float(cand_df['Close'].iloc[-1])
-            prev_close = float(cand_df['Close'].iloc[-2])
-            t_gap = float((today_open - prev_close) / prev_close) * 100 if prev_close > 0 else 0.0
-            
-            df_dict[cand] = cand_df
-            stats_list.append({'Ticker': cand, 'Price': cand_df['Close'].iloc[-1], 'Prev_Close': prev_close, 'RS': comp_rs, 'Vol_Spike': v_spike, 'SMA20': sma20, 'True_Gap': t_gap, 'Basic_Power_Score': power_score})
-        except: continue
-        
-    stats = pd.DataFrame(stats_list)
-    if not stats.empty: stats = stats.set_index('Ticker')
-
-    valid_stocks = pd.DataFrame()
-    for f in [{"desc": "1단계", "spike": t1_vol_req, "rs": t1_rs_req, "gap": MAX_GAP_UP*100, "trend": not is_doomsday}, {"desc": "2단계", "spike": 0.8, "rs": -0.05, "gap": 20.0, "trend": False}]:
-        if stats.empty: break
-        passed = stats[(stats['Price'] >= 5.0) & (stats['Price'] <= 1500.0) & (stats['Vol_Spike'] >= f['spike']) & (stats['RS'] >= f['rs']) & (stats['True_Gap'] < f['gap']) & ((stats['Price'] > stats['SMA20']) if f['trend'] else True)]
-        if not passed.empty: valid_stocks = pd.concat([valid_stocks, passed.drop('QQQ', errors='ignore')]).drop_duplicates()
-        if len(valid_stocks) >= (15 if not is_doomsday else 5): break
+            qqq_st = indicator_store.get('QQQ')
+            if qqq_st is not None and len(qqq_st.closes) == 20:
+                q1, q10, q20 = qqq_st.close_back(1), qqq_st.close_back(10), qqq_st.close_back(20)
+            else:
+                qqq_c = closes['QQQ'].dropna()
+                q1, q10, q20 = qqq_c.iloc[-1], qqq_c.iloc[-10], qqq_c.iloc[-20]
+            qqq_10d, qqq_20d = float((q1 - q10) / q10), float((q1 - q20) / q20)
+        except: qqq_10d, qqq_20d = 0.0, 0.0
+        stats = score_universe(opens, highs, lows, closes, volumes, tickers, qqq_10d, qqq_20d, is_pre_market, progress_ratio, states=indicator_store)
+        checkpoints.save(run_id, "scan", {"prices": prices, "vix": vix, "tnx": tnx, "stats": stats})
+    metrics.set("overdrive_last_run_tickers", closes.shape[1], stage="downloaded")
+    metrics.set("overdrive_last_run_tickers", len(stats), stage="scored")
 
+    valid_stocks = apply_two_stage_filter(stats, vix, is_doomsday)
+    run_store.update(run_id, n_requested=len(tickers), n_downloaded=closes.shape[1], n_scored=len(stats), n_valid=len(valid_stocks))
     if valid_stocks.empty: 
         t_print("\n🚨 [SYSTEM SHUTDOWN] 오늘 수급 요건을 충족하는 타겟이 없습니다.")
+        run_store.update(run_id, outcome="no_candidates")
         flush_telegram()
         return
 
     pre_candidates = valid_stocks.sort_values(by='Basic_Power_Score', ascending=False).head(20)
+    df_dict = {t: prices.frame(t) for t in pre_candidates.index}
+    metrics.set("overdrive_last_run_tickers", len(pre_candidates), stage="pre_candidates")
     
+    set_run_phase("deep_scan")
     t_print("\n   🔍 [Phase 2.5] 상위 20개 종목 1분봉 엑스레이 및 3중 페널티(VWAP/Cap/Gap) 스캔 중...")
     
-    def deep_scan(ticker, base_score, prev_close, curr_price):
-        try:
-            info = yf.Ticker(ticker).info or {}
-            hist_1m = yf.Ticker(ticker).history(period="3d", interval="1m", prepost=True)
-            
-            mcap = info.get('marketCap', 0.0)
-            gap_pct = ((curr_price - prev_close) / prev_close) * 100 if prev_close > 0 else 0.0
-            pm_vwap, pm_high = 0.0, curr_price
-            
-            if not hist_1m.empty and 'Volume' in hist_1m.columns:
-                dates = hist_1m.index.normalize().unique()
-                if len(dates) > 0:
-                    target_date = dates[-1]
-                    today_data = hist_1m[hist_1m.index.normalize() == target_date]
-                    if (today_data.empty or today_data['Volume'].sum() <= 0) and len(dates) > 1:
-                        target_date = dates[-2]
-                        today_data = hist_1m[hist_1m.index.normalize() == target_date]
-                        
-                    if not today_data.empty and today_data['Volume'].sum() > 0:
-                        pm_vwap = (((today_data['High']+today_data['Low']+today_data['Close'])/3)*today_data['Volume']).sum() / today_data['Volume'].sum()
-                        pm_high = float(today_data['High'].max())
-            
-            penalty = 1.0
-            if mcap > 100_000_000_000: penalty *= 0.4
-            elif mcap > 50_000_000_000: penalty *= 0.7
-            if gap_pct > 3.0: penalty *= max(0.2, 3.0 / gap_pct)
-            
-            vwap_status = "알수없음"
-            if pm_vwap > 0:
-                if curr_price < pm_vwap: 
-                    penalty *= 0.2
-                    vwap_status = "🚨설거지(VWAP하회)"
-                else: 
-                    penalty *= 1.2
-                    vwap_status = "✅찐수급(VWAP상회)"
-                    
-            final_score = base_score * penalty
-            return {'Ticker': ticker, 'Power_Score': final_score, 'Market_Cap': mcap, 'Gap_Pct': gap_pct, 'PM_VWAP': pm_vwap, 'PM_High': pm_high, 'VWAP_Status': vwap_status}
-        except:
-            return {'Ticker': ticker, 'Power_Score': base_score, 'Market_Cap': 0.0, 'Gap_Pct': 0.0, 'PM_VWAP': curr_price, 'PM_High': curr_price, 'VWAP_Status': '에러'}
-
-    deep_results = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        futs = []
-        for cand in pre_candidates.index:
-            base_s = float(pre_candidates.loc[cand, 'Basic_Power_Score'])
-            pc = float(pre_candidates.loc[cand, 'Prev_Close'])
-            cp = float(pre_candidates.loc[cand, 'Price'])
-            futs.append(executor.submit(deep_scan, cand, base_s, pc, cp))
-        for f in concurrent.futures.as_completed(futs):
-            deep_results.append(f.result())
-            
-    deep_df = pd.DataFrame(deep_results).set_index('Ticker')
+    # 딥스캔(네트워크 대기) 동안 결승 유력 후보 차트를 프로세스 풀에 미리 걸어두고 기다리지 않습니다. 본선 렌더가 그리는 중인 차트를 이어받고, 빠진 차트만 추가로 그립니다.
+    deep = checkpoints.load(resumed, "deep_scan")
+    known = deep["deep_df"][deep["deep_df"].index.isin(pre_candidates.index)] if deep else None
+    todo = pre_candidates.drop(known.index) if known is not None else pre_candidates
+    speculative = prefetch_charts(df_dict, pre_candidates.index[:SPECULATIVE_CHART_COUNT])
+    if known is not None:
+        t_print(f"      ♻️ [RESUME] 딥스캔 {len(known)}종목 재사용 / 신규 {len(todo)}종목만 엑스레이")
+        reused.append("deep_scan")
+    deep_df = pd.concat([known, deep_scan_batch(todo)]) if known is not None and len(todo) else (known if known is not None else deep_scan_batch(todo))
+    checkpoints.save(run_id, "deep_scan", {"deep_df": deep_df})
     final_candidates = pre_candidates.join(deep_df[['Power_Score', 'Market_Cap', 'Gap_Pct', 'PM_VWAP', 'PM_High', 'VWAP_Status']])
     top_candidates = final_candidates.sort_values(by='Power_Score', ascending=False).head(10)
+    for t, f in speculative.items():
+        if t not in top_candidates.index: f.cancel()  # 10강에서 떨어진 후보는 아직 안 그렸으면 취소
     
     fallback_target = top_candidates.index[0]
     fallback_rs = float(top_candidates.iloc[0]['RS'])
+    run_store.add_candidates(run_id, final_candidates.sort_values(by='Power_Score', ascending=False).assign(Top10=lambda d: d.index.isin(top_candidates.index)))
 
     t_print(f"\n👑 [{'DOOMSDAY 엔진' if is_doomsday else 'OVERDRIVE APEX'} 가동] 정예 10강 챔피언스 리그 비주얼 검증 (페널티 반영됨)")
     candidates_info = []
@@ -430,10 +2611,28 @@ def overdrive_apex_execution():
         t_print(f"▶️ [후보: {cand:<5}] 파워 스코어: {c_power:>5.2f} (RVOL: {c_spike:>4.1f}배 | 수급판독: {vwap_stat})")
         candidates_info.append({'Ticker': cand, 'RS': c_rs, 'Vol_Spike': c_spike, 'Power_Score': c_power, 'VWAP_Status': vwap_stat})
         
-    winner_ticker, insight = ask_gemini_champions_league(candidates_info, df_dict, vix, is_doomsday)
+    stream_telegram() # 후보 보드는 제미나이 심사를 기다리지 않고 먼저 발사
+    set_run_phase("ai_judging")
+    profiles = load_profiles()
+    coach_profile = next((p for p in profiles if p["chat_id"] == current_output().chat_id), profiles[0])  # 코치 브리핑이 찍히는 채팅방 프로필의 한도로
+    coach_future = submit_with_output(_ai_task_pool, ask_gemini_mindset_coach, coach_profile["max_risk_usd"], is_second_bullet, is_doomsday)  # 심사와 동시에
+    ai = checkpoints.load(resumed, "ai")
+    if ai and ai["finalists"] == list(top_candidates.index):  # 10강이 그대로일 때만 판정 재사용
+        winner_ticker, insight = ai["winner"], ai["insight"]
+        reused.append("ai")
+        checkpoints.adopt(run_id, resumed, ["ai"])
+        t_print(f"      ♻️ [RESUME] 같은 10강에 대한 AI 판정 재사용 → {winner_ticker}")
+    else:
+        winner_ticker, insight = ask_gemini_champions_league(candidates_info, df_dict, vix, is_doomsday)
+        if winner_ticker in top_candidates.index: checkpoints.save(run_id, "ai", {"finalists": list(top_candidates.index), "winner": winner_ticker, "insight": insight})
+    if resumed:
+        for stage in reused: metrics.inc("overdrive_checkpoint_reuse_total", stage=stage)
+        run_store.update(run_id, resumed_from=resumed["run_id"], resumed_stages=reused)
     
+    run_store.update(run_id, ai_winner=winner_ticker, ai_verdict=insight)
     if STRICT_FAIL_CLOSED and "[REJECTED]" in insight:
         t_print(f"\n🚨 [SYSTEM HALT] AI가 모든 후보를 거부했거나 에러가 발생했습니다:\n{insight}")
+        run_store.update(run_id, outcome="ai_rejected")
         flush_telegram()
         return
         
@@ -461,8 +2660,11 @@ def overdrive_apex_execution():
 
     t_print("="*75)
 
+    set_run_phase("sizing")
     cand_df_final = df_dict[final_target]
-    atr = calculate_true_atr(cand_df_final['High'], cand_df_final['Low'], cand_df_final['Close'], period=14)
+    final_state = indicator_store.get(final_target)
+    if final_state is not None and final_state.last_ts == cand_df_final.index[-1]: atr = final_state.atr14
+    else: atr = calculate_true_atr(cand_df_final['High'], cand_df_final['Low'], cand_df_final['Close'], period=14)
 
     try:
         intraday_1m = yf.Ticker(final_target).history(period="1d", interval="1m", prepost=True)
@@ -476,106 +2678,45 @@ def overdrive_apex_execution():
     if yf_live_price and yf_live_price != yesterday_close: entry_price, price_src = yf_live_price, "yfinance 실시간"
     else: entry_price, price_src = yesterday_close, "전일 종가 (API 지연)"
         
-    cap_scale = 1.0
-    if market_cap_val > 100_000_000_000: cap_scale = 0.5    
-    elif market_cap_val > 20_000_000_000: cap_scale = 0.7   
+    levels = build_order_levels(entry_price, vwap, atr, yesterday_close, pm_high_val, gap_pct_val, market_cap_val, is_pre_market, is_doomsday)
+    sized = size_profiles(levels, profiles)
+    sizing = sized[0]
+    run_store.update(run_id, outcome="ordered", target=final_target, target_source="ai" if final_target == winner_ticker else "fallback", power_score=final_power_score,
+                     price_src=price_src, yesterday_close=yesterday_close, pm_high=pm_high_val, gap_pct=gap_pct_val, market_cap=market_cap_val, **levels, **sizing,
+                     profiles=[{"name": p["name"], "qty": z["qty"], "max_total_loss": round(z["max_total_loss"], 2)} for p, z in zip(profiles, sized)])
 
-    if vwap == 0.0: vwap = entry_price
-    
-    entry_2_val = (entry_price - (atr * 0.5 * cap_scale)) if is_pre_market else (entry_price - (atr * 0.3 * cap_scale) if abs(vwap - entry_price) / entry_price < 0.002 else vwap)
-    avg_entry = (entry_price + entry_2_val) / 2.0
-    
-    risk_multiplier = 1.2 if is_doomsday else 1.0
-
-    sl_distance = max(atr * risk_multiplier * cap_scale, avg_entry * 0.01)
-    base_hard_stop = avg_entry - sl_distance
-
-    gap_discount = 1.0
-    if gap_pct_val > 0:
-        gap_discount = max(0.5, 1.0 - (gap_pct_val / 10.0))
-
-    reward_unit = max(atr * 0.8 * cap_scale * gap_discount, avg_entry * 0.008)
-    raw_tp1 = avg_entry + reward_unit
-    
-    theoretical_ceiling = yesterday_close + (atr * 1.5)  
-    tp1_trigger = min(raw_tp1, theoretical_ceiling * 0.998) 
-    
-    if pm_high_val > avg_entry and tp1_trigger > pm_high_val:
-        tp1_trigger = max(pm_high_val * 0.998, avg_entry * 1.005) 
-
-    tp2_raw = avg_entry + (reward_unit * 3.0)
-    tp2_trigger = min(tp2_raw, theoretical_ceiling * 1.01) 
-    if tp2_trigger <= tp1_trigger: tp2_trigger = tp1_trigger + (avg_entry * 0.005)
-
-    def get_offset(price): return max(0.10, price * 0.002)
-
-    tp1_limit = tp1_trigger - get_offset(tp1_trigger)
-    tp2_limit = tp2_trigger - get_offset(tp2_trigger)
-    sl1_trigger, sl2_trigger = base_hard_stop, base_hard_stop - 0.10
-    
-    buy2_target_price = entry_2_val
-
-    profit_per_share, risk_per_share = tp1_trigger - avg_entry, avg_entry - base_hard_stop
-    ideal_total_qty = max(1, int(TARGET_PROFIT_USD // profit_per_share) + 1) * 2
-    qty = min(ideal_total_qty, max(2, int(MAX_RISK_USD // risk_per_share)) if risk_per_share > 0 else ideal_total_qty, max(2, int(SLOT_CAPITAL // avg_entry)))
-    if qty % 2 != 0: qty -= 1 
-    if qty < 2: qty = 2
-    half_qty, expected_profit_at_t1, max_total_loss = qty // 2, profit_per_share * (qty // 2), risk_per_share * qty
+    sheet = {"target": final_target, "shot_title": "세컨드 샷 (2순위)" if is_second_bullet else "오늘의 1순위 폭파 타겟", "is_doomsday": is_doomsday,
+             "power_score": final_power_score, "rs": final_rs, "vol_spike": final_vol_spike, "gap_pct": gap_pct_val, "price_src": price_src,
+             "pm_high": pm_high_val, "insight": final_insight, "multi_profile": len(profiles) > 1}
+    main_output = current_output()
+    for profile, prof_sizing in zip(profiles, sized):
+        if profile["chat_id"] == main_output.chat_id:
+            print_command_sheet(sheet, levels, prof_sizing, profile)
+            continue
+        # 다른 계좌의 조준표는 그 프로필 전용 채팅방으로 따로 발사
+        out = bind_run_output(RunOutput(profile["chat_id"]))
+        try: print_command_sheet(sheet, levels, prof_sizing, profile)
+        finally: bind_run_output(main_output)
+        out.stream()
 
-    entry_1_desc = "**[1차 즉시 매수]** 지금 일반주문으로 ➔ 시장가 긁으십시오."
-    shot_title = "세컨드 샷 (2순위)" if is_second_bullet else "오늘의 1순위 폭파 타겟"
-
-    t_print(f"\n**[🚀 OVERDRIVE COMMAND READY]**")
-    if is_doomsday: t_print(f"🩸 **[DOOMSDAY INVERSE MODE]** 폭락장 방어 및 숏 스퀴즈 헌팅 모드!")
-    t_print(f"### 🎯 [{shot_title}] {final_target}")
-    
-    discount_texts = []
-    if gap_discount < 1.0: discount_texts.append(f"Gap 삭감 {gap_discount:.2f}x")
-    if cap_scale < 1.0: discount_texts.append(f"시총 압축 {cap_scale:.2f}x")
-    discount_str = f" (스케일링: {' / '.join(discount_texts)})" if discount_texts else ""
-    gap_str = f"+{gap_pct_val:.2f}%" if gap_pct_val > 0 else f"{gap_pct_val:.2f}%"
-    
-    t_print(f"🔥 **[펀더멘털 스탯]:** Power Score: **{final_power_score:.2f}** | RS: {final_rs:.4f} | 예상 RVOL: {final_vol_spike:.2f}x")
-    t_print(f"   ➔ 당일 갭: {gap_str}{discount_str}")
-    t_print(f"* **단가 출처:** {price_src}")
-    t_print(f"* **예상 평균 진입 단가(평단가):** **${avg_entry:.2f}**")
-    t_print(f"* **ATR(진폭):** ${atr:.2f} / **VWAP:** ${vwap:.2f} / 🛡️ **프리장 최고점(저항선):** ${pm_high_val:.2f}")
-    t_print(f"* 🔮 **당일 예측 천장 (Ceiling):** **${theoretical_ceiling:.2f}** (천장 캡핑 적용됨)")
-    t_print(f"* 🛡️ **파산 방지 안전핀:** 전량 손절 시 최대 리스크 - **${max_total_loss:,.0f} (자본 1.5% 한도)**\n")
-    
-    t_print(f"> 🧠 **[APEX 시각 지능 심사평]:**\n{final_insight}\n")
-
-    t_print("### 🤖 [OVERDRIVE 조준표 100% 카피 UI: 시가 갭하락 방어 셋업]")
-    t_print(f"| 앱 메뉴 | 🔔 조건 (감시가) | 🛒 주문 세팅 (수량 / 지정가·시장가) | 비고 |")
-    t_print(f"| :--- | :--- | :--- | :--- |")
-    t_print(f"| **🔵 일반 구매** | 즉시 실행 | **{half_qty}주** · **${entry_price:.2f} 부근** | {entry_1_desc} |")
-    t_print(f"| **🔵 일반 구매** | **(조건 설정 없음)** | **{half_qty}주** · 지정가 **${buy2_target_price:.2f}** | [2차 매복] ⭐️ 갭하락 대비 '일반주문' 탭에서 지정가로 미리 깔아둠! |")
-        
-    t_print(f"| **🔴 조건 판매** | **${sl1_trigger:.2f}** 이하일 때 | ➔ **{half_qty}주** · **시장가** | [1차 방패] 50% 분할 손절망 |")
-    t_print(f"| **🔴 조건 판매** | **${sl2_trigger:.2f}** 이하일 때 | ➔ **{half_qty}주** · **시장가** | [2차 방패] 50% (에러 방지) |")
-    t_print(f"| **🟢 조건 판매** | **${tp1_trigger:.2f}** 이상일 때 | ➔ **{half_qty}주** · 지정가 **${tp1_limit:.2f}** | [1차 익절] 체결 보장 |")
-    t_print(f"| **🚀 조건 판매** | **${tp2_trigger:.2f}** 이상일 때 | ➔ **{half_qty}주** · 지정가 **${tp2_limit:.2f}** | [2차 런너] 천장 개방 |")
-
-    break_even_stop_limit = avg_entry - get_offset(avg_entry)
-    t_print("\n" + "="*80)
-    t_print(" ⏰ [MOC 심판의 시간: 장 마감 10분 전 수동 액션 프로토콜]")
-    t_print("--------------------------------------------------------------------------------")
-    t_print(f" ▶️ **현재가 확인 절대 기준점 (내 평단가): ${avg_entry:.2f}**")
-    t_print(f" 💀 **[시나리오 A: 손실 중] 현재가 < ${avg_entry:.2f}**")
-    t_print(f"    ➔ 펌핑 실패! 조건주문 싹 다 취소하고, 남은 수량 전량 **'시장가 매도' (타임 컷)**")
-    t_print(f" 🚀 **[시나리오 B: 수익 중] 현재가 >= ${avg_entry:.2f}**")
-    t_print(f"    ➔ 무위험 스윙! 기존 🔴 조건 판매(손절망) 2개 취소 후, 아래 1개로 재세팅.")
-    t_print(f"    ➔ 새로운 🔴 조건 판매: 감시가 **${avg_entry:.2f}** 이하 / 지정가 **${break_even_stop_limit:.2f}**")
-    t_print("="*80)
+    sizings = {}
+    for p, z in zip(profiles, sized): sizings.setdefault(p["chat_id"], z)  # 같은 채팅방을 쓰는 프로필은 앞선 프로필 수량으로
+    trade_watcher.arm(final_target, levels, sizings, run_id)
+    if WATCH_ENABLED: t_print(f"\n👁️ [TRADE WATCH] {final_target} 주문 레벨 감시 등록 → 본장 동안 {WATCH_POLL_SEC}초 간격 1분봉 증분 감시, 트리거/MOC({MOC_DECISION_ET} ET) 도달 시 즉시 알림")
 
+    set_run_phase("mindset_coach")
     t_print("\n---------------------------------------------------------------------")
     t_print("   🧠 [CHIEF MINDSET OFFICER: 수면 매매 가이드]")
     t_print("---------------------------------------------------------------------")
-    t_print("\n### **[" + final_target + "] 진입 전 최종 브리핑**\n---\n" + ask_gemini_mindset_coach(final_target, expected_profit_at_t1, max_total_loss, qty, avg_entry, is_second_bullet, is_doomsday))
+    try: coach_text = coach_future.result(timeout=AI_COACH_WAIT_SEC)
+    except Exception: coach_text = "⚠️ 룰을 지키십시오."
+    coach_scope = f" (리스크 한도: {coach_profile['name']} 프로필 ${coach_profile['max_risk_usd']:,.0f} 기준)" if len(profiles) > 1 else ""
+    t_print("\n### **[" + final_target + "] 진입 전 최종 브리핑**" + coach_scope + "\n---\n" + coach_text)
     
     t_print("\n========================= [OVERDRIVE CODE FREEZE] =========================")
     
     # 🚨 [가장 중요] 쌓인 터미널 로그를 텔레그램으로 한방에 전송
+    set_run_phase("telegram_flush")
     flush_telegram()
 
 # ==========================================
@@ -583,20 +2724,80 @@ def overdrive_apex_execution():
 # ==========================================
 @app.route('/hunt', methods=['GET'])
 def trigger_hunt_manual():
-    """스마트폰 브라우저 접속 시 자율 스캔 스레드 기동"""
-    threading.Thread(target=overdrive_apex_execution).start()
-    return "🦅 OVERDRIVE AUTONOMOUS HUNTER INITIATED. CHECK TELEGRAM IN 1-2 MIN.", 200
+    """스마트폰 브라우저 접속 시 자율 스캔 기동 (진행 중이면 기존 실행에 합류, ?resume=<run_id|latest> 면 체크포인트에서 이어서)"""
+    resume = request.args.get("resume")
+    if resume:
+        point = checkpoints.resume_point(resume)
+        if point is None: return f"⚠️ RESUME UNAVAILABLE. NO FRESH CHECKPOINT FOR {resume} (WINDOW {CHECKPOINT_FRESH_SEC // 60} MIN). USE /hunt FOR A FULL RUN.", 404
+        job, started = hunt_jobs.submit("resume", resume=point["run_id"])
+        if not started: return f"⏳ OVERDRIVE HUNT ALREADY IN FLIGHT. RUN {job['run_id']} (PHASE: {job['phase']}).", 200
+        return f"♻️ OVERDRIVE RESUME INITIATED. RUN {job['run_id']} FROM {point['run_id']} ({', '.join(point['stages'])}).", 200
+    job, started = hunt_jobs.submit("hunt")
+    if not started: return f"⏳ OVERDRIVE HUNT ALREADY IN FLIGHT. RUN {job['run_id']} (PHASE: {job['phase']}).", 200
+    return f"🦅 OVERDRIVE AUTONOMOUS HUNTER INITIATED. RUN {job['run_id']}. CHECK TELEGRAM IN 1-2 MIN.", 200
 
 @app.route('/webhook', methods=['POST'])
 def trigger_hunt_auto():
-    """트레이딩뷰가 특정 시간에 때리면 자동 사냥 시작"""
-    threading.Thread(target=overdrive_apex_execution).start()
-    return jsonify({"status": "success", "message": "Autohunt Initiated"}), 200
+    """트레이딩뷰가 특정 시간에 때리면 자동 사냥 시작 (재전송된 웹훅은 진행 중인 실행에 합류)"""
+    job, started = hunt_jobs.submit("webhook")
+    return jsonify({"status": "success", "message": "Autohunt Initiated" if started else "Autohunt Already Running",
+                    "run_id": job["run_id"], "coalesced": not started}), 200
+
+@app.route('/status/<run_id>', methods=['GET'])
+def hunt_status(run_id):
+    """run_id(또는 latest)의 현재 단계 조회"""
+    job = hunt_jobs.get(run_id)
+    if job is None: return jsonify({"status": "error", "message": f"unknown run_id: {run_id}"}), 404
+    return jsonify(job), 200
+
+@app.route('/universe', methods=['GET'])
+def universe_health():
+    """구성종목 스냅샷의 신선도(fresh/stale/missing) 확인"""
+    return jsonify(universe_status()), 200
+
+@app.route('/prewarm', methods=['GET'])
+def prewarm_status():
+    """사전 예열 예약/직전 결과 조회 (?now=1 이면 즉시 한 번 예열)"""
+    if request.args.get("now") == "1": prewarm_scheduler.trigger()
+    return jsonify(prewarm_scheduler.status()), 200
+
+@app.route('/watch', methods=['GET'])
+def trade_watch_status():
+    """주문 레벨 감시 현황 (?stop=TICKER 이면 해당 감시 해제)"""
+    if request.args.get("stop"): trade_watcher.disarm(request.args["stop"].upper())
+    return jsonify(trade_watcher.status()), 200
+
+@app.route('/warmup', methods=['GET'])
+def warmup():
+    """부팅/임포트 소요 시간 내역 (?now=1 이면 무거운 의존성을 백그라운드로 미리 로드)"""
+    if request.args.get("now") == "1": threading.Thread(target=warm_imports, daemon=True, name="warm-imports").start()
+    return jsonify(import_report()), 200
+
+@app.route('/sweep', methods=['GET'])
+def threshold_sweep_report():
+    """저장된 실행(?run=<run_id|latest>)으로 필터/페널티 임계값 격자를 평가 (?t1_spike=1.2,1.5,2.0 처럼 축별 값 목록 지정 가능)"""
+    run_id, grid = request.args.get("run", "latest"), {}
+    for k in filter_params(0.0, False):
+        if not request.args.get(k): continue
+        try: grid[k] = [float(v) for v in request.args[k].split(",") if v.strip()]
+        except ValueError: return jsonify({"status": "error", "message": f"bad values for {k}"}), 400
+    report = sweep_checkpoint(run_id, grid)
+    if report is None: return jsonify({"status": "error", "message": f"no checkpoint for run: {run_id}"}), 404
+    return jsonify(report), 200
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus 스크레이프용 단계별 히스토그램/카운터"""
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
 
 @app.route('/', methods=['GET'])
 def index():
     return "👑 OVERDRIVE NEXUS IS ONLINE.", 200
 
+BOOT_SECONDS = round(time.perf_counter() - _BOOT_T0, 3)
+if os.environ.get("OVERDRIVE_WARM_IMPORTS", "0") == "1": threading.Thread(target=warm_imports, daemon=True, name="warm-imports").start()  # 헬스 체크는 먼저 받고 뒤에서 로드
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 10000))
+    start_background_services()
     app.run(host='0.0.0.0', port=port)
@@ -0,0 +1,448 @@
+"""
+OVERDRIVE 히스토리컬 백테스트
+
+가격 캐시(OVERDRIVE_DATA/price_cache)의 일봉과 딥스캔이 누적해 둔 1분봉(OVERDRIVE_DATA/minute_cache)으로
+과거 세션을 하루씩 재생합니다. 세션마다 app 의 실전 함수를 그대로 호출합니다.
+    score_universe → apply_two_stage_filter → deep_scan_penalty → (제미나이 대신 파워 스코어 1위) → build_order_levels / size_position
+그 뒤 조준표(1차 즉시 매수, 2차 매복 entry_2_val, 손절 sl1/sl2, 익절 tp1/tp2)와 MOC 타임컷의 체결을 시뮬레이션합니다.
+세션은 프로세스 풀로 나눠 돌리므로 수년치 재생도 수 분 안에 끝납니다.
+
+    # 일봉 이력 보강 (유니버스 전체를 3년치로 채움) / 최근 1분봉 수집 (야후 한도: 최근 30일)
+    python backtest/overdrive_backtest.py backfill --period 3y
+    python backtest/overdrive_backtest.py collect-minutes --days 7
+
+    # 재생
+    python backtest/overdrive_backtest.py run --start 2024-01-01 --end 2026-09-30 --workers 8 --out bt.csv
+
+    # 임계값 스윕 (직전 사냥의 체크포인트로 필터/페널티 격자 수천 조합을 한 번에 평가, 네트워크 없음)
+    python backtest/overdrive_backtest.py sweep --run latest --grid t1_spike=1.2,1.5,2.0 vwap_below=0.1,0.2
+
+app 과 같은 작업 디렉터리에서 실행해야 같은 OVERDRIVE_DATA 를 읽습니다.
+
+근사와 한계:
+  * 스캔 시각(기본 한국시간 23:05)의 당일 일봉은 1분봉이 없으면 '시가 + 진행률만큼의 당일 거래량'으로 근사합니다.
+    (장전 스캔이면 실전처럼 당일 봉 없이 전일까지만 씁니다.) 체결도 1분봉이 없으면 당일 일봉으로 보수적으로(손절 먼저) 판정합니다.
+  * 시총은 현재 시총 캐시 값을, 유니버스는 현재 캐시에 있는 종목을 씁니다. (생존 편향 있음)
+  * MOC 시나리오 B(본전 위 스윙)는 다음 세션 일봉 1개로 본전 스탑/익절/종가 청산을 판정합니다.
+"""
+import argparse
+import collections
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime, time as dtime
+
+import numpy as np
+import pandas as pd
+import pytz
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ET, KST = pytz.timezone('US/Eastern'), pytz.timezone('Asia/Seoul')
+WINDOW_BARS = 63                # period="3mo" 스캔 창과 같은 거래일 수
+MIN_HISTORY_BARS = 26           # score_universe 가 요구하는 최소 유효 봉(25) + 당일
+MOC_DECISION = dtime(15, 50)    # 장 마감 10분 전 MOC 심판
+MINUTE_MEMO_SIZE = 64           # 워커별로 메모리에 들고 있는 1분봉 프레임 수
+
+app = None
+_MARKET, _CFG = None, None
+_minute_memo = collections.OrderedDict()
+
+
+def import_app():
+    global app
+    if app is None:
+        if REPO_ROOT not in sys.path: sys.path.insert(0, REPO_ROOT)
+        os.environ.setdefault("OVERDRIVE_PREWARM", "0")  # 예약 예열 스레드는 서버 프로세스에서만
+        os.environ.setdefault("OVERDRIVE_WATCH", "0")  # 주문 레벨 감시 스레드도 띄우지 않음
+        import app as _app
+        app = _app
+    return app
+
+
+# ==========================================
+# 🗄️ [DATA: 캐시 → (날짜 x 티커) 행렬]
+# ==========================================
+def cached_tickers():
+    """일봉 저장소에 이력이 있는 티커 목록."""
+    store = app.price_store()
+    return sorted(t for t in store.tickers if t in store)
+
+
+def load_market(tickers):
+    """일봉 저장소(float32)를 날짜 합집합 기준의 OHLCV 행렬로 풉니다. (fork 된 워커가 복사 없이 공유)"""
+    store = app.price_store()
+    names = [t for t in dict.fromkeys(tickers) if t in store]
+    if not names: return None
+    idx = [store.pos[t] for t in names]
+    valid = ~np.isnan(store.ohlc[3][idx])
+    keep = valid.any(axis=0)
+    market = {'dates': store.dates[keep], 'tickers': names}
+    market.update({col: store.ohlc[k][idx][:, keep].T.astype(float) for k, col in enumerate(app.PriceStore.PRICE_COLS)})
+    market['Volume'] = np.where(valid, store.volume[idx], np.nan)[:, keep].T
+    return market
+
+
+def load_market_caps():
+    try:
+        with open(app.MARKET_CAP_FILE, 'r') as f: return json.load(f).get("caps", {})
+    except: return {}
+
+
+def minute_manifest():
+    """1분봉 캐시에 (티커, 날짜)가 있는지 미리 목록으로 만들어, 워커가 없는 날짜 때문에 파일을 열지 않게 합니다."""
+    manifest = {}
+    for f in os.listdir(app.MINUTE_CACHE_DIR):
+        if not f.endswith('.pkl'): continue
+        t = '^' + f[1:-4] if f.startswith('_') else f[:-4]
+        df = app.load_cached_bars(t, app.MINUTE_CACHE_DIR)
+        if df is not None and not df.empty:
+            idx = df.index.tz_convert(ET) if df.index.tz is not None else df.index
+            manifest[t] = set(idx.tz_localize(None).normalize().unique())
+    return manifest
+
+
+def day_minutes(ticker, day):
+    """(워커 LRU) 해당 티커의 ET 기준 하루치 1분봉. 없으면 None. 파일은 한 번만 읽어 날짜별로 쪼개 둡니다."""
+    if day not in _CFG['minute_days'].get(ticker, ()): return None
+    if ticker in _minute_memo: _minute_memo.move_to_end(ticker)
+    else:
+        df, days = app.load_cached_bars(ticker, app.MINUTE_CACHE_DIR), {}
+        if df is not None and not df.empty:
+            df = df.tz_convert(ET) if df.index.tz is not None else df.tz_localize(ET)
+            days = {d: g for d, g in df.groupby(df.index.tz_localize(None).normalize())}
+        _minute_memo[ticker] = days
+        if len(_minute_memo) > MINUTE_MEMO_SIZE: _minute_memo.popitem(last=False)
+    return _minute_memo[ticker].get(day)
+
+
+# ==========================================
+# 🔁 [SESSION REPLAY: 스캔 → 조준표]
+# ==========================================
+def session_frames(m, cols, i, is_pre_market, progress_ratio):
+    """스캔 시점에 실전 파이프라인이 보던 것과 같은 모양의 (날짜 x 티커) 프레임을 만듭니다."""
+    lo = max(0, i - WINDOW_BARS + 1)
+    idx = m['dates'][lo:i + 1] if not is_pre_market else m['dates'][lo:i]
+    names = [m['tickers'][c] for c in cols]
+    out = {}
+    for col in app.OHLCV_COLS:
+        arr = m[col][lo:i + (0 if is_pre_market else 1), cols].copy()
+        if not is_pre_market:
+            # 당일 봉 근사: 스캔 시점 가격 ≈ 시가, 거래량 ≈ 하루 거래량 x 진행률
+            arr[-1] = m['Open'][i, cols] if col != 'Volume' else m['Volume'][i, cols] * progress_ratio
+        out[col] = pd.DataFrame(arr, index=idx, columns=names)
+    return out
+
+
+def macro_vix(m, i, is_pre_market):
+    if '^VIX' not in m['tickers']: return 20.0
+    c = m['tickers'].index('^VIX')
+    v = m['Close'][i - 1, c] if is_pre_market else m['Open'][i, c]
+    return float(v) if np.isfinite(v) else 20.0
+
+
+def deep_scan_replay(pre_candidates, day, scan_et, caps):
+    """deep_scan_batch 의 세션 재생판: 스캔 시각까지의 당일 1분봉으로 VWAP/프리장 고점/현재가를 구합니다. (1분봉이 없으면 실전의 수신 실패와 같이 중립 처리)"""
+    curr = pre_candidates['Price'].to_numpy(dtype=float)
+    prev_close = pre_candidates['Prev_Close'].to_numpy(dtype=float)
+    pm_vwap, pm_high, live = np.zeros(len(curr)), curr.copy(), np.full(len(curr), np.nan)
+    for k, t in enumerate(pre_candidates.index):
+        bars = day_minutes(t, day)
+        if bars is None: continue
+        bars = bars[bars.index <= scan_et]
+        if bars.empty or bars['Volume'].sum() <= 0: continue
+        tp = (bars['High'] + bars['Low'] + bars['Close']) / 3
+        pm_vwap[k] = float((tp * bars['Volume']).sum() / bars['Volume'].sum())
+        pm_high[k], live[k] = float(bars['High'].max()), float(bars['Close'].iloc[-1])
+    mcap = np.array([float(caps.get(t, 0.0)) for t in pre_candidates.index])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gap_pct = np.where(prev_close > 0, (curr - prev_close) / prev_close * 100, 0.0)
+    penalty, status = app.deep_scan_penalty(mcap, gap_pct, curr, pm_vwap)
+    return pd.DataFrame({'Power_Score': pre_candidates['Basic_Power_Score'].to_numpy(dtype=float) * penalty, 'Market_Cap': mcap, 'Gap_Pct': gap_pct,
+                         'PM_VWAP': pm_vwap, 'PM_High': pm_high, 'VWAP_Status': status, 'Live_Price': live}, index=pre_candidates.index)
+
+
+def score_ranked_judge(top_candidates):
+    """제미나이 심사 대역: 실전의 fallback_target 과 같은 파워 스코어 1위."""
+    return top_candidates.index[0]
+
+
+def replay_session(i, cfg, judge=score_ranked_judge):
+    m = _MARKET
+    day = m['dates'][i]
+    row = {'date': day.strftime('%Y-%m-%d')}
+    scan_et = KST.localize(datetime.combine(day.date(), cfg['scan_kst'])).astimezone(ET)
+    is_regular, is_pre_market, progress_ratio = app.get_market_status(scan_et)
+    vix = macro_vix(m, i, is_pre_market)
+    is_doomsday = vix >= app.VIX_KILL_SWITCH
+    row.update(vix=round(vix, 2), engine='doomsday' if is_doomsday else 'long')
+
+    cols = cfg['inverse_cols'] if is_doomsday else cfg['long_cols']
+    cols = [c for c in cols if np.isfinite(m['Open'][i, c])] + [cfg['qqq_col']]
+    f = session_frames(m, cols, i, is_pre_market, progress_ratio)
+    try:
+        qqq_c = f['Close']['QQQ'].dropna()
+        q1, q10, q20 = qqq_c.iloc[-1], qqq_c.iloc[-10], qqq_c.iloc[-20]
+        qqq_10d, qqq_20d = float((q1 - q10) / q10), float((q1 - q20) / q20)
+    except: qqq_10d, qqq_20d = 0.0, 0.0
+
+    stats = app.score_universe(f['Open'], f['High'], f['Low'], f['Close'], f['Volume'], list(f['Close'].columns), qqq_10d, qqq_20d, is_pre_market, progress_ratio)
+    valid = app.apply_two_stage_filter(stats, vix, is_doomsday)
+    row['n_valid'] = len(valid)
+    if valid.empty: return dict(row, outcome='no_candidates')
+
+    pre_candidates = valid.sort_values(by='Basic_Power_Score', ascending=False).head(20)
+    deep = deep_scan_replay(pre_candidates, day, scan_et, cfg['caps'])
+    top = pre_candidates.join(deep[['Power_Score', 'Market_Cap', 'Gap_Pct', 'PM_VWAP', 'PM_High', 'VWAP_Status', 'Live_Price']]).sort_values(by='Power_Score', ascending=False).head(10)
+    target = judge(top)
+    cand = top.loc[target]
+
+    cand_df = app.build_ticker_frame(f['Open'], f['High'], f['Low'], f['Close'], f['Volume'], target)
+    atr = app.calculate_true_atr(cand_df['High'], cand_df['Low'], cand_df['Close'], period=14)
+    yesterday_close = float(cand_df['Close'].iloc[-2]) if len(cand_df) > 1 else float(cand_df['Close'].iloc[-1])
+    c = m['tickers'].index(target)
+    entry_price = float(cand['Live_Price']) if np.isfinite(cand['Live_Price']) else float(m['Open'][i, c])
+    vwap = float(cand['PM_VWAP']) if cand['PM_VWAP'] > 0 else entry_price
+    levels = app.build_order_levels(entry_price, vwap, atr, yesterday_close, float(cand['PM_High']), float(cand['Gap_Pct']), float(cand['Market_Cap']), is_pre_market, is_doomsday)
+    sizing = app.size_position(levels, **cfg['sizing'])
+
+    bars, moc_price, source = session_bars(m, c, i, target, day, scan_et)
+    next_bar = m_bar(m, c, i + 1) if i + 1 < len(m['dates']) else None
+    fills = simulate_fills(levels, sizing['half_qty'], bars, moc_price, next_bar)
+    row.update(target=target, power_score=round(float(cand['Power_Score']), 4), vwap_status=str(cand['VWAP_Status']), fill_source=source,
+               entry_price=round(entry_price, 4), entry_2=round(levels['entry_2_val'], 4), avg_entry=round(levels['avg_entry'], 4),
+               tp1=round(levels['tp1_trigger'], 4), tp2=round(levels['tp2_trigger'], 4), sl1=round(levels['sl1_trigger'], 4),
+               qty=sizing['qty'], max_loss=round(sizing['max_total_loss'], 2), **fills)
+    row['r_multiple'] = round(fills['pnl'] / sizing['max_total_loss'], 3) if sizing['max_total_loss'] > 0 else 0.0
+    return row
+
+
+def m_bar(m, c, i):
+    bar = tuple(float(m[k][i, c]) for k in ('Open', 'High', 'Low', 'Close'))
+    return bar if all(np.isfinite(bar)) else None
+
+
+def session_bars(m, c, i, ticker, day, scan_et):
+    """스캔 이후 ~ MOC 심판 시각까지의 체결 판정용 봉. 1분봉이 있으면 그것을, 없으면 당일 일봉 1개를 씁니다."""
+    minutes = day_minutes(ticker, day)
+    if minutes is not None:
+        moc_ts = scan_et.replace(hour=MOC_DECISION.hour, minute=MOC_DECISION.minute, second=0, microsecond=0)
+        open_ts = scan_et.replace(hour=9, minute=30, second=0, microsecond=0)
+        after = minutes[(minutes.index > max(scan_et, open_ts - pd.Timedelta(minutes=1))) & (minutes.index <= moc_ts)]
+        if not after.empty:
+            return after[['Open', 'High', 'Low', 'Close']].to_numpy(dtype=float), float(after['Close'].iloc[-1]), '1m'
+    bar = m_bar(m, c, i)
+    return (np.array([bar]) if bar else np.empty((0, 4))), (bar[3] if bar else np.nan), '1d'
+
+
+# ==========================================
+# 🎯 [FILL SIM: 조준표 + MOC 타임컷]
+# ==========================================
+def simulate_fills(lv, half_qty, bars, moc_price, next_bar=None):
+    """1차 즉시 매수 후 봉 순서대로 2차 매복/손절/익절을 판정합니다. 한 봉에서 손절과 익절이 겹치면 손절을 먼저 체결합니다(보수적).
+    MOC 시각에 평단 아래면 전량 시장가 컷(시나리오 A), 위면 본전 스탑으로 바꿔 다음 세션까지 들고 갑니다(시나리오 B)."""
+    shares, cost, proceeds, events = half_qty, half_qty * lv['entry_price'], 0.0, []
+    pending = {'entry2': True, 'sl1': True, 'sl2': True, 'tp1': True, 'tp2': True}
+
+    def sell(name, q, px):
+        nonlocal shares, proceeds
+        q = min(q, shares)
+        if q <= 0: return
+        shares -= q
+        proceeds += q * px
+        pending[name] = False
+        events.append(f"{name}@{px:.2f}x{q}")
+
+    def targets(o, h):
+        for name in ('tp1', 'tp2'):
+            trig, limit = lv[f'{name}_trigger'], lv[f'{name}_limit']
+            if pending[name] and shares and h >= trig: sell(name, half_qty, max(o, limit) if o >= trig else limit)
+
+    for o, h, l, c in bars:
+        if pending['entry2'] and l <= lv['entry_2_val']:
+            px = min(o, lv['entry_2_val'])
+            shares, cost, pending['entry2'] = shares + half_qty, cost + half_qty * px, False
+            events.append(f"entry2@{px:.2f}x{half_qty}")
+        for name in ('sl1', 'sl2'):
+            if pending[name] and shares and l <= lv[f'{name}_trigger']: sell(name, half_qty, min(o, lv[f'{name}_trigger']))
+        targets(o, h)
+
+    if shares and np.isfinite(moc_price):
+        if moc_price < lv['avg_entry']: sell('moc_cut', shares, moc_price)
+        elif next_bar is not None:
+            o, h, l, c = next_bar
+            if o <= lv['avg_entry']: sell('swing_gap', shares, o)
+            elif l <= lv['avg_entry']: sell('swing_be', shares, lv['break_even_stop_limit'])
+            else:
+                targets(o, h)
+                if shares: sell('swing_close', shares, c)
+    exits = [e.split('@')[0] for e in events if not e.startswith('entry2')]
+    outcome = 'open' if shares else exits[-1]  # open: 데이터 끝이라 아직 청산 전 (MOC 가격으로 평가)
+    mtm = shares * (moc_price if np.isfinite(moc_price) else lv['entry_price'])
+    return {'entry2_filled': not pending['entry2'], 'outcome': outcome, 'events': ' '.join(events),
+            'pnl': round(proceeds + mtm - cost, 2)}
+
+
+# ==========================================
+# 🧵 [POOL: 세션 분산 재생]
+# ==========================================
+def _init_worker(market, cfg):
+    global _MARKET, _CFG
+    import_app()
+    _MARKET, _CFG = market, cfg
+
+
+def _replay_chunk(indices):
+    rows = []
+    for i in indices:
+        try: rows.append(replay_session(int(i), _CFG))
+        except Exception as e: rows.append({'date': _MARKET['dates'][int(i)].strftime('%Y-%m-%d'), 'outcome': 'error', 'events': str(e)})
+    return rows
+
+
+def build_config(market, args):
+    names = market['tickers']
+    exclude = {t.upper() for t in app.EXCLUDE_TICKERS} | set(app.INVERSE_UNIVERSE) | {'QQQ'}
+    return {'scan_kst': datetime.strptime(args.scan_kst, '%H:%M').time(),
+            'long_cols': [k for k, t in enumerate(names) if t not in exclude and not t.startswith('^')],
+            'inverse_cols': [k for k, t in enumerate(names) if t in app.INVERSE_UNIVERSE],
+            'qqq_col': names.index('QQQ'), 'caps': load_market_caps(), 'minute_days': minute_manifest(),
+            'sizing': {'target_profit': args.target_profit, 'max_risk': args.max_risk, 'slot_capital': args.slot_capital}}
+
+
+def summarize(rows):
+    trades = pd.DataFrame([r for r in rows if 'pnl' in r])
+    out = {'sessions': len(rows), 'trades': len(trades), 'errors': sum(r.get('outcome') == 'error' for r in rows)}
+    if trades.empty: return out
+    equity = trades.sort_values('date')['pnl'].cumsum()
+    gains, losses = trades.loc[trades['pnl'] > 0, 'pnl'].sum(), -trades.loc[trades['pnl'] < 0, 'pnl'].sum()
+    out.update(win_rate=round(float((trades['pnl'] > 0).mean()), 3), total_pnl=round(float(trades['pnl'].sum()), 2),
+               avg_r=round(float(trades['r_multiple'].mean()), 3), profit_factor=round(float(gains / losses), 3) if losses > 0 else None,
+               max_drawdown=round(float((equity.cummax() - equity).max()), 2), entry2_fill_rate=round(float(trades['entry2_filled'].mean()), 3),
+               minute_coverage=round(float((trades['fill_source'] == '1m').mean()), 3), outcomes=trades['outcome'].value_counts().to_dict())
+    return out
+
+
+def run(args):
+    import_app()
+    tickers = args.tickers.split(',') + ['QQQ', '^VIX'] if args.tickers else cached_tickers()
+    t0 = time.perf_counter()
+    market = load_market(tickers)
+    if market is None or 'QQQ' not in market['tickers']:
+        print("🚨 가격 캐시에 QQQ 를 포함한 일봉이 없습니다. 먼저 backfill 을 실행하세요.")
+        return 1
+    cfg = build_config(market, args)
+    dates = market['dates']
+    lo, hi = pd.Timestamp(args.start) if args.start else dates[0], pd.Timestamp(args.end) if args.end else dates[-1]
+    sessions = [i for i in range(MIN_HISTORY_BARS, len(dates)) if lo <= dates[i] <= hi]
+    print(f"📂 일봉 {len(market['tickers'])}종목 x {len(dates)}일 로드 ({time.perf_counter() - t0:.1f}초) → 재생 세션 {len(sessions)}개 / 워커 {args.workers}개")
+    if not sessions: return 1
+
+    t0, rows = time.perf_counter(), []
+    chunks = [c for c in np.array_split(np.array(sessions), max(1, args.workers * 4)) if len(c)]
+    # fork 가능한 플랫폼에서는 행렬을 피클링하지 않고 워커가 부모 메모리를 그대로 공유합니다.
+    ctx = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+    if args.workers <= 1:
+        _init_worker(market, cfg)
+        for chunk in chunks: rows.extend(_replay_chunk(chunk))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers, mp_context=ctx, initializer=_init_worker, initargs=(market, cfg)) as pool:
+            for k, part in enumerate(concurrent.futures.as_completed([pool.submit(_replay_chunk, chunk) for chunk in chunks]), 1):
+                rows.extend(part.result())
+                print(f"   ⏳ {k}/{len(chunks)} 묶음 완료 ({time.perf_counter() - t0:.1f}초)")
+    rows.sort(key=lambda r: r['date'])
+
+    summary = summarize(rows)
+    summary['elapsed_sec'] = round(time.perf_counter() - t0, 2)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.out:
+        pd.DataFrame(rows).to_csv(args.out, index=False, encoding='utf-8-sig')
+        print(f"💾 세션별 결과 저장: {args.out}")
+    return 0
+
+
+# ==========================================
+# 📥 [DATA FILL: 일봉 백필 / 1분봉 수집]
+# ==========================================
+def _universe_for_fill(args):
+    if args.tickers: return args.tickers.split(',')
+    snap = app.load_universe_snapshot()
+    return list(dict.fromkeys((snap['tickers'] if snap else []) + app.CORE_UNIVERSE + app.INVERSE_UNIVERSE + ['QQQ', '^VIX']))
+
+
+def backfill(args):
+    import_app()
+    tickers = _universe_for_fill(args)
+    frames, report = app.BulkFetcher(chunk=args.chunk).fetch(tickers, period=args.period, interval="1d")
+    app.price_store().update(frames)
+    app.price_store().save()
+    _print_coverage("일봉 백필", report)
+    return 0
+
+
+def collect_minutes(args):
+    import_app()
+    tickers = _universe_for_fill(args)
+    frames, report = app.BulkFetcher(chunk=args.chunk).fetch(tickers, source="yahoo_minute", period=f"{args.days}d", interval="1m", prepost=True)
+    app.save_minute_bars(frames)
+    _print_coverage("1분봉 수집", report)
+    return 0
+
+
+def _print_coverage(label, report):
+    print(f"   📥 {label} 수신 {report['fetched']}/{report['requested']}종목 ({report['coverage']:.1%}) · 청크 {report['chunks']}개 · 재시도 {report['retried']}종목 · {report['seconds']:.1f}초")
+    if report['missing']: print(f"   ⚠️ 끝내 누락: {', '.join(report['missing'][:20])}{' 외' if len(report['missing']) > 20 else ''}")
+
+
+# ==========================================
+# 🎛️ [SWEEP: 저장된 실행의 임계값 격자 평가]
+# ==========================================
+def sweep(args):
+    import_app()
+    grid = {}
+    for spec in args.grid or []:
+        name, _, values = spec.partition("=")
+        grid[name.strip()] = [float(v) for v in values.split(",") if v.strip()]
+    report = app.sweep_checkpoint(args.run, grid)
+    if report is None:
+        print(f"🚨 체크포인트 없음: {args.run}")
+        return 1
+    if args.json:
+        with open(args.json, "w") as f: json.dump(report, f, indent=2, ensure_ascii=False, default=float)
+    base = report["baseline"]
+    print(f"\n🎛️ [THRESHOLD SWEEP] run {report['run_id']} ({report['age_min']:.0f}분 전) · {report['engine']} 엔진 · VIX {report['vix']} · 채점 {report['n_scored']}종목")
+    print(f"   조합 {report['combos']:,}개 · {report['seconds']:.2f}초 · 딥스캔 커버리지 {report['deep_coverage']:.1%} · 통과 종목 {report['n_valid']['min']}~{report['n_valid']['max']} (중앙값 {report['n_valid']['median']:.0f})")
+    print(f"   기준 fallback: {base['fallback']} | 기준 10강: {', '.join(base['top10'])}")
+    print(f"   fallback 유지 {report['same_fallback']:.1%} · 10강 동일 {report['same_top10']:.1%} · 10강 평균 겹침 {report['mean_top10_overlap']:.1f}개 · 후보 없음 {report['no_candidates']:.1%}")
+    print("   fallback 분포: " + ", ".join(f"{t} {v:.1%}" for t, v in report["fallback_share"].items()))
+    print("   10강 진입률:   " + ", ".join(f"{t} {v:.0%}" for t, v in report["top10_share"].items()))
+    print("   축별 fallback 유지율:")
+    for name, by_value in report["sensitivity"].items(): print(f"     {name:<11}" + "  ".join(f"{v}: {r:.0%}" for v, r in by_value.items()))
+    return 0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="OVERDRIVE 히스토리컬 백테스트")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="캐시된 일봉/1분봉으로 과거 세션 재생")
+    r.add_argument("--start"); r.add_argument("--end")
+    r.add_argument("--tickers", help="쉼표 구분 티커 (기본: 가격 캐시 전체)")
+    r.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    r.add_argument("--scan-kst", default="23:05", help="사냥 트리거 시각 (한국시간, 서머타임은 자동 반영)")
+    r.add_argument("--target-profit", type=float); r.add_argument("--max-risk", type=float); r.add_argument("--slot-capital", type=float)
+    r.add_argument("--out", help="세션별 결과 CSV 경로")
+    b = sub.add_parser("backfill", help="일봉 이력을 가격 캐시에 병합")
+    b.add_argument("--period", default="3y"); b.add_argument("--tickers"); b.add_argument("--chunk", type=int, default=200)
+    c = sub.add_parser("collect-minutes", help="최근 1분봉을 1분봉 캐시에 누적")
+    c.add_argument("--days", type=int, default=7); c.add_argument("--tickers"); c.add_argument("--chunk", type=int, default=50)
+    w = sub.add_parser("sweep", help="저장된 실행(체크포인트)으로 필터/페널티 임계값 격자 평가")
+    w.add_argument("--run", default="latest"); w.add_argument("--json", help="리포트 JSON 경로")
+    w.add_argument("--grid", nargs="*", help="축 덮어쓰기 (예: t1_spike=1.2,1.5,2.0 vwap_below=0.1,0.2)")
+    args = p.parse_args(argv)
+    return {"run": run, "backfill": backfill, "collect-minutes": collect_minutes, "sweep": sweep}[args.cmd](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
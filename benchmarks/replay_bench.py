@@ -0,0 +1,377 @@
+"""
+OVERDRIVE 오프라인 리플레이 벤치마크
+
+실제 사냥 1회의 입력(일봉 벌크 프레임, 1분봉 딥스캔 프레임, 유니버스, 시총, VIX/TNX)을 픽스처로 녹화하고,
+야후/위키/제미나이/텔레그램 없이 overdrive_apex_execution 전체를 로컬 대역(stand-in)으로 재생하며
+유니버스 크기별(100 ~ 3,000 종목) 단계별 소요 시간과 파이썬 힙 최대 사용량을 보고합니다.
+
+    # 실전 사냥 1회를 녹화 (야후/제미나이는 실제 호출, 텔레그램 발사는 끔)
+    python benchmarks/replay_bench.py record --out benchmarks/fixtures/live.pkl
+
+    # 녹화본(없으면 합성 데이터)으로 리플레이
+    python benchmarks/replay_bench.py run --fixture benchmarks/fixtures/live.pkl --sizes 100,500,1000,3000
+    python benchmarks/replay_bench.py run --synthetic --sizes 100,500,1000,3000 --json bench.json
+
+단계 시간은 app 모듈 함수 단위로 잽니다. chart_render 는 선행(speculative) 렌더 스레드와 gemini_judging
+내부 호출을 합친 값이라 다른 단계와 겹칠 수 있고, 차트는 별도 프로세스에서 그려지므로 최대 메모리에 포함되지 않습니다.
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import pickle
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MACRO_TICKERS = ['^VIX', '^TNX']
+
+# (보고 이름, app 모듈 함수명)
+PHASES = [
+    ("bootstrap", "run_bootstrap"),
+    ("universe", "get_market_universe"),
+    ("bulk_download", "fetch_bulk_prices"),
+    ("phase1_scoring", "score_universe"),
+    ("deep_scan", "deep_scan_batch"),
+    ("chart_render", "render_charts"),
+    ("gemini_judging", "ask_gemini_champions_league"),
+    ("mindset_coach", "ask_gemini_mindset_coach"),
+    ("telegram_flush", "flush_telegram"),
+]
+
+
+def import_app(workdir):
+    """LOG_DIR('./OVERDRIVE_DATA')가 임시 폴더에 생기도록 작업 디렉터리를 옮긴 뒤 app 을 불러옵니다."""
+    os.chdir(workdir)
+    if REPO_ROOT not in sys.path: sys.path.insert(0, REPO_ROOT)
+    os.environ.setdefault("OVERDRIVE_PREWARM", "0")  # 예약 예열 스레드가 측정에 끼어들지 않도록
+    os.environ.setdefault("OVERDRIVE_WATCH", "0")  # 주문 레벨 감시 스레드도 띄우지 않음
+    import app
+    return app
+
+
+# ==========================================
+# 🎥 [RECORD: 실전 1회 입력 녹화]
+# ==========================================
+class RecordingYF:
+    """yfinance 를 감싸 1분봉 다운로드 결과를 가로채 저장합니다."""
+
+    def __init__(self, real, sink):
+        self._real, self._sink = real, sink
+
+    def download(self, tickers, *args, **kwargs):
+        out = self._real.download(tickers, *args, **kwargs)
+        if kwargs.get("interval") == "1m": self._sink["minute"].append(out)
+        return out
+
+    def __getattr__(self, name):
+        return getattr(self._real, name)
+
+
+def record(out_path, send_telegram=False):
+    app = import_app(tempfile.mkdtemp(prefix="overdrive_record_"))
+    sink = {"daily": [], "minute": [], "universe": None, "caps": {}, "macro": None}
+    app.yf = RecordingYF(app.yf, sink)
+    if not send_telegram: app.TELEGRAM_TOKEN = ""
+
+    def tap(name, store):
+        real = getattr(app, name)
+        def wrapper(*args, **kwargs):
+            out = real(*args, **kwargs)
+            store(out)
+            return out
+        setattr(app, name, wrapper)
+
+    tap("fetch_bulk_prices", lambda out: sink["daily"].append(out.to_frame()))
+    tap("get_market_universe", lambda out: sink.__setitem__("universe", list(out)))
+    tap("get_market_caps", lambda out: sink["caps"].update(out))
+    tap("read_macro", lambda out: sink.__setitem__("macro", tuple(out)))
+    app.overdrive_apex_execution()
+
+    if not sink["daily"]: raise SystemExit("녹화 실패: 벌크 일봉 수신이 일어나지 않았습니다.")
+    fixture = {
+        "recorded_at": time.time(),
+        "daily": _merge_frames(sink["daily"]),
+        "minute": _merge_frames(sink["minute"]) if sink["minute"] else pd.DataFrame(),
+        "universe": sink["universe"] or [],
+        "caps": sink["caps"],
+        "macro": sink["macro"] or (20.0, 4.0),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "wb") as f: pickle.dump(fixture, f)
+    print(f"🎥 녹화 완료: {out_path} (일봉 {fixture['daily']['Close'].shape[1]}종목, 1분봉 {fixture['minute'].shape})")
+
+
+def _merge_frames(frames):
+    merged = pd.concat([f for f in frames if f is not None and not f.empty], axis=1)
+    return merged.loc[:, ~merged.columns.duplicated(keep='last')].sort_index(axis=1)
+
+
+# ==========================================
+# 🧪 [FIXTURES: 녹화본 로드 / 합성 / 유니버스 확장]
+# ==========================================
+def synthesize_fixture(n_tickers=600, days=63, seed=7, fixed=()):
+    """녹화본이 없을 때 쓰는 합성 시장 (랜덤 워크 + 마지막 날 일부 종목 거래량 급증).
+    fixed 는 앱이 유니버스와 상관없이 늘 요청하는 종목(코어/인버스)이고, ^VIX/^TNX 도 일봉으로 만들어 넣습니다.
+    (빠지면 벌크 수신이 매번 누락 재시도와 백오프를 타서 콜드 실행 시간이 부풀려짐)"""
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=days)
+    generated = [f"S{i:04d}" for i in range(n_tickers)]
+    tickers = list(dict.fromkeys(generated + [t for t in fixed if t not in MACRO_TICKERS] + ['QQQ']))
+    price = 20 + 300 * rng.random(len(tickers))
+    close = price * np.exp(np.cumsum(rng.normal(0.0005, 0.02, (days, len(tickers))), axis=0))
+    opens = close * (1 + rng.normal(0, 0.005, close.shape))
+    high = np.maximum(close, opens) * (1 + np.abs(rng.normal(0, 0.01, close.shape)))
+    low = np.minimum(close, opens) * (1 - np.abs(rng.normal(0, 0.01, close.shape)))
+    volume = rng.integers(200_000, 5_000_000, close.shape).astype(float)
+    volume[-1] *= np.where(rng.random(len(tickers)) < 0.15, rng.uniform(2, 8, len(tickers)), 1.0)
+    fields = {'Open': opens, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}
+    daily = pd.concat({f: pd.DataFrame(v, index=idx, columns=tickers) for f, v in fields.items()}, axis=1)
+    # VIX 는 킬 스위치(25) 아래에서, TNX 는 4% 안팎에서 움직이는 로그 랜덤 워크
+    for t, level, vol, lo, hi in (('^VIX', 18.5, 0.04, 12.0, 24.0), ('^TNX', 4.2, 0.01, 3.5, 5.0)):
+        series = np.clip(level * np.exp(np.cumsum(rng.normal(0, vol, days))), lo, hi)
+        for f in ['Open', 'High', 'Low', 'Close']: daily[(f, t)] = series
+        daily[('Volume', t)] = 0.0
+    daily = daily.sort_index(axis=1)
+    caps = {t: float(rng.choice([5e9, 3e10, 7e10, 2e11])) for t in tickers}
+    macro = tuple(float(daily['Close'][t].iloc[-1]) for t in MACRO_TICKERS)
+    return {"recorded_at": time.time(), "daily": daily, "minute": pd.DataFrame(), "universe": generated, "caps": caps, "macro": macro}
+
+
+def load_fixture(path):
+    with open(path, "rb") as f: return pickle.load(f)
+
+
+def scale_fixture(fixture, size, seed=11):
+    """녹화 종목을 잘라내거나 가격/거래량을 흔든 복제본으로 불려 size 종목짜리 유니버스를 만듭니다.
+    유니버스 밖 종목(코어/인버스/QQQ/매크로)은 그대로 옮기고, 녹화 시점과 상관없이 델타 캐시 경로가 타도록 마지막 봉을 오늘 날짜로 당겨옵니다."""
+    rng = np.random.default_rng(seed)
+    daily = fixture["daily"]
+    base = [t for t in fixture["universe"] if t in daily['Close'].columns and t not in MACRO_TICKERS and t != 'QQQ']
+    if not base: base = [t for t in daily['Close'].columns if t not in MACRO_TICKERS and t != 'QQQ']
+
+    shift = pd.Timestamp.now().normalize() - pd.Timestamp(daily.index.max()).tz_localize(None).normalize()
+    fields = {}
+    for f in ['Open', 'High', 'Low', 'Close', 'Volume']:
+        cols = {t: daily[f][t] for t in base[:size]}
+        for k in range(max(0, size - len(base))):
+            t = base[k % len(base)]
+            px, vol = rng.uniform(0.5, 2.0), rng.uniform(0.5, 2.0)
+            cols[f"{t}X{k // len(base) + 1}"] = daily[f][t] * (vol if f == 'Volume' else px)
+        universe = list(cols)
+        for t in daily['Close'].columns:
+            if t not in cols and t not in base: cols[t] = daily[f][t]
+        fields[f] = pd.DataFrame(cols)
+    scaled = pd.concat(fields, axis=1)
+    scaled.index = pd.DatetimeIndex(scaled.index).tz_localize(None) + shift
+
+    for t, level in zip(MACRO_TICKERS, fixture["macro"]):  # 매크로 일봉이 없는 옛 녹화본은 평평한 값으로
+        if t in daily['Close'].columns: continue
+        for f in ['Open', 'High', 'Low', 'Close']: scaled[(f, t)] = float(level)
+        scaled[('Volume', t)] = 0.0
+    return {"daily": scaled.sort_index(axis=1), "minute": fixture.get("minute", pd.DataFrame()), "universe": universe,
+            "caps": fixture.get("caps", {}), "shift": shift}
+
+
+# ==========================================
+# 🎭 [STAND-INS: yfinance / genai / requests 대역]
+# ==========================================
+class ReplayYF:
+    def __init__(self, market):
+        self.market = market
+        self.calls = 0
+
+    def download(self, tickers, period=None, start=None, interval="1d", **kwargs):
+        self.calls += 1
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        if interval == "1m": return self._minute(tickers)
+        daily = self.market["daily"]
+        cols = [t for t in tickers if t in daily['Close'].columns]
+        if not cols: return pd.DataFrame()
+        out = daily.loc[:, (slice(None), cols)]
+        if start is not None: out = out[out.index >= pd.Timestamp(start)]
+        elif period == "5d": out = out.tail(5)
+        return out
+
+    def _minute(self, tickers):
+        """녹화된 1분봉이 있으면 그대로, 없으면(복제/합성 종목) 일봉 종가 주변으로 결정적으로 만들어 냅니다."""
+        frames = {}
+        recorded = self.market["minute"]
+        now = pd.Timestamp.now(tz='America/New_York').floor('min')
+        idx = pd.date_range(end=now, periods=3 * 390, freq='1min')
+        for t in tickers:
+            if not recorded.empty and t in recorded['Close'].columns:
+                sub = recorded.xs(t, level=1, axis=1).dropna(how='all')
+                sub.index = sub.index + self.market["shift"]
+                frames[t] = sub
+                continue
+            if t not in self.market["daily"]['Close'].columns: continue
+            last = float(self.market["daily"]['Close'][t].dropna().iloc[-1])
+            rng = np.random.default_rng(int(hashlib.md5(t.encode()).hexdigest()[:8], 16))
+            close = last * np.exp(np.cumsum(rng.normal(0, 0.0008, len(idx))))
+            frames[t] = pd.DataFrame({'Open': close, 'High': close * 1.001, 'Low': close * 0.999, 'Close': close,
+                                      'Volume': rng.integers(100, 20_000, len(idx)).astype(float)}, index=idx)
+        if not frames: return pd.DataFrame()
+        return pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+    def Ticker(self, ticker):
+        return ReplayTicker(self, ticker)
+
+
+class ReplayTicker:
+    def __init__(self, yf, ticker):
+        self._yf, self.ticker = yf, ticker
+        self.fast_info = {'marketCap': yf.market["caps"].get(ticker, 1e10)}
+
+    @property
+    def info(self):
+        return {'marketCap': self.fast_info['marketCap']}
+
+    def history(self, period="1d", interval="1m", **kwargs):
+        out = self._yf._minute([self.ticker])
+        return out.xs(self.ticker, level=1, axis=1) if not out.empty else pd.DataFrame()
+
+
+class ReplayGenAI:
+    """제미나이 대역: 프롬프트의 첫 번째 후보를 고르고, 지정한 지연 시간만큼 기다립니다."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def configure(self, **kwargs):
+        pass
+
+    def GenerativeModel(self, name, *args, **kwargs):
+        return ReplayModel(self, name)
+
+
+class ReplayModel:
+    def __init__(self, genai, name):
+        self._genai, self.model_name = genai, name
+
+    def generate_content(self, contents, *args, **kwargs):
+        time.sleep(self._genai.latency)
+        prompt = contents if isinstance(contents, str) else " ".join(c for c in contents if isinstance(c, str))
+        names = re.findall(r'\[\d+번 후보\]\s*([A-Za-z0-9\-\.\^]+)', prompt)
+        if "SHORTLIST" in prompt: text = f"[SHORTLIST: {', '.join(names[:4])}]"
+        elif names: text = f"[SELECTED: {names[0]}]\n리플레이 대역 응답"
+        else: text = "룰을 지키십시오. (리플레이 대역)"
+        return type("ReplayResponse", (), {"text": text})()
+
+
+class ReplaySession:
+    """텔레그램 대역: 요청을 세기만 하고 즉시 200 을 돌려줍니다."""
+
+    def __init__(self):
+        self.posts, self.bytes = 0, 0
+
+    def post(self, url, json=None, **kwargs):
+        self.posts += 1
+        self.bytes += len((json or {}).get("text", ""))
+        return type("ReplayHTTP", (), {"status_code": 200, "ok": True, "text": "", "json": lambda self: {"ok": True}})()
+
+    def mount(self, *args, **kwargs):
+        pass
+
+
+# ==========================================
+# ⏱️ [RUN: 단계별 계측 리플레이]
+# ==========================================
+def instrument(app, timings, lock):
+    for phase, name in PHASES:
+        real = getattr(app, name)
+        def wrapper(*args, _real=real, _phase=phase, **kwargs):
+            t0 = time.perf_counter()
+            try: return _real(*args, **kwargs)
+            finally:
+                with lock: timings[_phase] = timings.get(_phase, 0.0) + time.perf_counter() - t0
+        setattr(app, name, wrapper)
+
+
+def replay_once(app, market, track_memory=False):
+    timings, lock = {}, threading.Lock()
+    originals = {name: getattr(app, name) for _, name in PHASES}
+    instrument(app, timings, lock)
+    with open(app.UNIVERSE_FILE, "w") as f: json.dump({"fetched_at": time.time(), "tickers": market["universe"]}, f)
+    if track_memory: tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()): app.overdrive_apex_execution()
+    finally:
+        total = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] / 1e6 if track_memory else None
+        if track_memory: tracemalloc.stop()
+        for name, fn in originals.items(): setattr(app, name, fn)
+    return {"total": total, "phases": timings, "peak_mb": peak}
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="overdrive_bench_")
+    app = import_app(workdir)
+    fixture = (load_fixture(args.fixture) if args.fixture and not args.synthetic
+               else synthesize_fixture(max(args.sizes), fixed=app.CORE_UNIVERSE + app.INVERSE_UNIVERSE))
+    session = ReplaySession()
+    app.GEMINI_API_KEY, app.TELEGRAM_TOKEN = "replay", "replay"
+    app.genai = ReplayGenAI(latency=args.gemini_latency)
+    app.telegram_sender._session = session
+    app.TELEGRAM_MIN_INTERVAL_SEC = 0.0
+
+    results = []
+    for size in args.sizes:
+        market = scale_fixture(fixture, size)
+        app.yf = ReplayYF(market)
+        for name in os.listdir(app.PRICE_CACHE_DIR): os.remove(os.path.join(app.PRICE_CACHE_DIR, name))
+        app._price_store = None
+        for name in os.listdir(app.CHART_CACHE_DIR): os.remove(os.path.join(app.CHART_CACHE_DIR, name))
+        app._chart_memo.clear()
+        row = {"size": size, "cold": replay_once(app, market)}
+        row["warm"] = replay_once(app, market)
+        if not args.no_memory: row["warm"]["peak_mb"] = replay_once(app, market, track_memory=True)["peak_mb"]
+        row["yf_calls"] = app.yf.calls
+        results.append(row)
+        print_row(row)
+
+    if args.json:
+        with open(args.json, "w") as f: json.dump(results, f, indent=2, default=float)
+        print(f"\n📄 결과 저장: {args.json}")
+    return results
+
+
+def print_row(row):
+    print(f"\n=== 유니버스 {row['size']:,} 종목 (야후 대역 호출 {row['yf_calls']}회) ===")
+    print(f"{'phase':<16}{'cold(s)':>10}{'warm(s)':>10}")
+    for phase, _ in PHASES:
+        print(f"{phase:<16}{row['cold']['phases'].get(phase, 0.0):>10.3f}{row['warm']['phases'].get(phase, 0.0):>10.3f}")
+    print(f"{'TOTAL':<16}{row['cold']['total']:>10.3f}{row['warm']['total']:>10.3f}")
+    if row['warm'].get('peak_mb') is not None: print(f"peak python heap (warm): {row['warm']['peak_mb']:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OVERDRIVE offline record/replay benchmark")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="실전 사냥 1회의 입력을 픽스처로 녹화")
+    rec.add_argument("--out", default=os.path.join(REPO_ROOT, "benchmarks", "fixtures", "live.pkl"))
+    rec.add_argument("--send-telegram", action="store_true", help="녹화 중 텔레그램 발사 허용")
+    rp = sub.add_parser("run", help="픽스처(또는 합성 시장)로 파이프라인 리플레이")
+    rp.add_argument("--fixture", default=None)
+    rp.add_argument("--synthetic", action="store_true")
+    rp.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=[100, 500, 1000, 3000])
+    rp.add_argument("--gemini-latency", type=float, default=0.0, help="제미나이 대역 응답 지연(초)")
+    rp.add_argument("--no-memory", action="store_true", help="tracemalloc 패스 생략")
+    rp.add_argument("--json", default=None)
+    args = parser.parse_args(argv)
+    if args.cmd == "record": record(args.out, send_telegram=args.send_telegram)
+    else: run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# gunicorn 은 작업 디렉터리의 gunicorn.conf.py 를 자동으로 읽습니다. (gunicorn app:app)
+# 예열 스케줄러/주문 감시 스레드는 import 부작용으로 띄우지 않고, 워커가 앱을 다 읽은 뒤 여기서 시작을 시도합니다.
+# 워커가 N개여도 스케줄러 잠금(OVERDRIVE_DATA/scheduler.lock)을 잡은 워커 하나만 실제로 돌립니다. (OVERDRIVE_SCHEDULER 참고)
+
+
+def post_worker_init(worker):
+    import app
+    app.start_background_services()
@@ -0,0 +1,9 @@
+"""app 은 import 시점에 ./OVERDRIVE_DATA 를 만들고 스레드를 띄울 수 있으므로, 임시 작업 디렉터리에서 예열/감시를 끈 채로 불러옵니다."""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("OVERDRIVE_PREWARM", "0")
+os.environ.setdefault("OVERDRIVE_WATCH", "0")
+os.chdir(tempfile.mkdtemp(prefix="overdrive_test_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,21 @@
+import pytz
+from datetime import date, datetime
+
+import app
+
+ET = pytz.timezone('US/Eastern')
+
+
+def test_nyse_holidays_match_published_calendar():
+    assert sorted(app.nyse_holidays(2026)) == [date(2026, 1, 1), date(2026, 1, 19), date(2026, 2, 16), date(2026, 4, 3), date(2026, 5, 25),
+                                               date(2026, 6, 19), date(2026, 7, 3), date(2026, 9, 7), date(2026, 11, 26), date(2026, 12, 25)]
+    assert sorted(app.nyse_holidays(2027)) == [date(2027, 1, 1), date(2027, 1, 18), date(2027, 2, 15), date(2027, 3, 26), date(2027, 5, 31),
+                                               date(2027, 6, 18), date(2027, 7, 5), date(2027, 9, 6), date(2027, 11, 25), date(2027, 12, 24)]
+    assert date(2021, 12, 31) not in app.nyse_holidays(2021)  # 토요일 신정은 대체 휴장 없음
+
+
+def test_next_hunt_skips_holiday():
+    sched = app.PrewarmScheduler(hunt_time_kst="23:05")
+    hunt = sched.next_hunt(ET.localize(datetime(2026, 4, 2, 11, 0)))  # 다음 날이 성금요일
+    assert hunt.date() == date(2026, 4, 6)
+    assert not app.is_trading_day(datetime(2026, 4, 3, 10, 0)) and app.is_trading_day(date(2026, 4, 2))
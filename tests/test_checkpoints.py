@@ -0,0 +1,18 @@
+import app
+
+
+def test_prune_keeps_runs_referenced_by_resumed_runs(tmp_path):
+    store = app.CheckpointStore(root=str(tmp_path))
+    store.save("run-0", "scan", {"stats": "original"})
+    for i in range(2, 5): store.save(f"run-{i}", "scan", {"stats": i})
+    store.adopt("run-1", store.find("run-0"), ["scan"])  # 가장 최근 실행이 오래된 run-0 을 이어받아 가리킴
+    store.prune(keep=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["run-0", "run-1", "run-4"]
+    assert store.load(store.find("run-1"), "scan") == {"stats": "original"}
+
+
+def test_prune_drops_unreferenced_old_runs(tmp_path):
+    store = app.CheckpointStore(root=str(tmp_path))
+    for i in range(4): store.save(f"run-{i}", "scan", {"stats": i})
+    store.prune(keep=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["run-2", "run-3"]
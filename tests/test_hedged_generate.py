@@ -0,0 +1,36 @@
+import pytest
+
+import app
+
+
+class DeadlineExceeded(Exception):  # google.api_core.exceptions.DeadlineExceeded 와 같은 이름
+    pass
+
+
+def test_sdk_deadline_maps_to_timeout_path(monkeypatch):
+    timeouts = []
+    def fake(name, contents, config, timeout, stage):
+        timeouts.append(timeout)
+        raise DeadlineExceeded("504 Deadline Exceeded")
+    monkeypatch.setattr(app, "_gemini_generate", fake)
+    with pytest.raises(TimeoutError):
+        app.hedged_generate("pro", "prompt", {}, budget=3.0, hedge_after=1.0)
+    assert len(timeouts) == 2  # 첫 요청 실패 → 헤지 1회
+    assert timeouts[0] == pytest.approx(3.0 + app.AI_REQUEST_TIMEOUT_MARGIN_SEC)
+    assert timeouts[1] > 3.0  # 남은 마감 + 여유
+
+
+def test_other_errors_still_propagate(monkeypatch):
+    monkeypatch.setattr(app, "_gemini_generate", lambda *a: (_ for _ in ()).throw(ValueError("bad request")))
+    with pytest.raises(ValueError):
+        app.hedged_generate("pro", "prompt", {}, budget=3.0, hedge_after=1.0)
+
+
+def test_hedge_answer_wins_after_first_failure(monkeypatch):
+    calls = []
+    def fake(name, contents, config, timeout, stage):
+        calls.append(timeout)
+        if len(calls) == 1: raise DeadlineExceeded("first")
+        return "[WINNER: AAA]"
+    monkeypatch.setattr(app, "_gemini_generate", fake)
+    assert app.hedged_generate("pro", "prompt", {}, budget=3.0, hedge_after=1.0) == "[WINNER: AAA]"
@@ -0,0 +1,23 @@
+import threading
+
+import app
+
+
+def test_second_worker_joins_hunt_in_flight(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.run_store, "update", lambda *a, **k: None)
+    monkeypatch.setattr(app.run_store, "add_phases", lambda *a, **k: None)
+    release, ran = threading.Event(), []
+    def hunt(**kw):
+        ran.append(kw)
+        release.wait(5)
+    paths = dict(lock_path=str(tmp_path / "hunt.lock"), active_path=str(tmp_path / "hunt_active.json"))
+    a, b = app.HuntJobManager(hunt, **paths), app.HuntJobManager(hunt, **paths)  # gunicorn 워커 두 개
+    job, started = a.submit("webhook")
+    joined, joined_started = b.submit("webhook")
+    assert started and not joined_started and joined["run_id"] == job["run_id"]
+    assert b.get(job["run_id"])["state"] == "running"
+    release.set()
+    a._executor.shutdown(wait=True)
+    assert len(ran) == 1 and a.get(job["run_id"])["coalesced"] == 1
+    assert b.submit("webhook")[1]  # 끝나면 다른 워커도 새 사냥을 시작할 수 있음
+    b._executor.shutdown(wait=True)
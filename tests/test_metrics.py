@@ -0,0 +1,18 @@
+import os
+import re
+
+import app
+
+
+def test_every_emitted_metric_has_help():
+    with open(os.path.join(os.path.dirname(app.__file__), "app.py"), encoding="utf-8") as f:
+        emitted = set(re.findall(r'metrics\.(?:inc|set|observe)\("([a-z_]+)"', f.read()))
+    assert emitted and emitted <= set(app.METRIC_HELP)
+
+
+def test_export_has_help_and_type_lines():
+    reg = app.MetricsRegistry()
+    reg.inc("overdrive_watch_alerts_total", trigger="sl1")
+    reg.set("overdrive_prompt_tokens_estimate", 812, model="flash")
+    text = reg.render()
+    assert "# TYPE overdrive_watch_alerts_total counter" in text and "# HELP overdrive_prompt_tokens_estimate" in text
@@ -0,0 +1,18 @@
+import pandas as pd
+
+import app
+
+
+def test_column_added_by_another_worker_does_not_drop_rows(tmp_path):
+    path = str(tmp_path / "runs.db")
+    a, b = app.RunStore(path), app.RunStore(path)  # 워커 두 개 (컬럼 캐시가 따로)
+    a.begin("r1")
+    b.begin("r2")
+    a.update("r1", target="AAA", power_score=1.5)
+    b.update("r2", target="BBB", power_score=2.5)  # b 의 캐시엔 target 이 없어 ALTER 가 duplicate column 으로 실패
+    b.add_candidates("r2", pd.DataFrame({"RS": [0.1]}, index=["BBB"]))
+    a.add_candidates("r1", pd.DataFrame({"RS": [0.2], "Gap_Pct": [1.0]}, index=["AAA"]))
+    b.add_candidates("r2", pd.DataFrame({"RS": [0.3], "Gap_Pct": [2.0]}, index=["CCC"]))
+    with a._connect() as con:
+        assert con.execute("SELECT run_id, target, power_score FROM runs ORDER BY run_id").fetchall() == [("r1", "AAA", 1.5), ("r2", "BBB", 2.5)]
+        assert con.execute("SELECT ticker, Gap_Pct FROM candidates ORDER BY ticker").fetchall() == [("AAA", 1.0), ("BBB", None), ("CCC", 2.0)]
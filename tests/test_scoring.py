@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+def market(n_tickers=40, days=63, seed=3):
+    """(날짜 x 티커) OHLCV 행렬. 일부 티커는 중간중간 봉이 비고, 하나는 이력이 25봉보다 짧습니다."""
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2026-06-01", periods=days)
+    tickers = [f"T{i:02d}" for i in range(n_tickers)] + ['QQQ']
+    close = (20 + 200 * rng.random(len(tickers))) * np.exp(np.cumsum(rng.normal(0, 0.02, (days, len(tickers))), axis=0))
+    opens = close * (1 + rng.normal(0, 0.01, close.shape))
+    high = np.maximum(close, opens) * (1 + np.abs(rng.normal(0, 0.01, close.shape)))
+    low = np.minimum(close, opens) * (1 - np.abs(rng.normal(0, 0.01, close.shape)))
+    volume = rng.integers(10_000, 3_000_000, close.shape).astype(float)
+    frames = [pd.DataFrame(a, index=idx, columns=tickers) for a in (opens, high, low, close, volume)]
+    holes = rng.random(close.shape) < 0.03
+    holes[:, -1] = False
+    for f in frames[:4]: f[holes] = np.nan
+    for f in frames: f.iloc[:days - 20, 0] = np.nan  # T00: 이력 부족
+    return frames, tickers
+
+
+def legacy_stats(opens, highs, lows, closes, volumes, tickers, qqq_10d, qqq_20d, is_pre_market, progress_ratio):
+    """벡터화 이전의 티커별 루프 (원본 Phase-1 스코어링)."""
+    rows = []
+    for cand in tickers:
+        if cand == 'QQQ' or cand not in closes.columns: continue
+        df = pd.DataFrame({'Open': opens[cand], 'High': highs[cand], 'Low': lows[cand], 'Close': closes[cand], 'Volume': volumes[cand]}).dropna()
+        if len(df) < 25: continue
+        c, v = df['Close'], df['Volume']
+        comp_rs = (((c.iloc[-1] - c.iloc[-10]) / c.iloc[-10]) - qqq_10d) * 0.6 + (((c.iloc[-1] - c.iloc[-20]) / c.iloc[-20]) - qqq_20d) * 0.4
+        avg_v, curr_v = float(v.iloc[-11:-1].mean()), float(v.iloc[-1])
+        v_spike = 0.0 if (is_pre_market and curr_v < 50000) else (curr_v / progress_ratio) / avg_v if avg_v > 0 else 0.0
+        prev_close = float(c.iloc[-2])
+        t_gap = (float(df['Open'].iloc[-1]) - prev_close) / prev_close * 100 if prev_close > 0 else 0.0
+        rows.append({'Ticker': cand, 'Price': float(c.iloc[-1]), 'Prev_Close': prev_close, 'RS': comp_rs, 'Vol_Spike': v_spike,
+                     'SMA20': float(c.rolling(20).mean().iloc[-1]), 'True_Gap': t_gap, 'Basic_Power_Score': (comp_rs + 1.0) * v_spike})
+    return pd.DataFrame(rows).set_index('Ticker')
+
+
+@pytest.mark.parametrize("is_pre_market,progress_ratio", [(False, 1.0), (True, 0.35)])
+@pytest.mark.parametrize("with_states", [False, True])
+def test_score_universe_matches_per_ticker_loop(tmp_path, is_pre_market, progress_ratio, with_states):
+    frames, tickers = market()
+    states = None
+    if with_states:  # 절반은 증분 상태에서, 나머지는 행렬에서 지표를 읽는 혼합 경로
+        states = app.IndicatorStore(str(tmp_path / "ind.pkl"))
+        for t in tickers[::2]: states.sync(t, pd.DataFrame(dict(zip(app.OHLCV_COLS, (f[t] for f in frames)))))
+    args = (*frames, tickers, 0.01, -0.02, is_pre_market, progress_ratio)
+    got = app.score_universe(*args, states=states)
+    want = legacy_stats(*args)
+    assert 'T00' not in got.index and list(got.index) == list(want.index)
+    pd.testing.assert_frame_equal(got[want.columns], want, check_names=False, rtol=1e-9)
+
+
+def test_indicator_state_matches_rolling_recompute():
+    rng = np.random.default_rng(5)
+    n = 80
+    idx = pd.bdate_range("2026-01-02", periods=n)
+    c = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    o = c * (1 + rng.normal(0, 0.01, n))
+    h, l = np.maximum(o, c) * 1.01, np.minimum(o, c) * 0.99
+    v = rng.integers(1000, 100_000, n).astype(float)
+    df = pd.DataFrame({'Open': o, 'High': h, 'Low': l, 'Close': c, 'Volume': v}, index=idx)
+    st = app.IndicatorState()
+    st.RESYNC_EVERY = 7  # 누적합 재정렬 경로도 같이 태움
+    for i, ts in enumerate(idx):
+        # 장중 미완성 봉이 먼저 들어왔다가 같은 날짜의 완성 봉으로 교체되는 흐름
+        assert st.push(ts, o[i], h[i] * 0.995, l[i] * 1.005, (o[i] + c[i]) / 2, v[i] / 3)
+        assert st.push(ts, o[i], h[i], l[i], c[i], v[i])
+        part = df.iloc[:i + 1]
+        if i + 1 >= 20: assert st.sma20 == pytest.approx(part['Close'].rolling(20).mean().iloc[-1], rel=1e-9)
+        else: assert np.isnan(st.sma20)
+        if i + 1 >= 11: assert st.avg_volume10 == pytest.approx(part['Volume'].iloc[-11:-1].mean(), rel=1e-9)
+        assert st.atr14 == pytest.approx(app.calculate_true_atr(part['High'], part['Low'], part['Close']), rel=1e-9)
+        assert st.close_back(1) == c[i] and (i < 9 or st.close_back(10) == c[i - 9])
+    assert st.push(idx[10], o[10], h[10], l[10], c[10], v[10])  # 과거 봉은 무시
+    assert st.close_back(1) == c[-1]
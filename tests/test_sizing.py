@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import app
+
+LEVELS = {'avg_entry': 50.0, 'tp1_trigger': 51.0, 'base_hard_stop': 49.0}
+
+
+def test_vector_matches_single_profile_sizing():
+    target, risk, slot = [600, 150, 3000], [650, 80, 5000], [34400, 4000, 200000]
+    sized = app.size_positions(LEVELS, target, risk, slot)
+    assert [z['qty'] for z in sized] == [app.size_position(LEVELS, t, r, c)['qty'] for t, r, c in zip(target, risk, slot)]
+    assert all(z['qty'] >= 2 and z['qty'] % 2 == 0 and z['half_qty'] * 2 == z['qty'] for z in sized)
+
+
+def test_caps_bind_in_order():
+    assert app.size_position(LEVELS, 600, 10_000, 1_000_000)['qty'] == 1202  # 목표 수익 한도
+    assert app.size_position(LEVELS, 600, 100, 1_000_000)['qty'] == 100      # 리스크 한도
+    assert app.size_position(LEVELS, 600, 10_000, 5_000)['qty'] == 100       # 슬롯 자본 한도
+    assert app.size_position(LEVELS, 600, 1, 10)['qty'] == 2                 # 최소 2주
+
+
+@pytest.mark.parametrize("tp1", [50.0, 49.5])
+def test_non_positive_profit_per_share_falls_back_to_slot_cap(tp1):
+    z = app.size_position(dict(LEVELS, tp1_trigger=tp1), 600, 10_000, 5_000)
+    assert z['qty'] == 100 and np.isfinite(z['expected_profit_at_t1'])
+
+
+def test_non_positive_risk_per_share_falls_back_to_other_caps():
+    assert app.size_position(dict(LEVELS, base_hard_stop=50.0), 600, 100, 1_000_000)['qty'] == 1202
+    assert app.size_position(dict(LEVELS, base_hard_stop=50.0, tp1_trigger=50.0), 600, 100, 5_000)['qty'] == 100
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+def scan(n=80, seed=9, n_scanned=None):
+    """Phase-1 stats + 딥스캔 결과 (합성). n_scanned 를 주면 기본 점수 상위 그만큼만 딥스캔된 상태."""
+    rng = np.random.default_rng(seed)
+    idx = pd.Index([f"T{i:02d}" for i in range(n)], name='Ticker')
+    price = rng.uniform(3, 400, n)
+    rs, spike = rng.normal(0.02, 0.08, n), rng.lognormal(0.3, 0.6, n)
+    stats = pd.DataFrame({'Price': price, 'Prev_Close': price / (1 + rng.normal(0.01, 0.03, n)), 'RS': rs, 'Vol_Spike': spike,
+                          'SMA20': price * rng.uniform(0.9, 1.1, n), 'True_Gap': rng.normal(2, 6, n), 'Basic_Power_Score': (rs + 1.0) * spike}, index=idx)
+    scanned = idx if n_scanned is None else stats['Basic_Power_Score'].sort_values(ascending=False).index[:n_scanned]
+    m = len(scanned)
+    pm_vwap = np.where(rng.random(m) < 0.1, 0.0, stats.loc[scanned, 'Price'].to_numpy() * rng.uniform(0.95, 1.05, m))
+    deep = pd.DataFrame({'Market_Cap': rng.choice([5e9, 6e10, 2e11], m), 'Gap_Pct': rng.normal(2, 4, m), 'PM_VWAP': pm_vwap,
+                         'VWAP_Status': np.where(pm_vwap > 0, "✅", "알수없음")}, index=scanned)
+    return stats, deep
+
+
+def reference_top10(stats, deep, vix, is_doomsday, params):
+    """실행 파이프라인 그대로: 2단계 필터 → 기본 점수 상위 20 → 딥스캔 페널티 → 파워 스코어 상위 10."""
+    valid = app.apply_two_stage_filter(stats, vix, is_doomsday, params)
+    if valid.empty: return []
+    pre = valid.sort_values(by='Basic_Power_Score', ascending=False).head(20)
+    d = deep.reindex(pre.index)
+    penalty, _ = app.deep_scan_penalty(d['Market_Cap'].to_numpy(dtype=float), d['Gap_Pct'].to_numpy(dtype=float),
+                                       pre['Price'].to_numpy(dtype=float), d['PM_VWAP'].to_numpy(dtype=float), params)
+    return list(pd.Series(pre['Basic_Power_Score'].to_numpy() * penalty, index=pre.index).sort_values(ascending=False).head(10).index)
+
+
+@pytest.mark.parametrize("vix,is_doomsday", [(15.0, False), (22.0, False), (30.0, True)])
+def test_baseline_matches_two_stage_filter_pipeline(vix, is_doomsday):
+    stats, deep = scan()
+    report = app.threshold_sweep(stats, deep, vix, is_doomsday, grid={k: [v] for k, v in app.filter_params(vix, is_doomsday).items()})
+    want = reference_top10(stats, deep, vix, is_doomsday, app.filter_params(vix, is_doomsday))
+    assert report["combos"] == 1 and report["baseline"]["top10"] == want and report["baseline"]["fallback"] == want[0]
+    assert report["same_top10"] == 1.0 and report["deep_coverage"] == 1.0
+
+
+def test_every_grid_cell_matches_pipeline():
+    stats, deep = scan(seed=4)
+    vix, is_doomsday = 21.0, False
+    base = app.filter_params(vix, is_doomsday)
+    grid = {k: v[::2] for k, v in app.default_sweep_grid(base).items()}
+    rng = np.random.default_rng(2)
+    for _ in range(25):
+        cell = {k: float(rng.choice(v)) for k, v in grid.items()}
+        want = reference_top10(stats, deep, vix, is_doomsday, app.filter_params(vix, is_doomsday, cell))
+        report = app.threshold_sweep(stats, deep, vix, is_doomsday, grid={k: [v] for k, v in cell.items()})
+        assert set(report["top10_share"]) == set(want)
+        assert report["fallback_share"] == ({want[0]: 1.0} if want else {})
+
+
+def test_unscanned_candidates_reported_in_deep_coverage():
+    stats, deep = scan(n_scanned=5)
+    grid = {k: [v] for k, v in app.filter_params(15.0, False).items()}
+    report = app.threshold_sweep(stats, deep, 15.0, False, grid=dict(grid, t1_spike=[0.5, 5.0]))
+    assert report["combos"] == 2 and report["deep_coverage"] == 0.0  # 두 조합 모두 딥스캔 안 된 종목이 예선에 듦
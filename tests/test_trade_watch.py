@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+import pytz
+from datetime import datetime
+
+import app
+
+ET = pytz.timezone('US/Eastern')
+LEVELS = {'entry_price': 100.0, 'entry_2_val': 99.0, 'avg_entry': 99.5, 'tp1_trigger': 101.0, 'tp1_limit': 100.9, 'tp2_trigger': 103.0,
+          'tp2_limit': 102.9, 'sl1_trigger': 98.0, 'sl2_trigger': 97.9, 'break_even_stop_limit': 99.4}
+
+
+SIZINGS = {"main": {"qty": 10, "half_qty": 5}, "alt": {"qty": 40, "half_qty": 20}}
+
+
+def bars(rows, start="2026-10-16 09:30"):
+    idx = pd.date_range(pd.Timestamp(start, tz='US/Eastern'), periods=len(rows), freq='1min')
+    return pd.DataFrame(rows, columns=['High', 'Low', 'Close', 'Volume'], index=idx)
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    w = app.TradeWatcher(path=str(tmp_path / "watch.json"))
+    w.arm("TST", LEVELS, SIZINGS, "run-1", now=ET.localize(datetime(2026, 10, 16, 9, 30)))
+    return w, w.watches["TST"]
+
+
+def test_vwap_matches_full_recompute_and_excludes_open_bar(watcher):
+    w, watch = watcher
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 0.05, 30))
+    df = bars(np.c_[close + 0.05, close - 0.05, close, rng.integers(100, 1000, 30)])
+    now = ET.localize(datetime(2026, 10, 16, 10, 0))
+    w._fold(watch, df.iloc[:12], now)
+    w._fold(watch, df.iloc[11:], now)  # 진행 중이던 봉은 다음 폴링에서 완성본으로 다시 들어옴
+    tp = (df['High'] + df['Low'] + df['Close']) / 3
+    assert watch["vwap"] == pytest.approx(float((tp * df['Volume']).sum() / df['Volume'].sum()))
+    assert watch["cum_v"] == pytest.approx(float(df['Volume'].iloc[:-1].sum()))
+    assert watch["session_high"] == pytest.approx(float(df['High'].max()))
+
+
+def test_triggers_fire_once_and_stop_after_close(watcher):
+    w, watch = watcher
+    now = ET.localize(datetime(2026, 10, 16, 10, 0))
+    # 2차 매복 → 1차 방패 → 2차 방패(감시 종료) → 반등해 익절 레벨 전부 돌파
+    df = bars([[100.2, 99.8, 100.0, 500], [99.5, 98.9, 99.0, 500], [99.0, 97.95, 98.0, 500], [98.0, 97.5, 97.6, 500],
+               [101.5, 97.6, 101.2, 500], [104.0, 101.0, 103.5, 500], [104.0, 103.0, 103.8, 500]])
+    alerts = w._fold(watch, df.iloc[:3], now) + w._fold(watch, df.iloc[2:], now)
+    assert [a[1] for a in alerts] == ["entry_2", "sl1", "sl2"]
+    assert watch["state"] == "closed"
+    assert w._fold(watch, df, ET.localize(datetime(2026, 10, 16, 15, 55))) == []  # 닫힌 감시는 MOC도 없음
+
+
+def test_one_bar_spanning_both_sides_stops_first(watcher):
+    w, watch = watcher
+    alerts = w._fold(watch, bars([[100.1, 99.9, 100.0, 100], [104.0, 97.0, 100.0, 100], [100.0, 99.9, 100.0, 100]]), ET.localize(datetime(2026, 10, 16, 10, 0)))
+    assert [a[1] for a in alerts] == ["entry_2", "sl1", "sl2"]
+
+
+def test_alert_uses_each_accounts_quantity(watcher, monkeypatch):
+    w, watch = watcher
+    sent = []
+    class Out:
+        def __init__(self, chat_id): self.chat_id = chat_id
+        def write(self, msg): sent.append((self.chat_id, msg))
+        def stream(self): pass
+    monkeypatch.setattr(app, "RunOutput", Out)
+    for alert in w._fold(watch, bars([[100.0, 98.5, 98.6, 100], [98.6, 98.5, 98.6, 100]]), ET.localize(datetime(2026, 10, 16, 10, 0))): w._alert(*alert)
+    msgs = dict(sent)
+    assert "5주" in msgs["main"] and "20주" in msgs["alt"]
+
+
+def test_bars_before_arming_feed_vwap_but_fire_nothing(tmp_path):
+    w = app.TradeWatcher(path=str(tmp_path / "watch.json"))
+    w.arm("TST", LEVELS, SIZINGS, "run-1", now=ET.localize(datetime(2026, 10, 16, 10, 5, 20)))
+    watch = w.watches["TST"]
+    # 09:30~10:04 는 2차 매복(VWAP)과 1차 익절 레벨을 모두 스친 장중 흐름, 등록 뒤 봉은 레벨 사이에서만 움직임
+    early = [[101.5, 98.8, 100.0, 1000]] * 35
+    df = bars(early + [[100.2, 99.8, 100.0, 500], [100.3, 99.7, 100.1, 500]])
+    assert w._fold(watch, df, ET.localize(datetime(2026, 10, 16, 10, 6))) == []
+    assert watch["cum_v"] == pytest.approx(35 * 1000 + 500) and watch["session_high"] == pytest.approx(101.5)
+    assert [a[1] for a in w._fold(watch, bars([[100.1, 98.9, 99.0, 500]], start="2026-10-16 10:07"), ET.localize(datetime(2026, 10, 16, 10, 8)))] == ["entry_2"]
+
+
+def test_armed_after_moc_time_sends_no_moc(tmp_path):
+    w = app.TradeWatcher(path=str(tmp_path / "watch.json"))
+    w.arm("TST", LEVELS, SIZINGS, "run-1", now=ET.localize(datetime(2026, 10, 16, 15, 52)))
+    watch = w.watches["TST"]
+    assert w._fold(watch, bars([[100.2, 99.8, 100.0, 500]] * 3, start="2026-10-16 15:50"), ET.localize(datetime(2026, 10, 16, 15, 53))) == []